@@ -0,0 +1,98 @@
+"""기사 ID 오프라인 디코더 마이크로벤치마크: 기존 문자열 슬라이싱/정규식 방식과 protobuf 파서를 비교합니다.
+
+사용법: python .github/benchmarks/bench_article_decoder.py [반복 횟수]
+
+fixtures/article_ids.jsonl의 기사 ID를 두 디코더로 해석하여 정확도와 소요 시간을 출력합니다.
+"""
+import base64
+import re
+import sys
+import time
+
+from fixtures import load_article_id_corpus
+import googlenews_resolver
+from googlenews_resolver import ARTICLE_URL, ARTICLE_YOUTUBE, ARTICLE_BATCH_EXECUTE
+
+def legacy_decode_base64_url_part(encoded_str):
+    base64_str = encoded_str.replace("-", "+").replace("_", "/")
+    base64_str += "=" * ((4 - len(base64_str) % 4) % 4)
+    try:
+        return base64.urlsafe_b64decode(base64_str).decode('latin1')
+    except Exception as e:
+        return f"디코딩 중 오류 발생: {e}"
+
+def legacy_extract_youtube_id(decoded_str):
+    match = re.search(r'\x08 "\x0b([\w-]{11})\x98\x01\x01', decoded_str)
+    return match.group(1) if match else None
+
+def legacy_extract_regular_url(decoded_str):
+    for part in re.split(r'[^\x20-\x7E]+', decoded_str):
+        match = re.search(r'(https?://[^\s]+)', part)
+        if match:
+            return match.group(0)
+    return None
+
+def legacy_decode(article_id):
+    """기존 decode_google_news_url의 오프라인 부분 (clean_url 제외)"""
+    try:
+        decoded_str = base64.urlsafe_b64decode(article_id + '==').decode('latin1')
+        prefix = b'\x08\x13\x22'.decode('latin1')
+        if decoded_str.startswith(prefix):
+            decoded_str = decoded_str[len(prefix):]
+        suffix = b'\xd2\x01\x00'.decode('latin1')
+        if decoded_str.endswith(suffix):
+            decoded_str = decoded_str[:-len(suffix)]
+        length = bytearray(decoded_str, 'latin1')[0]
+        if length >= 0x80:
+            decoded_str = decoded_str[2:length+1]
+        else:
+            decoded_str = decoded_str[1:length+1]
+        if decoded_str.startswith("AU_yqL"):
+            return ARTICLE_BATCH_EXECUTE, None
+        regular_url = legacy_extract_regular_url(decoded_str)
+        if regular_url:
+            return ARTICLE_URL, regular_url
+    except Exception:
+        pass
+
+    decoded_str = legacy_decode_base64_url_part(article_id)
+    youtube_id = legacy_extract_youtube_id(decoded_str)
+    if youtube_id:
+        return ARTICLE_YOUTUBE, youtube_id
+    regular_url = legacy_extract_regular_url(decoded_str)
+    if regular_url:
+        return ARTICLE_URL, regular_url
+    return None, None
+
+def protobuf_decode(article_id):
+    # 실행 간 캐시 효과를 배제하기 위해 캐시되지 않은 원래 함수를 호출합니다.
+    return googlenews_resolver.decode_article_id.__wrapped__(article_id)
+
+def measure(label, decode, corpus, repeat):
+    article_ids = [entry["article_id"] for entry in corpus]
+    correct = sum(
+        1 for entry in corpus
+        if tuple(decode(entry["article_id"])) == (entry["kind"], entry["value"])
+    )
+
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for article_id in article_ids:
+            decode(article_id)
+    elapsed = time.perf_counter() - start_time
+
+    per_id = elapsed / (repeat * len(article_ids)) * 1e6
+    print(f"{label:<10} {per_id:8.2f} µs/ID  정확도 {correct}/{len(corpus)}")
+    return per_id
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    corpus = load_article_id_corpus()
+    print(f"기사 ID {len(corpus)}개, {repeat}회 반복")
+
+    legacy_time = measure("기존 방식", legacy_decode, corpus, repeat)
+    protobuf_time = measure("protobuf", protobuf_decode, corpus, repeat)
+    print(f"{legacy_time / protobuf_time:.2f}배 빠름")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""중복 검사 키 벤치마크: guid 문자열 기본 키(+ idx_guid)와 현재 스키마의 dedup_keys(64비트 해시 키) 조회를 비교합니다.
+
+사용법: python .github/benchmarks/bench_dedup_keys.py [행 수] [조회 묶음 수]
+
+두 스키마에 같은 행을 넣고 키 B-tree 크기, DB 파일 크기, 후보 100개씩 묶어 조회하는 시간을 출력합니다.
+두 방식 모두 후보 한 묶음을 IN (...) 질의 한 번으로 조회하며(보관 테이블 조회 없음), 시간은 세 가지로 잽니다.
+- 조회만: 인자를 미리 만들어 둔 SQL 조회 시간 (해시 계산 제외)
+- 전체: find_existing() / find_seen_hashed() 호출 시간 (해시 계산과 검사값 비교 포함)
+- 새 연결: 묶음마다 연결을 새로 열어 SQLite 페이지 캐시가 빈 상태의 전체 조회 시간 (실행마다 DB를 새로 여는 경우)
+후보의 절반은 저장된 guid, 절반은 새 guid이며, 두 방식의 조회 결과가 같은지도 확인합니다.
+크기는 SQLite가 dbstat 가상 테이블을 지원할 때만 출력합니다.
+"""
+import os
+import sys
+import time
+import random
+import base64
+import sqlite3
+import tempfile
+
+import fixtures  # noqa: F401  (.github/scripts 경로 추가)
+from state_store import id_hash, id_check, create_tables, find_existing, find_seen_hashed
+
+BATCH_SIZE = 100
+SOURCE = 'top'
+
+LEGACY_SCHEMA = [
+    '''CREATE TABLE news_items
+       (pub_date TEXT,
+        guid TEXT PRIMARY KEY,
+        title TEXT,
+        link TEXT)''',
+    "CREATE UNIQUE INDEX idx_guid ON news_items(guid)",
+]
+
+def make_guid(rng):
+    """실제 Google News guid와 비슷한 길이(약 120자)의 base64 문자열을 만듭니다."""
+    return base64.urlsafe_b64encode(rng.getrandbits(720).to_bytes(90, 'big')).decode('ascii')
+
+def build(path, rows, hashed):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    if hashed:
+        create_tables(conn)
+    else:
+        for sql in LEGACY_SCHEMA:
+            conn.execute(sql)
+    start_time = time.perf_counter()
+    if hashed:
+        conn.executemany(
+            "INSERT OR IGNORE INTO news_items (source, guid_hash, pub_date, guid, title, link) VALUES (?, ?, ?, ?, ?, ?)",
+            ((SOURCE, id_hash(guid), "Mon, 01 Jan 2024 00:00:00 GMT", guid, "제목", link) for guid, link in rows)
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO dedup_keys (source, key_hash, key_check) VALUES (?, ?, ?)",
+            ((SOURCE, id_hash(key), id_check(key)) for row in rows for key in row)
+        )
+    else:
+        conn.executemany(
+            "INSERT INTO news_items (pub_date, guid, title, link) VALUES (?, ?, ?, ?)",
+            (("Mon, 01 Jan 2024 00:00:00 GMT", guid, "제목", link) for guid, link in rows)
+        )
+    conn.commit()
+    build_time = time.perf_counter() - start_time
+    conn.execute("VACUUM")
+    return conn, build_time
+
+def object_sizes(conn):
+    """테이블과 인덱스별 크기(바이트)를 반환합니다. dbstat을 쓸 수 없으면 None입니다."""
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+def time_batches(run, batches):
+    """run(keys)를 묶음마다 실행하여 묶음당 평균 시간(ms)과 결과 목록을 반환합니다."""
+    start_time = time.perf_counter()
+    found = [run(keys) for keys in batches]
+    return (time.perf_counter() - start_time) / len(batches) * 1000, found
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    batches = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = random.Random(0)
+    rows = [(make_guid(rng), f"https://www.example.com/news/{i}.html") for i in range(row_count)]
+    candidate_batches = []
+    for _ in range(batches):
+        stored = [rows[rng.randrange(row_count)][0] for _ in range(BATCH_SIZE // 2)]
+        candidate_batches.append(stored + [make_guid(rng) for _ in range(BATCH_SIZE - len(stored))])
+    placeholders = ", ".join("?" * BATCH_SIZE)
+    print(f"행 {row_count:,}개, 후보 {BATCH_SIZE}개씩 {batches}회 조회")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        variants = [
+            ("문자열 키 (idx_guid)", False, ["news_items", "sqlite_autoindex_news_items_1", "idx_guid"],
+             f"SELECT guid FROM news_items WHERE guid IN ({placeholders})",
+             lambda keys: keys,
+             lambda conn, keys: find_existing(conn, "news_items", "guid", keys)),
+            ("해시 키 (dedup_keys)", True, ["news_items", "dedup_keys"],
+             f"SELECT key_hash, key_check FROM dedup_keys WHERE source = ? AND key_hash IN ({placeholders})",
+             lambda keys: (SOURCE, *(id_hash(key) for key in keys)),
+             lambda conn, keys: find_seen_hashed(conn, SOURCE, keys)),
+        ]
+        results = []
+        for name, hashed, key_objects, probe_sql, probe_params, lookup in variants:
+            path = os.path.join(temp_dir, f"{'hashed' if hashed else 'legacy'}.db")
+            conn, build_time = build(path, rows, hashed)
+            sizes = object_sizes(conn)
+
+            params = [probe_params(keys) for keys in candidate_batches]
+            probe_time, _ = time_batches(lambda values: conn.execute(probe_sql, values).fetchall(), params)
+            lookup_time, found = time_batches(lambda keys: lookup(conn, keys), candidate_batches)
+            conn.close()
+
+            def cold_lookup(keys):
+                cold_conn = sqlite3.connect(path)
+                try:
+                    return lookup(cold_conn, keys)
+                finally:
+                    cold_conn.close()
+            cold_time, _ = time_batches(cold_lookup, candidate_batches)
+            results.append(found)
+
+            print(
+                f"{name}: 넣기 {build_time:.1f}s, DB 파일 {os.path.getsize(path) / 1048576:.1f}MB, "
+                f"조회만 {probe_time:.3f} / 전체 {lookup_time:.3f} / 새 연결 {cold_time:.3f} ms/묶음"
+            )
+            if sizes is not None:
+                for object_name in key_objects:
+                    print(f"  {object_name:<32} {sizes.get(object_name, 0) / 1048576:8.1f}MB")
+
+        mismatches = sum(1 for legacy, hashed in zip(*results) if legacy != hashed)
+        print(f"조회 결과 불일치 {mismatches}개")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""설명 HTML 파서 백엔드 벤치마크: fast(전용 추출기), bs4(html.parser), lxml(bs4 + lxml)을 비교합니다.
+
+사용법: python .github/benchmarks/bench_description_backends.py [반복 횟수]
+
+fixtures/google_news_feed.xml의 모든 항목 설명을 각 백엔드로 파싱하여 항목당 소요 시간을 출력하고,
+모든 백엔드의 결과가 bs4 결과와 같은지 확인합니다. 설치되지 않은 백엔드는 건너뜁니다.
+"""
+import sys
+import time
+
+from fixtures import load_feed
+from googlenews_feed import DESCRIPTION_BACKENDS, iter_rss_items, extract_description_entries, parse_description_items
+
+def backend_available(name):
+    if name != 'lxml':
+        return True
+    try:
+        import lxml  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    descriptions = [record.description_html for record in iter_rss_items(load_feed())]
+    print(f"설명 {len(descriptions)}개, {repeat}회 반복")
+
+    def parse_all(name):
+        return [
+            (extract_description_entries(description, name), parse_description_items(description, name))
+            for description in descriptions
+        ]
+
+    expected = parse_all('bs4')
+    baseline = None
+    for name in ['bs4'] + [name for name in DESCRIPTION_BACKENDS if name != 'bs4']:
+        if not backend_available(name):
+            print(f"{name:<6} 설치되지 않아 건너뜀")
+            continue
+
+        results = parse_all(name)
+        mismatches = sum(1 for result, want in zip(results, expected) if result != want)
+
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for description in descriptions:
+                parse_description_items(description, name)
+        per_item = (time.perf_counter() - start_time) / (repeat * len(descriptions)) * 1e6
+
+        if baseline is None:
+            baseline = per_item
+        speedup = f"  bs4 대비 {baseline / per_item:.1f}배" if name != 'bs4' else ""
+        print(f"{name:<6} {per_item:8.1f} µs/항목  결과 불일치 {mismatches}개{speedup}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""설명 HTML 파싱 벤치마크: 기존 2회 파싱 방식과 단일 패스 파서를 비교합니다.
+
+사용법: python .github/benchmarks/bench_description_parser.py [항목 수] [관련 뉴스 수] [요청 지연(ms)]
+
+링크 해석은 오프라인 디코딩으로 대체하며, 해석 호출 한 번을 외부 요청 한 번으로 셉니다.
+요청 지연을 주면 각 해석 호출마다 그만큼 sleep하여 네트워크 비용을 흉내 냅니다.
+"""
+import sys
+import time
+from bs4 import BeautifulSoup
+
+from fixtures import make_description
+from googlenews_feed import replace_brackets, parse_description
+from googlenews_resolver import decode_google_news_url_offline
+
+class CountingResolver:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, google_link):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return decode_google_news_url_offline(google_link) or google_link
+
+def legacy_parse_html_description(html_desc, resolve_link):
+    """기존 parse_html_description (첫 번째 파싱)"""
+    soup = BeautifulSoup(html_desc, 'html.parser')
+    news_items = []
+    full_content_link = ""
+    for item in soup.find_all('li'):
+        if 'Google 뉴스에서 전체 콘텐츠 보기' in item.text:
+            full_content_link_match = item.find('a')
+            if full_content_link_match:
+                full_content_link = full_content_link_match['href']
+            continue
+        title_match = item.find('a')
+        press_match = item.find('font', color="#6f6f6f")
+        if title_match and press_match:
+            link = resolve_link(title_match['href'])
+            news_items.append(f"- [{replace_brackets(title_match.text)}](<{link}>) | {press_match.text}")
+    news_string = '\n'.join(news_items)
+    if full_content_link:
+        news_string += f"\n\n▶️ [Google 뉴스에서 전체 콘텐츠 보기](<{full_content_link}>)"
+    return news_string
+
+def legacy_extract_news_items(description, resolve_link):
+    """기존 extract_news_items (두 번째 파싱)"""
+    soup = BeautifulSoup(description, 'html.parser')
+    news_items = []
+    for li in soup.find_all('li'):
+        a_tag = li.find('a')
+        if a_tag:
+            link = resolve_link(a_tag['href'])
+            press = li.find('font', color="#6f6f6f").text if li.find('font', color="#6f6f6f") else ""
+            news_items.append({"title": replace_brackets(a_tag.text), "link": link, "press": press})
+    return news_items
+
+def run_legacy(descriptions, resolve_link):
+    for html_desc in descriptions:
+        legacy_parse_html_description(html_desc, resolve_link)
+        legacy_extract_news_items(html_desc, resolve_link)
+
+def run_single_pass(descriptions, resolve_link):
+    for html_desc in descriptions:
+        parse_description(html_desc, resolve_link)
+
+def measure(label, func, descriptions, latency):
+    resolver = CountingResolver(latency)
+    start_time = time.perf_counter()
+    func(descriptions, resolver)
+    elapsed = time.perf_counter() - start_time
+    print(f"{label:<12} {elapsed * 1000:10.1f} ms  해석 호출(외부 요청) {resolver.calls:6d}회")
+    return elapsed, resolver.calls
+
+def main():
+    item_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    related_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0
+
+    descriptions = [make_description(i, related_count) for i in range(item_count)]
+    print(f"항목 {item_count}개, 항목당 관련 뉴스 {related_count}개, 요청 지연 {latency * 1000:.0f}ms")
+
+    legacy_time, legacy_calls = measure("기존 방식", run_legacy, descriptions, latency)
+    single_time, single_calls = measure("단일 패스", run_single_pass, descriptions, latency)
+
+    print(f"파싱 시간 {legacy_time / single_time:.2f}배 단축, 외부 요청 {legacy_calls - single_calls}회 감소")
+
+if __name__ == "__main__":
+    main()
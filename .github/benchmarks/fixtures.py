@@ -0,0 +1,189 @@
+"""벤치마크용 Google News RSS 가짜 데이터를 생성합니다."""
+import base64
+import html
+import json
+import os
+import sys
+
+# 벤치마크에서 .github/scripts의 공용 모듈을 import할 수 있도록 경로 추가
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ARTICLE_IDS_PATH = os.path.join(FIXTURES_DIR, 'article_ids.jsonl')
+FEED_PATH = os.path.join(FIXTURES_DIR, 'google_news_feed.xml')
+
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def encode_field(field_number, value):
+    """protobuf 필드 하나를 인코딩합니다. value가 int면 varint, bytes면 길이 구분 필드입니다."""
+    if isinstance(value, int):
+        return encode_varint(field_number << 3) + encode_varint(value)
+    return encode_varint(field_number << 3 | 2) + encode_varint(len(value)) + value
+
+def encode_article_id(fields):
+    payload = b''.join(encode_field(number, value) for number, value in fields)
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def make_article_id_corpus(count=300):
+    """실제 기사 ID와 같은 구조의 기사 ID와 기대 해석 결과 목록을 만듭니다.
+
+    일반 URL(짧은/긴 길이), AMP 링크가 붙은 URL, 유튜브 영상, batchexecute 대상(AU_yqL),
+    손상된 ID를 골고루 섞습니다.
+    """
+    corpus = []
+    for i in range(count):
+        variant = i % 6
+        if variant == 0:
+            url = f"https://www.example.com/news/{i}.html"
+            fields = [(1, 19), (4, url.encode()), (26, b'')]
+            expected = ("url", url)
+        elif variant == 1:
+            url = f"https://www.example.co.kr/articles/{i}/" + "long-slug-" * 20 + "end?from=rss"
+            fields = [(1, 19), (4, url.encode()), (26, b'')]
+            expected = ("url", url)
+        elif variant == 2:
+            url = f"https://news.example.org/{i}"
+            fields = [(1, 19), (4, url.encode()), (5, f"https://news.example.org/amp/{i}".encode()), (26, b'')]
+            expected = ("url", url)
+        elif variant == 3:
+            video_id = base64.urlsafe_b64encode(i.to_bytes(8, 'big')).decode('ascii')[:11]
+            fields = [(1, 32), (4, video_id.encode()), (19, 1)]
+            expected = ("youtube", video_id)
+        elif variant == 4:
+            token = "AU_yqL" + base64.urlsafe_b64encode(i.to_bytes(64, 'big')).decode('ascii')
+            fields = [(1, 19), (4, token.encode()), (26, b'')]
+            expected = ("batchexecute", None)
+        else:
+            article_id = encode_article_id([(1, 19), (4, f"https://broken.example.com/{i}".encode())])[:-12]
+            corpus.append({"article_id": article_id, "kind": None, "value": None})
+            continue
+        corpus.append({"article_id": encode_article_id(fields), "kind": expected[0], "value": expected[1]})
+    return corpus
+
+def load_article_id_corpus():
+    """fixtures/article_ids.jsonl을 읽습니다. 파일이 없으면 생성합니다."""
+    if not os.path.exists(ARTICLE_IDS_PATH):
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        with open(ARTICLE_IDS_PATH, 'w', encoding='utf-8') as f:
+            for entry in make_article_id_corpus():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    with open(ARTICLE_IDS_PATH, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def make_article_link(index):
+    """오프라인으로 디코딩 가능한 Google News 기사 링크를 만듭니다."""
+    url = f"https://www.example.com/news/article-{index}.html"
+    article_id = encode_article_id([(1, 19), (4, url.encode()), (26, b'')])
+    return f"https://news.google.com/rss/articles/{article_id}?oc=5"
+
+def make_description(item_index, related_count=5):
+    """관련 뉴스 목록과 "전체 콘텐츠 보기" 링크가 포함된 설명 HTML을 만듭니다."""
+    lines = ['<ol>']
+    for i in range(related_count):
+        link = make_article_link(item_index * 100 + i)
+        lines.append(
+            f'<li><a href="{link}" target="_blank">관련 기사 [{item_index}-{i}] 제목</a>'
+            f'&nbsp;&nbsp;<font color="#6f6f6f">언론사 {i}</font></li>'
+        )
+    lines.append(
+        f'<li><strong><a href="https://news.google.com/stories/CAAqStory{item_index}?oc=5" target="_blank">'
+        'Google 뉴스에서 전체 콘텐츠 보기</a></strong></li>'
+    )
+    lines.append('</ol>')
+    return ''.join(lines)
+
+def make_feed(item_count=100, related_count=5):
+    """item_count개의 항목을 가진 RSS 피드 XML 문자열을 만듭니다."""
+    items = []
+    for i in range(item_count):
+        items.append(
+            '<item>'
+            f'<title>뉴스 제목 {i} - 언론사</title>'
+            f'<link>{make_article_link(i)}</link>'
+            f'<guid isPermaLink="false">guid-{i}</guid>'
+            f'<pubDate>Mon, 01 Jan 2024 {i % 24:02d}:00:00 GMT</pubDate>'
+            f'<description>{html.escape(make_description(i, related_count))}</description>'
+            '<source url="https://www.example.com">언론사</source>'
+            '</item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<rss version="2.0"><channel><title>Google 뉴스</title>'
+        + ''.join(items) +
+        '</channel></rss>'
+    )
+
+# 실제 피드에서 볼 수 있는 제목·언론사 형태 (엔티티, 대괄호, 따옴표, 영문 등)
+SAMPLE_TITLES = [
+    '[단독] 정부, 내년 예산안 발표',
+    'AT&T and Verizon "outage" explained',
+    '코스피 2,600선 회복…외국인 순매수 <종합>',
+    '“금리 인하 기대감” 美 증시 상승',
+    'Apple unveils new iPhone – what you need to know',
+]
+SAMPLE_PRESS = ['연합뉴스', 'Reuters', '조선일보', 'The Verge', 'KBS 뉴스']
+
+def make_varied_description(item_index):
+    """실제 Google News 설명 마크업의 변형을 섞은 설명 HTML을 만듭니다."""
+    variant = item_index % 5
+    if variant == 4:
+        # 관련 뉴스 목록 없이 링크 하나만 있는 형태 (키워드 검색 피드)
+        title = html.escape(SAMPLE_TITLES[item_index % len(SAMPLE_TITLES)], quote=False)
+        return (f'<a href="{make_article_link(item_index)}" target="_blank">{title}</a>'
+                f'&nbsp;&nbsp;<font color="#6f6f6f">{SAMPLE_PRESS[item_index % len(SAMPLE_PRESS)]}</font>')
+
+    lines = ['<ol>']
+    for i in range(2 + item_index % 4):
+        title = html.escape(SAMPLE_TITLES[(item_index + i) % len(SAMPLE_TITLES)], quote=False)
+        link = make_article_link(item_index * 100 + i)
+        if variant == 2 and i == 1:
+            link += "&amp;hl=ko&amp;gl=KR"
+        press = SAMPLE_PRESS[(item_index + i) % len(SAMPLE_PRESS)]
+        if variant == 3 and i == 0:
+            lines.append(f'<li><a href="{link}" target="_blank">{title}</a></li>')  # 언론사 없음
+        else:
+            lines.append(f'<li><a href="{link}" target="_blank">{title}</a>&nbsp;&nbsp;<font color="#6f6f6f">{press}</font></li>')
+    full_coverage = 'View Full Coverage on Google News' if variant == 1 else 'Google 뉴스에서 전체 콘텐츠 보기'
+    lines.append(
+        f'<li><strong><a href="https://news.google.com/stories/CAAqStory{item_index}?hl=ko&amp;gl=KR" target="_blank">'
+        f'{full_coverage}</a></strong></li>'
+    )
+    lines.append('</ol>')
+    return ''.join(lines)
+
+def load_feed(item_count=100):
+    """fixtures/google_news_feed.xml을 읽습니다. 파일이 없으면 설명 마크업 변형을 섞어 생성합니다."""
+    if not os.path.exists(FEED_PATH):
+        items = []
+        for i in range(item_count):
+            items.append(
+                '<item>'
+                f'<title>{html.escape(SAMPLE_TITLES[i % len(SAMPLE_TITLES)])} - {SAMPLE_PRESS[i % len(SAMPLE_PRESS)]}</title>'
+                f'<link>{make_article_link(i)}</link>'
+                f'<guid isPermaLink="false">guid-{i}</guid>'
+                f'<pubDate>Mon, 01 Jan 2024 {i % 24:02d}:{i % 60:02d}:00 GMT</pubDate>'
+                f'<description>{html.escape(make_varied_description(i))}</description>'
+                f'<source url="https://www.example.com">{SAMPLE_PRESS[i % len(SAMPLE_PRESS)]}</source>'
+                '</item>\n'
+            )
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        with open(FEED_PATH, 'w', encoding='utf-8') as f:
+            f.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<rss version="2.0"><channel><title>Google 뉴스</title>\n'
+                + ''.join(items) +
+                '</channel></rss>\n'
+            )
+    with open(FEED_PATH, 'rb') as f:
+        return f.read()
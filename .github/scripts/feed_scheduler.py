@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+import logging
+
+# 폴링 간격 설정(분): 최소/최대 간격, 관측이 없을 때의 기본 간격
+FEED_POLL_MIN_MINUTES = float(os.environ.get('FEED_POLL_MIN_MINUTES') or '5')
+FEED_POLL_MAX_MINUTES = float(os.environ.get('FEED_POLL_MAX_MINUTES') or '360')
+FEED_POLL_DEFAULT_MINUTES = float(os.environ.get('FEED_POLL_DEFAULT_MINUTES') or '30')
+# 한 번 폴링할 때 기대하는 새 항목 수 (간격 = 평균 도착 간격 × 이 값)
+FEED_POLL_ITEMS_PER_POLL = float(os.environ.get('FEED_POLL_ITEMS_PER_POLL') or '1')
+# 도착 간격 지수 이동 평균의 가중치
+FEED_POLL_EWMA_ALPHA = float(os.environ.get('FEED_POLL_EWMA_ALPHA') or '0.3')
+
+class FeedScheduler:
+    """피드별로 새 항목의 도착 간격을 SQLite에 기록하고 다음 폴링 시각을 정합니다.
+
+    새 항목의 발행 시각 사이 간격을 지수 이동 평균으로 누적하고, 다음 간격은
+    평균 도착 간격 × FEED_POLL_ITEMS_PER_POLL을 최소/최대 간격 사이로 제한해 정합니다.
+    새 항목 없이 지난 시간도 도착 간격의 하한으로 보므로, 조용한 피드일수록 간격이 점점 늘어납니다.
+    """
+
+    def __init__(self, db_path, min_interval=FEED_POLL_MIN_MINUTES * 60, max_interval=FEED_POLL_MAX_MINUTES * 60,
+                 default_interval=FEED_POLL_DEFAULT_MINUTES * 60, items_per_poll=FEED_POLL_ITEMS_PER_POLL, alpha=FEED_POLL_EWMA_ALPHA):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.default_interval = default_interval
+        self.items_per_poll = items_per_poll
+        self.alpha = alpha
+
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS feed_schedule
+                             (feed_key TEXT PRIMARY KEY,
+                              mean_gap REAL,
+                              last_item_at REAL,
+                              observations INTEGER NOT NULL DEFAULT 0,
+                              last_polled REAL,
+                              next_poll REAL NOT NULL)''')
+
+    def _load(self, feed_key):
+        row = self.conn.execute(
+            "SELECT mean_gap, last_item_at, observations FROM feed_schedule WHERE feed_key = ?", (feed_key,)
+        ).fetchone()
+        return row if row else (None, None, 0)
+
+    def interval(self, mean_gap, last_item_at, now):
+        """평균 도착 간격과 마지막 항목 이후 흐른 시간으로 다음 폴링 간격(초)을 계산합니다."""
+        if mean_gap is None:
+            expected_gap = self.default_interval / max(self.items_per_poll, 1e-9)
+        else:
+            expected_gap = mean_gap
+        if last_item_at:
+            expected_gap = max(expected_gap, now - last_item_at)
+        return min(max(expected_gap * self.items_per_poll, self.min_interval), self.max_interval)
+
+    def record_poll(self, feed_key, published_times, now=None):
+        """폴링 결과(새 항목의 발행 시각 목록, 초 단위)를 기록하고 다음 폴링 시각을 반환합니다."""
+        now = now or time.time()
+        mean_gap, last_item_at, observations = self._load(feed_key)
+
+        previous = last_item_at
+        for published in sorted(t for t in published_times if t):
+            # 마지막으로 본 항목보다 먼저 발행된 항목(늦게 색인된 기사)은 간격 계산에서 뺍니다.
+            if previous is not None and published <= previous:
+                continue
+            if previous is not None:
+                gap = published - previous
+                mean_gap = gap if mean_gap is None else self.alpha * gap + (1 - self.alpha) * mean_gap
+                observations += 1
+            previous = published
+        last_item_at = previous
+
+        next_poll = now + self.interval(mean_gap, last_item_at, now)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO feed_schedule (feed_key, mean_gap, last_item_at, observations, last_polled, next_poll) VALUES (?, ?, ?, ?, ?, ?)",
+            (feed_key, mean_gap, last_item_at, observations, now, next_poll)
+        )
+        gap_text = f"{mean_gap / 60:.1f}분" if mean_gap is not None else "관측 없음"
+        logging.info(
+            f"폴링 일정 - {feed_key}: 새 항목 {len(published_times)}개, 평균 도착 간격 {gap_text}, "
+            f"다음 폴링 {(next_poll - now) / 60:.1f}분 후"
+        )
+        return next_poll
+
+    def record_failure(self, feed_key, now=None):
+        """폴링에 실패한 피드는 통계를 바꾸지 않고 최소 간격 뒤에 다시 시도하도록 합니다."""
+        now = now or time.time()
+        mean_gap, last_item_at, observations = self._load(feed_key)
+        next_poll = now + self.min_interval
+        self.conn.execute(
+            "INSERT OR REPLACE INTO feed_schedule (feed_key, mean_gap, last_item_at, observations, last_polled, next_poll) VALUES (?, ?, ?, ?, ?, ?)",
+            (feed_key, mean_gap, last_item_at, observations, now, next_poll)
+        )
+        return next_poll
+
+    def due_feeds(self, feed_keys, now=None):
+        """feed_keys 중 폴링할 때가 된 피드를 다음 폴링 시각 순으로 반환합니다. 기록이 없는 피드는 항상 포함됩니다."""
+        now = now or time.time()
+        next_polls = dict(self.conn.execute("SELECT feed_key, next_poll FROM feed_schedule").fetchall())
+        due = [key for key in feed_keys if next_polls.get(key, 0) <= now]
+        return sorted(due, key=lambda key: next_polls.get(key, 0))
+
+    def next_due(self, feed_keys):
+        """feed_keys 중 가장 이른 다음 폴링 시각을 반환합니다. 기록이 없는 피드가 있으면 0입니다."""
+        next_polls = dict(self.conn.execute("SELECT feed_key, next_poll FROM feed_schedule").fetchall())
+        return min((next_polls.get(key, 0) for key in feed_keys), default=0)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,382 @@
+"""피드 스냅샷: 실행마다 받은 원본 피드 본문과 요청 정보를 보관하고, 보관한 스냅샷으로 전체 처리 과정을 다시 실행합니다.
+
+기록: FEED_SNAPSHOT_DIR을 지정하면 fetch_rss_feed가 받은 RSS 응답과 YouTube API 응답을 그 디렉터리에 남깁니다.
+  objects/<sha256 앞 2자리>/<sha256>.gz   gzip으로 압축한 응답 본문 (내용 주소 방식이라 같은 본문은 한 번만 저장)
+  index.jsonl                             응답마다 한 줄: 실행 ID, 스크립트, URL, 시각, 상태 코드, 헤더, 지연 시간, 본문 해시
+저장소 크기가 FEED_SNAPSHOT_MAX_MB를 넘으면 가장 오래된 실행의 기록부터 지웁니다.
+
+사용법:
+  python .github/scripts/feed_snapshot.py list 스냅샷_디렉터리
+      기록된 실행 목록을 출력합니다.
+  python .github/scripts/feed_snapshot.py replay 스냅샷_디렉터리 스크립트 [실행 ID] [반복 횟수]
+      기록된 실행(기본값: 그 스크립트의 마지막 실행)의 응답으로 스크립트를 빈 DB에서 다시 실행하고 소요 시간을 출력합니다.
+      네트워크 요청은 기록된 응답(없으면 404)으로, Discord 웹훅은 204 응답으로 대신하며 time.sleep은 건너뜁니다.
+      회차마다 새 프로세스에서 실행하므로 반복 회차도 캐시가 빈 상태에서 측정합니다.
+      피드 설정 환경 변수(RSS_URL_TOP, MULTI_CONFIG_JSON 등)는 기록할 때와 같게 지정해야 같은 URL을 요청합니다.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import runpy
+import shutil
+import hashlib
+import logging
+import subprocess
+import tempfile
+import types
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FEED_SNAPSHOT_DIR = os.environ.get('FEED_SNAPSHOT_DIR', '').strip()
+FEED_SNAPSHOT_MAX_MB = float(os.environ.get('FEED_SNAPSHOT_MAX_MB') or '200')
+
+# 기록하지 않을 응답 헤더 (쿠키 등)
+EXCLUDED_HEADERS = {'set-cookie', 'cookie', 'authorization'}
+# YouTube API 요청 키에서 뺄 매개변수 (API 키와 googleapiclient가 붙이는 값)
+EXCLUDED_API_PARAMS = {'key', 'alt', 'prettyPrint'}
+# replay에서 웹훅 응답(204)으로 대신할 호스트
+DISCORD_HOST_PATTERN = re.compile(r'(^|\.)discord(app)?\.com$')
+
+class SnapshotStore:
+    """내용 주소 방식의 응답 본문 저장소와 응답 기록(index.jsonl)"""
+
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(path, 'index.jsonl')
+        self.lock = threading.Lock()
+        self.total_bytes = None
+
+    def object_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], f"{digest}.gz")
+
+    def put_body(self, body):
+        """본문을 저장하고 SHA-256 해시를 반환합니다. 같은 본문이 이미 있으면 다시 쓰지 않습니다."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, path)
+            if self.total_bytes is not None:
+                self.total_bytes += os.path.getsize(path)
+        return digest
+
+    def load_body(self, digest):
+        with gzip.open(self.object_path(digest), 'rb') as f:
+            return f.read()
+
+    def entries(self):
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def append(self, entry, body=None):
+        """응답 기록 하나를 추가합니다. 저장소가 크기 제한을 넘으면 오래된 실행의 기록을 지웁니다."""
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            if body is not None:
+                entry['body'] = self.put_body(body)
+                entry['size'] = len(body)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            if self.max_bytes:
+                self.enforce_limit(keep_run=entry.get('run'))
+
+    def object_sizes(self):
+        sizes = {}
+        objects_dir = os.path.join(self.path, 'objects')
+        for directory, _, files in os.walk(objects_dir):
+            for name in files:
+                if name.endswith('.gz'):
+                    sizes[name[:-3]] = os.path.getsize(os.path.join(directory, name))
+        return sizes
+
+    def enforce_limit(self, keep_run=None):
+        """저장소 크기가 max_bytes 이하가 될 때까지 가장 오래된 실행부터 기록과 더는 쓰이지 않는 본문을 지웁니다."""
+        if self.total_bytes is None:
+            self.total_bytes = sum(self.object_sizes().values())
+        if self.total_bytes <= self.max_bytes:
+            return
+        entries = self.entries()
+        runs = sorted({entry['run'] for entry in entries if entry['run'] != keep_run})
+        sizes = self.object_sizes()
+        removed_runs = set()
+        for run in runs:
+            removed_runs.add(run)
+            used = {entry.get('body') for entry in entries if entry['run'] not in removed_runs}
+            if sum(size for digest, size in sizes.items() if digest in used) <= self.max_bytes:
+                break
+        kept = [entry for entry in entries if entry['run'] not in removed_runs]
+        used = {entry.get('body') for entry in kept}
+        for digest in sizes:
+            if digest not in used:
+                os.remove(self.object_path(digest))
+        with open(f"{self.index_path}.tmp", 'w', encoding='utf-8') as f:
+            for entry in kept:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        self.total_bytes = sum(size for digest, size in sizes.items() if digest in used)
+        logging.info(f"피드 스냅샷 저장소 크기 제한으로 실행 {len(removed_runs)}개의 기록을 지웠습니다. ({self.total_bytes / 1048576:.1f}MB)")
+
+_store = None
+_run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+def get_store():
+    """FEED_SNAPSHOT_DIR을 지정했을 때만 기록용 저장소를 반환합니다."""
+    global _store
+    if _store is None and FEED_SNAPSHOT_DIR:
+        _store = SnapshotStore(FEED_SNAPSHOT_DIR, int(FEED_SNAPSHOT_MAX_MB * 1048576) or None)
+    return _store
+
+def _entry(kind, url, latency):
+    return {
+        'run': _run_id,
+        'script': os.path.basename(sys.argv[0]),
+        'kind': kind,
+        'url': url,
+        'fetched_at': time.time(),
+        'latency_ms': round(latency * 1000, 1),
+    }
+
+def record_response(url, response, latency, request_headers=None):
+    """HTTP 응답(requests.Response)의 본문과 요청 정보를 기록합니다. 기록에 실패해도 실행은 계속합니다."""
+    store = get_store()
+    if store is None:
+        return
+    try:
+        entry = _entry('http', url, latency)
+        entry['status'] = response.status_code
+        entry['request_headers'] = dict(request_headers or {})
+        entry['headers'] = {key: value for key, value in response.headers.items() if key.lower() not in EXCLUDED_HEADERS}
+        store.append(entry, response.content if response.content else None)
+    except Exception as e:
+        logging.warning(f"피드 스냅샷 기록 실패: {e}")
+
+def api_request_key(method_id, uri):
+    """API 요청을 가리키는 키(메서드와 정렬한 매개변수)를 만듭니다. API 키는 넣지 않습니다."""
+    params = sorted((key, value) for key, value in parse_qsl(urlsplit(uri).query) if key not in EXCLUDED_API_PARAMS)
+    return f"{method_id}?{urlencode(params)}"
+
+def execute_request(request):
+    """googleapiclient 요청을 실행하고, 기록 중이면 응답을 JSON 본문으로 남깁니다."""
+    start_time = time.perf_counter()
+    response = request.execute()
+    store = get_store()
+    if store is not None:
+        try:
+            entry = _entry('api', api_request_key(request.methodId, request.uri), time.perf_counter() - start_time)
+            entry['status'] = 200
+            store.append(entry, json.dumps(response, ensure_ascii=False).encode('utf-8'))
+        except Exception as e:
+            logging.warning(f"피드 스냅샷 기록 실패: {e}")
+    return response
+
+def list_runs(store):
+    """실행별 (실행 ID, 스크립트, 응답 수, 본문 크기, 네트워크 시간) 목록을 반환합니다."""
+    runs = {}
+    for entry in store.entries():
+        run = runs.setdefault(entry['run'], [entry['script'], 0, 0, 0.0])
+        run[1] += 1
+        run[2] += entry.get('size', 0)
+        run[3] += entry.get('latency_ms', 0)
+    return [(run_id,) + tuple(values) for run_id, values in sorted(runs.items())]
+
+class ReplayResponses:
+    """기록된 실행의 응답을 URL별로 기록된 순서대로 돌려줍니다. 한 URL의 응답을 다 쓰면 마지막 응답을 다시 씁니다."""
+
+    def __init__(self, store, entries):
+        self.store = store
+        self.queues = {}
+        for entry in entries:
+            self.queues.setdefault((entry['kind'], entry['url']), []).append(entry)
+        self.served = {}
+        self.network_ms = 0.0
+        self.misses = 0
+
+    def next(self, kind, url):
+        queue = self.queues.get((kind, url))
+        if not queue:
+            self.misses += 1
+            return None, None
+        index = self.served.get((kind, url), 0)
+        self.served[(kind, url)] = index + 1
+        entry = queue[min(index, len(queue) - 1)]
+        self.network_ms += entry.get('latency_ms', 0)
+        return entry, self.store.load_body(entry['body']) if entry.get('body') else b''
+
+class ReplayApiRequest:
+    """googleapiclient 요청 대신 기록된 API 응답을 돌려주는 요청"""
+
+    def __init__(self, responses, method_id, params):
+        self.responses = responses
+        self.methodId = method_id
+        self.uri = 'https://replay.invalid/?' + urlencode([
+            (key, str(value).lower() if isinstance(value, bool) else str(value))
+            for key, value in params.items() if value is not None
+        ])
+
+    def execute(self):
+        entry, body = self.responses.next('api', api_request_key(self.methodId, self.uri))
+        if entry is None:
+            raise ReplayHttpError(f"기록되지 않은 API 요청: {api_request_key(self.methodId, self.uri)}")
+        return json.loads(body)
+
+class ReplayHttpError(Exception):
+    pass
+
+class ReplayYouTube:
+    """build('youtube', 'v3')가 돌려주는 서비스 객체 대신 쓰는 객체 (youtube.search().list(...) 형태만 지원)"""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def __getattr__(self, resource):
+        responses = self.responses
+
+        class Resource:
+            def list(self, **params):
+                return ReplayApiRequest(responses, f"youtube.{resource}.list", params)
+
+        return Resource
+
+def _fake_googleapiclient(responses):
+    """googleapiclient 없이도 YouTube 스크립트를 실행할 수 있도록 가짜 모듈을 만듭니다."""
+    package = types.ModuleType('googleapiclient')
+    discovery = types.ModuleType('googleapiclient.discovery')
+    errors = types.ModuleType('googleapiclient.errors')
+    discovery.build = lambda *args, **kwargs: ReplayYouTube(responses)
+    errors.HttpError = ReplayHttpError
+    package.discovery = discovery
+    package.errors = errors
+    return {'googleapiclient': package, 'googleapiclient.discovery': discovery, 'googleapiclient.errors': errors}
+
+def _find_run(store, script, run_id=None):
+    """run_id의 응답 기록을 반환합니다. run_id가 없으면 script의 마지막 실행을 씁니다."""
+    entries = store.entries()
+    if run_id is None:
+        runs = [entry['run'] for entry in entries if entry['script'] == os.path.basename(script)]
+        if not runs:
+            raise ValueError(f"{os.path.basename(script)}의 기록이 없습니다: {store.path}")
+        run_id = max(runs)
+    return run_id, [entry for entry in entries if entry['run'] == run_id]
+
+def replay(snapshot_dir, script, run_id=None, repeat=1):
+    """기록된 실행의 응답으로 script를 빈 DB에서 repeat번 다시 실행하고 회차별 소요 시간을 반환합니다.
+
+    회차마다 새 인터프리터(_replay_once 하위 명령)에서 실행하므로, 앞 회차가 불러온 모듈, lru_cache, 연결 풀이
+    다음 회차로 이어지지 않아 모든 회차가 같은 조건(처음 실행)으로 측정됩니다.
+    """
+    run_id, entries = _find_run(SnapshotStore(snapshot_dir), script, run_id)
+    logging.info(f"실행 {run_id}의 응답 {len(entries)}개로 {os.path.basename(script)}를 {repeat}번 다시 실행합니다.")
+
+    results = []
+    for attempt in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '_replay_once', snapshot_dir, script, run_id, str(attempt + 1), str(repeat)],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True
+        )
+        # 마지막 줄은 회차 결과이고, 그 앞은 스크립트가 표준 출력에 쓴 내용입니다.
+        lines = completed.stdout.splitlines()
+        if lines[:-1]:
+            print('\n'.join(lines[:-1]))
+        results.append(json.loads(lines[-1])['elapsed'])
+    if repeat > 1:
+        ordered = sorted(results)
+        logging.info(f"다시 실행 {repeat}회 - 최소 {ordered[0]:.3f}초, 중앙값 {ordered[len(ordered) // 2]:.3f}초, 최대 {ordered[-1]:.3f}초")
+    return results
+
+def _replay_once(snapshot_dir, script, run_id, attempt=1, repeat=1):
+    """기록된 실행의 응답으로 script를 이 프로세스에서 빈 DB로 한 번 다시 실행하고 소요 시간(초)을 반환합니다."""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    import http_client
+
+    # 스크립트는 임시 작업 디렉터리에서 실행하므로 본문 경로가 바뀌지 않도록 절대 경로로 엽니다.
+    store = SnapshotStore(os.path.abspath(snapshot_dir))
+    run_id, entries = _find_run(store, script, run_id)
+    script = os.path.abspath(script)
+    sys.path.insert(0, os.path.dirname(script))
+    os.environ['FEED_SNAPSHOT_DIR'] = ''  # 다시 실행하는 동안에는 기록하지 않습니다.
+    for name in ('TOP', 'TOPIC', 'KEYWORD', 'YOUTUBE'):
+        os.environ.setdefault(f"DISCORD_WEBHOOK_{name}", 'https://discord.com/api/webhooks/replay')
+    os.environ.setdefault('YOUTUBE_API_KEY', 'replay')
+
+    responses = ReplayResponses(store, entries)
+    counters = {'posts': 0, 'sleep': 0.0}
+
+    def fake_request(session, method, url, **kwargs):
+        response = requests.Response()
+        response.url = url
+        if DISCORD_HOST_PATTERN.search(urlsplit(url).hostname or ''):
+            counters['posts'] += 1
+            response.status_code = 204
+            response._content = b''
+            return response
+        entry, body = responses.next('http', url) if method.upper() == 'GET' else (None, None)
+        if entry is None:
+            response.status_code = 404
+            response._content = b''
+            return response
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.headers.pop('Content-Encoding', None)  # 기록한 본문은 이미 풀린 상태입니다.
+        response._content = body
+        return response
+
+    def fake_sleep(seconds):
+        counters['sleep'] += seconds
+
+    work_dir = tempfile.mkdtemp(prefix='feed_replay_')
+    original_cwd = os.getcwd()
+    http_client.PooledSession.request = fake_request
+    time.sleep = fake_sleep
+    sys.modules.update(_fake_googleapiclient(responses))
+    exit_code = 0
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        os.chdir(work_dir)
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        exit_code = e.code
+    finally:
+        elapsed = time.perf_counter() - start_time
+        cpu = time.process_time() - start_cpu
+        os.chdir(original_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    logging.info(
+        f"다시 실행 {attempt}/{repeat} - 소요 {elapsed:.3f}초 (CPU {cpu:.3f}초), 종료 코드 {exit_code}, "
+        f"응답 {sum(responses.served.values())}회 (기록 없음 {responses.misses}회, 기록 당시 네트워크 {responses.network_ms / 1000:.2f}초), "
+        f"Discord 게시 {counters['posts']}회, 건너뛴 대기 {counters['sleep']:.1f}초"
+    )
+    return elapsed
+
+def main(argv):
+    if len(argv) >= 2 and argv[0] == 'list':
+        for run_id, script, count, size, network_ms in list_runs(SnapshotStore(argv[1])):
+            print(f"{run_id}  {script:<36} 응답 {count:>4}개  본문 {size / 1024:>8.1f}KB  네트워크 {network_ms / 1000:.2f}초")
+    elif len(argv) >= 3 and argv[0] == 'replay':
+        run_id = argv[3] if len(argv) > 3 and argv[3] != '-' else None
+        replay(argv[1], argv[2], run_id, int(argv[4]) if len(argv) > 4 else 1)
+    elif len(argv) >= 6 and argv[0] == '_replay_once':
+        # replay가 회차마다 새 프로세스로 실행하는 내부 명령입니다. 마지막 줄에 결과를 씁니다.
+        elapsed = _replay_once(argv[1], argv[2], argv[3], int(argv[4]), int(argv[5]))
+        sys.stdout.flush()
+        print(json.dumps({'elapsed': elapsed}))
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -5,17 +5,17 @@ import os
 import time
 import random
 import logging
-import json
-import base64
 import sqlite3
 import sys
 import pytz
-from urllib.parse import urlparse, urlunparse, parse_qs, urlencode, unquote, quote
 from email.utils import parsedate_to_datetime
 from datetime import datetime, timedelta
-from dateutil import parser
 from dateutil.tz import gettz
-from bs4 import BeautifulSoup
+from feed_snapshot import record_response
+from http_client import get_session, close_session
+from state_store import StorageSession, STATE_DB_PATH, id_hash, find_seen_hashed, save_dedup_keys, save_related_articles, migrate_schema, init_store, save_db_checksum
+from googlenews_resolver import LinkCache, LinkResolver, StrategyStats, clean_url, is_resolved_url
+from googlenews_feed import replace_brackets, extract_description_entries, iter_rss_items, sort_by_published, collect_new_items, load_feed_validators, save_feed_validators, is_feed_unchanged, conditional_request_headers, response_validators
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,13 +25,16 @@ DISCORD_WEBHOOK_KEYWORD = os.environ.get('DISCORD_WEBHOOK_KEYWORD')
 DISCORD_AVATAR_KEYWORD = os.environ.get('DISCORD_AVATAR_KEYWORD')
 DISCORD_USERNAME_KEYWORD = os.environ.get('DISCORD_USERNAME_KEYWORD')
 INITIALIZE_KEYWORD = os.environ.get('INITIALIZE_MODE_KEYWORD', 'false').lower() == 'true'
+EARLY_STOP_KEYWORD = os.environ.get('EARLY_STOP_KEYWORD', 'false').lower() == 'true'
+# guid가 달라도 원본 URL이 이미 게시한 기사와 같으면 게시하지 않고 기록만 남길지 여부
+DEDUP_BY_LINK_KEYWORD = os.environ.get('DEDUP_BY_LINK_KEYWORD', 'false').lower() == 'true'
 ADVANCED_FILTER_KEYWORD = os.environ.get('ADVANCED_FILTER_KEYWORD', '')
 DATE_FILTER_KEYWORD = os.environ.get('DATE_FILTER_KEYWORD', '')
 AFTER_DATE = os.environ.get('AFTER_DATE', '')
 BEFORE_DATE = os.environ.get('BEFORE_DATE', '')
 WHEN = os.environ.get('WHEN', '')
 HL = os.environ.get('HL', '')
-GL = os.environ.get('GL', '')
+GL = os.environ.get('GL', 'KR')
 CEID = os.environ.get('CEID', '')
 ORIGIN_LINK_KEYWORD = os.getenv('ORIGIN_LINK_KEYWORD', '').lower()
 ORIGIN_LINK_KEYWORD = ORIGIN_LINK_KEYWORD not in ['false', 'f', '0', 'no', 'n']
@@ -39,8 +42,16 @@ KEYWORD_MODE = os.environ.get('KEYWORD_MODE', 'false').lower() == 'true'
 KEYWORD = os.environ.get('KEYWORD', '')
 RSS_URL_KEYWORD = os.environ.get('RSS_URL_KEYWORD', '')
 
-# DB 설정
-DB_PATH = 'google_news_keyword.db'
+# DB 설정 (STATE_DB_PATH를 지정하면 다른 스크립트와 같은 DB 파일을 씁니다)
+DB_PATH = STATE_DB_PATH or 'google_news_keyword.db'
+# DB에서 이 스크립트의 기록을 구분하는 이름 (googlenews-multi에서는 구독 이름)
+SOURCE = 'keyword'
+
+# 링크 해석기 (main에서 초기화)
+link_resolver = None
+
+# 실행 동안 쓰는 DB 연결과 쓰기 대기열 (run_feed에서 초기화, googlenews-multi에서는 여러 구독이 함께 씀)
+storage = None
 
 country_configs = {
     # 동아시아
@@ -165,276 +176,82 @@ def is_valid_date(date_string):
         return False
 
 def init_db(reset=False):
-    """데이터베이스를 초기화하거나 기존 데이터베이스를 사용합니다."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        try:
-            if reset:
-                c.execute("DROP TABLE IF EXISTS news_items")
-                logging.info("기존 news_items 테이블 삭제됨")
-            
-            c.execute('''CREATE TABLE IF NOT EXISTS news_items
-                         (pub_date TEXT,
-                          guid TEXT PRIMARY KEY,
-                          title TEXT,
-                          link TEXT,
-                          related_news TEXT)''')
-            
-            c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_guid ON news_items(guid)")
-            
-            # 데이터베이스 무결성 검사
-            c.execute("PRAGMA integrity_check")
-            integrity_result = c.fetchone()[0]
-            if integrity_result != "ok":
-                logging.error(f"데이터베이스 무결성 검사 실패: {integrity_result}")
-                raise sqlite3.IntegrityError("데이터베이스 무결성 검사 실패")
-            
-            # 테이블이 비어있는지 확인
-            c.execute("SELECT COUNT(*) FROM news_items")
-            count = c.fetchone()[0]
-            
-            if reset or count == 0:
-                logging.info("새로운 데이터베이스가 초기화되었습니다.")
-            else:
-                logging.info(f"기존 데이터베이스를 사용합니다. 현재 {count}개의 항목이 있습니다.")
-            
-        except sqlite3.Error as e:
-            logging.error(f"데이터베이스 초기화 중 오류 발생: {e}")
-            raise
+    """데이터베이스를 초기화하거나 기존 데이터베이스를 사용합니다.
 
-    logging.info("데이터베이스 초기화 완료")
-
-def is_guid_posted(guid, conn):
-    """주어진 GUID가 이미 게시되었는지 확인합니다."""
+    스키마와 관리 작업은 state_store.init_store가 맡으며, 초기화 모드에서는 이 소스(SOURCE)의 기록만 지웁니다.
+    """
     try:
-        c = conn.cursor()
-        c.execute("SELECT 1 FROM news_items WHERE guid = ?", (guid,))
-        result = c.fetchone() is not None
-        logging.info(f"GUID {guid} 확인 결과: {'이미 게시됨' if result else '새로운 항목'}")
-        return result
-    except sqlite3.Error as e:
-        logging.error(f"데이터베이스 오류 (GUID 확인 중): {e}")
-        return False
-
-def save_news_item(pub_date, guid, title, link, related_news):
-    """뉴스 항목을 데이터베이스에 저장합니다."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        
-        # 기존 테이블 구조 확인
-        c.execute("PRAGMA table_info(news_items)")
-        columns = [column[1] for column in c.fetchall()]
-        
-        # 관련 뉴스 항목 수 확인
-        related_news_items = json.loads(related_news)
-        related_news_count = len(related_news_items)
-        
-        # 필요한 열 추가
-        for i in range(related_news_count):
-            title_col = f"related_title_{i+1}"
-            press_col = f"related_press_{i+1}"
-            link_col = f"related_link_{i+1}"
-            
-            if title_col not in columns:
-                c.execute(f"ALTER TABLE news_items ADD COLUMN {title_col} TEXT")
-            if press_col not in columns:
-                c.execute(f"ALTER TABLE news_items ADD COLUMN {press_col} TEXT")
-            if link_col not in columns:
-                c.execute(f"ALTER TABLE news_items ADD COLUMN {link_col} TEXT")
+        init_store(storage, SOURCE, reset=reset)
         
-        # 데이터 삽입을 위한 SQL 쿼리 준비
-        columns = ["pub_date", "guid", "title", "link", "related_news"]
-        values = [pub_date, guid, title, link, related_news]
+        # 이 소스의 기록이 있는지 확인 (전체 행을 세지 않고 첫 행만 확인)
+        with storage.lock:
+            has_items = storage.conn.execute("SELECT EXISTS (SELECT 1 FROM news_items WHERE source = ?)", (SOURCE,)).fetchone()[0]
         
-        for i, item in enumerate(related_news_items):
-            columns.extend([f"related_title_{i+1}", f"related_press_{i+1}", f"related_link_{i+1}"])
-            values.extend([item.get('title', ''), item.get('press', ''), item.get('link', '')])
-        
-        placeholders = ", ".join(["?" for _ in values])
-        columns_str = ", ".join(columns)
-        
-        c.execute(f"INSERT OR REPLACE INTO news_items ({columns_str}) VALUES ({placeholders})", values)
+        if reset or not has_items:
+            logging.info("새로운 데이터베이스가 초기화되었습니다.")
+        else:
+            logging.info("기존 데이터베이스를 사용합니다.")
         
-        logging.info(f"뉴스 항목 저장/업데이트: {guid}")
-
-def fetch_decoded_batch_execute(id):
-    s = (
-        '[[["Fbv4je","[\\"garturlreq\\",[[\\"en-US\\",\\"US\\",[\\"FINANCE_TOP_INDICES\\",\\"WEB_TEST_1_0_0\\"],'
-        'null,null,1,1,\\"US:en\\",null,180,null,null,null,null,null,0,null,null,[1608992183,723341000]],'
-        '\\"en-US\\",\\"US\\",1,[2,3,4,8],1,0,\\"655000234\\",0,0,null,0],\\"' +
-        id +
-        '\\"]",null,"generic"]]]'
-    )
-
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded;charset=utf-8",
-        "Referer": "https://news.google.com/"
-    }
+    except sqlite3.Error as e:
+        logging.error(f"데이터베이스 초기화 중 오류 발생: {e}")
+        raise
 
-    response = requests.post(
-        "https://news.google.com/_/DotsSplashUi/data/batchexecute?rpcids=Fbv4je",
-        headers=headers,
-        data={"f.req": s}
-    )
+    logging.info("데이터베이스 초기화 완료")
 
-    if response.status_code != 200:
-        raise Exception("Failed to fetch data from Google.")
-
-    text = response.text
-    header = '[\\"garturlres\\",\\"'
-    footer = '\\",'
-    if header not in text:
-        raise Exception(f"Header not found in response: {text}")
-    start = text.split(header, 1)[1]
-    if footer not in start:
-        raise Exception("Footer not found in response.")
-    url = start.split(footer, 1)[0]
-    return url
-
-def decode_base64_url_part(encoded_str):
-    base64_str = encoded_str.replace("-", "+").replace("_", "/")
-    base64_str += "=" * ((4 - len(base64_str) % 4) % 4)
+def find_posted_guids(guids):
+    """guid 목록 중 이미 게시한 guid의 집합을 한 번의 조회로 반환합니다. (보존 기간이 지나 해시만 남은 guid 포함)"""
     try:
-        decoded_bytes = base64.urlsafe_b64decode(base64_str)
-        decoded_str = decoded_bytes.decode('latin1')
-        return decoded_str
-    except Exception as e:
-        return f"디코딩 중 오류 발생: {e}"
+        # 단일 DB 모드에서는 다른 구독 스레드가 같은 연결로 커밋할 수 있으므로 lock을 잡고 읽습니다.
+        with storage.lock:
+            return find_seen_hashed(storage.conn, SOURCE, guids)
+    except sqlite3.Error as e:
+        logging.error(f"데이터베이스 오류 (GUID 확인 중): {e}")
+        return set()
 
-def extract_youtube_id(decoded_str):
-    pattern = r'\x08 "\x0b([\w-]{11})\x98\x01\x01'
-    match = re.search(pattern, decoded_str)
-    if match:
-        return match.group(1)
-    return None
+def find_posted_links(links):
+    """원본 URL 목록 중 이미 게시한 URL의 집합을 반환합니다. guid가 달라도 같은 기사를 다시 게시하지 않는 데 씁니다.
 
-def extract_regular_url(decoded_str):
-    """디코딩된 문자열에서 일반 URL 추출"""
-    parts = re.split(r'[^\x20-\x7E]+', decoded_str)
-    url_pattern = r'(https?://[^\s]+)'
-    for part in parts:
-        match = re.search(url_pattern, part)
-        if match:
-            return match.group(0)
-    return None
+    해석하지 못해 Google News 링크로 남은 URL은 같은 기사인지 알 수 없으므로 비교하지 않습니다.
+    """
+    links = [link for link in links if is_resolved_url(link)]
+    try:
+        with storage.lock:
+            return find_seen_hashed(storage.conn, SOURCE, links)
+    except sqlite3.Error as e:
+        logging.error(f"데이터베이스 오류 (URL 확인 중): {e}")
+        return set()
 
-def unescape_unicode(text):
-    """유니코드 이스케이프 시퀀스를 실제 문자로 변환합니다."""
-    return re.sub(
-        r'\\u([0-9a-fA-F]{4})',
-        lambda m: chr(int(m.group(1), 16)),
-        text
+def save_news_item(pub_date, guid, title, link, related_news):
+    """뉴스 항목과 관련 기사 목록을 저장 대기열에 넣습니다. 기록은 게시를 마친 뒤 storage가 모아서 커밋합니다."""
+    # 중복 검사는 dedup_keys로 하므로, guid 해시가 겹치더라도 먼저 저장한 게시 기록을 덮어쓰지 않습니다.
+    storage.write(
+        "INSERT OR IGNORE INTO news_items (source, guid_hash, pub_date, guid, title, link, posted_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (SOURCE, id_hash(guid), pub_date, guid, title, link, time.time())
     )
+    save_dedup_keys(storage, SOURCE, (guid, link))
+    save_related_articles(storage, SOURCE, guid, related_news)
 
-def clean_url(url):
-    """URL을 정리하고 유니코드 문자를 처리하는 함수"""
-    # 유니코드 이스케이프 시퀀스 처리
-    url = unescape_unicode(url)
-    
-    # 백슬래시를 정리
-    url = url.replace('\\', '')
-    
-    # URL 디코딩 (예: %2F -> /, %40 -> @ 등)
-    url = unquote(url)
-
-    parsed_url = urlparse(url)
-    
-    # MSN 링크 특별 처리: HTTPS로 변환 및 불필요한 쿼리 파라미터 제거
-    if parsed_url.netloc.endswith('msn.com'):
-        parsed_url = parsed_url._replace(scheme='https')
-        query_params = parse_qs(parsed_url.query)
-        cleaned_params = {k: v[0] for k, v in query_params.items() if k in ['id', 'article']}
-        cleaned_query = urlencode(cleaned_params)
-        parsed_url = parsed_url._replace(query=cleaned_query)
-    
-    # 공백 등 비정상적인 문자 처리
-    # safe 파라미터에 특수 문자들을 포함하여 인코딩되지 않도록 설정
-    safe_chars = "/:@&=+$,?#"
-    cleaned_path = quote(parsed_url.path, safe=safe_chars)
-    cleaned_query = quote(parsed_url.query, safe=safe_chars)
-    
-    # URL 재구성
-    cleaned_url = urlunparse(parsed_url._replace(path=cleaned_path, query=cleaned_query))
-    
-    return cleaned_url
-
-def decode_google_news_url(source_url):
-    url = urlparse(source_url)
-    path = url.path.split("/")
-    if url.hostname == "news.google.com" and len(path) > 1 and path[-2] == "articles":
-        base64_str = path[-1]
-        
-        # 먼저 새로운 방식 시도
-        try:
-            decoded_bytes = base64.urlsafe_b64decode(base64_str + '==')
-            decoded_str = decoded_bytes.decode('latin1')
-
-            prefix = b'\x08\x13\x22'.decode('latin1')
-            if decoded_str.startswith(prefix):
-                decoded_str = decoded_str[len(prefix):]
-
-            suffix = b'\xd2\x01\x00'.decode('latin1')
-            if decoded_str.endswith(suffix):
-                decoded_str = decoded_str[:-len(suffix)]
+    logging.info(f"새 뉴스 항목 저장: {guid}")
 
-            bytes_array = bytearray(decoded_str, 'latin1')
-            length = bytes_array[0]
-            if length >= 0x80:
-                decoded_str = decoded_str[2:length+1]
-            else:
-                decoded_str = decoded_str[1:length+1]
-
-            if decoded_str.startswith("AU_yqL"):
-                return clean_url(fetch_decoded_batch_execute(base64_str))
-
-            regular_url = extract_regular_url(decoded_str)
-            if regular_url:
-                return clean_url(regular_url)
-        except Exception:
-            pass  # 새로운 방식이 실패하면 기존 방식 시도
-
-        # 기존 방식 시도 (유튜브 링크 포함)
-        decoded_str = decode_base64_url_part(base64_str)
-        youtube_id = extract_youtube_id(decoded_str)
-        if youtube_id:
-            return f"https://www.youtube.com/watch?v={youtube_id}"
-
-        regular_url = extract_regular_url(decoded_str)
-        if regular_url:
-            return clean_url(regular_url)
-
-    return clean_url(source_url)  # 디코딩 실패 시 원본 URL 정리 후 반환
-
-def get_original_url(google_link, session, max_retries=5):
+def get_original_url(google_link):
     if ORIGIN_LINK_KEYWORD:
-        original_url = decode_google_news_url(google_link)
-        if original_url != google_link:
-            return original_url
-
-        # 디코딩 실패 시 requests 방식 시도
-        retries = 0
-        while retries < max_retries:
-            try:
-                response = session.get(google_link, allow_redirects=True)
-                if response.status_code == 200:
-                    return clean_url(response.url)
-            except requests.RequestException as e:
-                logging.error(f"Failed to get original URL: {e}")
-            retries += 1
-        
-        logging.warning(f"오리지널 링크 추출 실패, 원 링크 사용: {google_link}")
-        return clean_url(google_link)
+        return link_resolver.resolve(google_link)
     else:
         logging.info(f"ORIGIN_LINK_KEYWORD가 False, 원 링크 사용: {google_link}")
         return clean_url(google_link)
 
-def fetch_rss_feed(url, max_retries=3, retry_delay=5):
-    """RSS 피드를 가져옵니다."""
+def fetch_rss_feed(url, max_retries=3, retry_delay=5, validators=None):
+    """RSS 피드를 가져옵니다. 반환값은 (피드 내용, 검증값)이며, 피드가 변경되지 않았으면(304) 피드 내용이 None입니다."""
+    headers = conditional_request_headers(validators)
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, timeout=30)
+            start_time = time.perf_counter()
+            response = get_session().get(url, headers=headers)
+            record_response(url, response, time.perf_counter() - start_time, headers)
+            if response.status_code == 304:
+                return None, validators
             response.raise_for_status()
-            return response.content
+            return response.content, response_validators(response)
         except requests.RequestException as e:
             logging.warning(f"RSS 피드 가져오기 실패 (시도 {attempt + 1}/{max_retries}): {e}")
             if attempt + 1 < max_retries:
@@ -444,40 +261,13 @@ def fetch_rss_feed(url, max_retries=3, retry_delay=5):
                 raise
 
 def parse_rss_feed(rss_data):
-    """RSS 피드를 파싱합니다."""
+    """RSS 피드를 스트리밍으로 파싱하여 항목 레코드를 하나씩 내보냅니다."""
     try:
-        root = ET.fromstring(rss_data)
-        return root.findall('.//item')
+        yield from iter_rss_items(rss_data)
     except ET.ParseError as e:
         logging.error(f"RSS 데이터 파싱 중 오류 발생: {e}")
         raise
 
-def get_rss_url():
-    rss_base_url = "https://news.google.com/rss/search"
-    
-    if KEYWORD_MODE:
-        encoded_keyword = requests.utils.quote(KEYWORD)
-        query_params = [f"q={encoded_keyword}"]
-        
-        if WHEN:
-            query_params[-1] += f"+when:{WHEN}"
-        elif AFTER_DATE or BEFORE_DATE:
-            if AFTER_DATE:
-                query_params[-1] += f"+after:{AFTER_DATE}"
-            if BEFORE_DATE:
-                query_params[-1] += f"+before:{BEFORE_DATE}"
-        
-        query_string = "+".join(query_params)
-        
-        if HL and GL and CEID:
-            rss_url = f"{rss_base_url}?{query_string}&hl={HL}&gl={GL}&ceid={CEID}"
-        else:
-            rss_url = f"{rss_base_url}?{query_string}&hl=ko&gl=KR&ceid=KR:ko"
-        
-        return rss_url, KEYWORD
-    else:
-        return RSS_URL_KEYWORD, None
-
 def extract_rss_feed_keyword(title):
     """RSS 피드 제목에서 키워드를 추출합니다."""
     match = re.search(r'"([^"]+)', title)
@@ -488,16 +278,6 @@ def extract_rss_feed_keyword(title):
         return keyword
     return None
 
-def replace_brackets(text):
-    """대괄호와 꺾쇠괄호를 유니코드 문자로 대체합니다."""
-    text = text.replace('[', '［').replace(']', '］')
-    text = text.replace('<', '〈').replace('>', '〉')
-    text = re.sub(r'(?<!\s)(?<!^)［', ' ［', text)
-    text = re.sub(r'］(?!\s)', '］ ', text)
-    text = re.sub(r'(?<!\s)(?<!^)〈', ' 〈', text)
-    text = re.sub(r'〉(?!\s)', '〉 ', text)
-    return text
-
 def convert_to_local_time(pub_date, country_code):
     try:
         utc_time = parsedate_to_datetime(pub_date)
@@ -526,7 +306,7 @@ def send_discord_message(webhook_url, message, avatar_url=None, username=None, m
 
     for attempt in range(max_retries):
         try:
-            response = requests.post(webhook_url, json=payload, headers=headers)
+            response = get_session().post(webhook_url, json=payload, headers=headers)
             response.raise_for_status()
             logging.info("Discord에 메시지 게시 완료")
             return
@@ -540,33 +320,30 @@ def send_discord_message(webhook_url, message, avatar_url=None, username=None, m
 
     time.sleep(3)  # 성공적인 전송 후 3초 대기
 
-def extract_news_items(description, session):
-    """HTML 설명에서 뉴스 항목을 추출합니다."""
-    soup = BeautifulSoup(description, 'html.parser')
+def extract_news_items(description):
+    """HTML 설명에서 뉴스 항목을 추출합니다. 링크는 해석하지 않은 Google News 링크 그대로입니다."""
     news_items = []
-    for li in soup.find_all('li'):
-        a_tag = li.find('a')
-        if a_tag:
-            title = replace_brackets(a_tag.text)
-            google_link = a_tag['href']
-            link = get_original_url(google_link, session)
-            press = li.find('font', color="#6f6f6f").text if li.find('font', color="#6f6f6f") else ""
-            news_items.append({"title": title, "link": link, "press": press})
+    for _, title, link, press in extract_description_entries(description):
+        if title is not None:
+            news_items.append({"title": replace_brackets(title), "link": link, "press": press or ""})
     return news_items
 
-def parse_html_description(html_desc, session, main_title, main_link):
-    """HTML 설명을 파싱하여 관련 뉴스 문자열을 생성합니다."""
-    news_items = extract_news_items(html_desc, session)
-    
-    news_items = [item for item in news_items if item['title'] != main_title or item['link'] != main_link]
-    
-    if len(news_items) == 0:
-        return "", []  # 관련 뉴스가 없거나 메인 뉴스와 동일한 경우
-    elif len(news_items) == 1:
-        return "", news_items  # 관련 뉴스가 1개인 경우 (표시하지 않음)
-    else:
-        news_string = '\n'.join([f"> - [{item['title']}]({item['link']}) | {item['press']}" for item in news_items])
-        return news_string, news_items
+def extract_related_news(html_desc, main_title, main_link):
+    """HTML 설명에서 메인 뉴스와 동일한 항목을 제외한 관련 뉴스 목록을 추출합니다."""
+    news_items = extract_news_items(html_desc)
+    return [item for item in news_items if item['title'] != main_title or item['link'] != main_link]
+
+def related_news_filter_text(news_items):
+    """고급 검색 필터 검사에 쓸 관련 뉴스 텍스트를 만듭니다. 표시되지 않는 경우(1개 이하)에는 빈 문자열입니다."""
+    if len(news_items) <= 1:
+        return ""
+    return '\n'.join([f"> - {item['title']} | {item['press']}" for item in news_items])
+
+def format_related_news(news_items):
+    """관련 뉴스 문자열을 생성합니다."""
+    if len(news_items) <= 1:
+        return ""  # 관련 뉴스가 없거나 1개인 경우 (표시하지 않음)
+    return '\n'.join([f"> - [{item['title']}]({item['link']}) | {item['press']}" for item in news_items])
 
 def apply_advanced_filter(title, description, advanced_filter):
     """고급 검색 필터를 적용하여 게시물을 전송할지 결정합니다."""
@@ -634,8 +411,9 @@ def parse_date_filter(filter_string):
     logging.info(f"최종 파싱 결과 - since_date: {since_date}, until_date: {until_date}, past_date: {past_date}")
     return since_date, until_date, past_date
 
-def is_within_date_range(pub_date, since_date, until_date, past_date):
-    pub_datetime = parser.parse(pub_date).replace(tzinfo=pytz.UTC)
+def is_within_date_range(pub_datetime, since_date, until_date, past_date):
+    if pub_datetime is None:
+        raise ValueError("발행일을 해석할 수 없습니다.")
     now = datetime.now(pytz.UTC)
     
     logging.info(f"검사 중인 기사 날짜: {pub_datetime}")
@@ -660,112 +438,202 @@ def is_within_date_range(pub_date, since_date, until_date, past_date):
 def get_rss_url():
     rss_base_url = "https://news.google.com/rss/search"
     
-    if os.getenv('KEYWORD_MODE') == 'true':
-        keyword = os.getenv('KEYWORD')
-        encoded_keyword = requests.utils.quote(keyword)
+    if KEYWORD_MODE:
+        encoded_keyword = requests.utils.quote(KEYWORD)
         query_params = [f"q={encoded_keyword}"]
         
-        if os.getenv('WHEN'):
-            query_params[-1] += f"+when:{os.getenv('WHEN')}"
-        elif os.getenv('AFTER_DATE') or os.getenv('BEFORE_DATE'):
-            if os.getenv('AFTER_DATE'):
-                query_params[-1] += f"+after:{os.getenv('AFTER_DATE')}"
-            if os.getenv('BEFORE_DATE'):
-                query_params[-1] += f"+before:{os.getenv('BEFORE_DATE')}"
+        if WHEN:
+            query_params[-1] += f"+when:{WHEN}"
+        elif AFTER_DATE or BEFORE_DATE:
+            if AFTER_DATE:
+                query_params[-1] += f"+after:{AFTER_DATE}"
+            if BEFORE_DATE:
+                query_params[-1] += f"+before:{BEFORE_DATE}"
         
         query_string = "+".join(query_params)
         
-        country_code = os.getenv('GL', 'KR')
+        country_code = GL
         hl, ceid = country_configs.get(country_code, country_configs['US'])[:2]
         
         rss_url = f"{rss_base_url}?{query_string}&hl={hl}&gl={country_code}&ceid={ceid}"
-        return rss_url, keyword, country_code
+        return rss_url, KEYWORD, country_code
     else:
-        return os.getenv('RSS_URL_KEYWORD'), None, 'KR'
+        return RSS_URL_KEYWORD, None, 'KR'
 
-def main():
-    try:
-        rss_url, keyword, country_code = get_rss_url()
-        
-        logging.info(f"RSS 피드 URL: {rss_url}")
-        logging.debug(f"ORIGIN_LINK_KEYWORD 값: {ORIGIN_LINK_KEYWORD}")
+def process_feed():
+    """RSS 피드 하나를 가져와 새 항목을 Discord로 전송합니다.
 
-        rss_data = fetch_rss_feed(rss_url)
-        news_items = parse_rss_feed(rss_data)
-        
-        total_items = len(news_items)
-        logging.info(f"총 {total_items}개의 뉴스 항목을 가져왔습니다.")
+    링크 해석에는 모듈의 link_resolver를 쓰며, 비어 있으면 이 피드의 DB로 새로 만듭니다.
+    이번에 새로 읽은 항목(FeedItem) 목록을 반환하며, 피드가 바뀌지 않았으면 빈 목록입니다.
+    """
+    global link_resolver
 
-        init_db(reset=INITIALIZE_KEYWORD)
+    rss_url, keyword, country_code = get_rss_url()
+    
+    logging.info(f"RSS 피드 URL: {rss_url}")
+    logging.debug(f"ORIGIN_LINK_KEYWORD 값: {ORIGIN_LINK_KEYWORD}")
+
+    # 초기화 모드에서는 저장된 검증값을 무시하고 피드 전체를 받습니다.
+    previous_validators = {} if INITIALIZE_KEYWORD else load_feed_validators(storage, SOURCE, rss_url)
+    rss_data, validators = fetch_rss_feed(rss_url, validators=previous_validators)
+    if rss_data is None:
+        logging.info("RSS 피드가 이전 실행 이후 변경되지 않았습니다 (304). 처리를 건너뜁니다.")
+        return []
+
+    # 조건부 요청을 무시하고 같은 본문을 다시 보내는 경우에도 파싱과 중복 검사를 건너뜁니다.
+    if is_feed_unchanged(rss_data, previous_validators, validators):
+        logging.info("RSS 피드 내용이 이전 실행과 같습니다. 처리를 건너뜁니다.")
+        save_feed_validators(storage, SOURCE, rss_url, validators)
+        return []
+
+    init_db(reset=INITIALIZE_KEYWORD)
+
+    session = get_session()
+    if link_resolver is None:
+        link_resolver = LinkResolver(session, LinkCache(DB_PATH), StrategyStats(DB_PATH))
+    
+    news_records = parse_rss_feed(rss_data)
+    if INITIALIZE_KEYWORD:
+        news_items = sort_by_published(news_records)
+        logging.info(f"총 {len(news_items)}개의 뉴스 항목을 가져왔습니다.")
+        logging.info("초기 실행: 뉴스 항목을 날짜 순으로 정렬했습니다.")
+    else:
+        news_items, read_count = collect_new_items(news_records, find_posted_guids, early_stop=EARLY_STOP_KEYWORD)
+        logging.info(f"총 {read_count}개의 뉴스 항목을 읽었습니다.")
+        logging.info(f"후속 실행: {len(news_items)}개의 새로운 뉴스 항목을 처리합니다.")
 
-        session = requests.Session()
-        
-        if INITIALIZE_KEYWORD:
-            news_items = sorted(news_items, key=lambda item: parser.parse(item.find('pubDate').text))
-            logging.info("초기 실행: 뉴스 항목을 날짜 순으로 정렬했습니다.")
-        else:
-            with sqlite3.connect(DB_PATH) as conn:
-                new_items = [item for item in reversed(news_items) if not is_guid_posted(item.find('guid').text, conn)]
-            news_items = new_items
-            logging.info(f"후속 실행: {len(news_items)}개의 새로운 뉴스 항목을 처리합니다.")
+    if not news_items:
+        logging.info("처리할 새로운 뉴스 항목이 없습니다.")
+        save_feed_validators(storage, SOURCE, rss_url, validators)
+        return news_items
 
-        if not news_items:
-            logging.info("처리할 새로운 뉴스 항목이 없습니다.")
-            return
+    since_date, until_date, past_date = parse_date_filter(DATE_FILTER_KEYWORD)
+    logging.debug(f"적용된 날짜 필터 - since: {since_date}, until: {until_date}, past: {past_date}")
+
+    hl, ceid, google_news, country_name, country_name_en, flag, timezone, date_format = country_configs.get(country_code, country_configs['US'])
+
+    # 날짜 필터와 고급 검색 필터는 링크 해석 없이 RSS 원본 필드로 먼저 적용
+    candidates = []
+    has_errors = False
+    for news_item in news_items:
+        try:
+            if not is_within_date_range(news_item.published, since_date, until_date, past_date):
+                logging.debug(f"날짜 필터에 의해 건너뛰어진 뉴스: {news_item.raw_title}")
+                continue
+
+            news_item.related_news = extract_related_news(news_item.description_html, news_item.title, news_item.google_link)
 
-        since_date, until_date, past_date = parse_date_filter(DATE_FILTER_KEYWORD)
-        logging.debug(f"적용된 날짜 필터 - since: {since_date}, until: {until_date}, past: {past_date}")
+            if not apply_advanced_filter(news_item.title, related_news_filter_text(news_item.related_news), ADVANCED_FILTER_KEYWORD):
+                logging.info(f"고급 검색 필터에 의해 건너뛰어진 뉴스: {news_item.title}")
+                continue
+
+            candidates.append(news_item)
+        except Exception as e:
+            logging.error(f"뉴스 항목 '{news_item.raw_title}' 처리 중 오류 발생: {e}", exc_info=True)
+            has_errors = True
+            continue
 
-        hl, ceid, google_news, country_name, country_name_en, flag, timezone, date_format = country_configs.get(country_code, country_configs['US'])
+    # 필터를 통과해 실제로 게시할 항목의 링크만 제한된 동시성으로 한 번에 해석
+    # (관련 뉴스가 1개뿐이면 표시되지 않으므로 해석하지 않음)
+    if ORIGIN_LINK_KEYWORD:
+        links = []
+        for candidate in candidates:
+            links.append(candidate.google_link)
+            if len(candidate.related_news) > 1:
+                links.extend(related["link"] for related in candidate.related_news)
+        link_resolver.resolve_all(links)
+
+    # DEDUP_BY_LINK_KEYWORD이면 guid가 달라도 원본 URL이 같은 기사는 다시 게시하지 않고 기록만 남깁니다.
+    posted_links = find_posted_links(get_original_url(candidate.google_link) for candidate in candidates) if DEDUP_BY_LINK_KEYWORD else set()
+
+    processed_count = 0
+    for candidate in candidates:
+        try:
+            guid = candidate.guid
+            title = candidate.title
+            pub_date = candidate.pub_date
+            link = get_original_url(candidate.google_link)
+
+            if DEDUP_BY_LINK_KEYWORD and is_resolved_url(link) and link in posted_links:
+                logging.info(f"같은 원본 URL의 기사를 이미 게시하여 건너뜁니다: {title}")
+                save_news_item(pub_date, guid, title, link, [])
+                continue
 
-        processed_count = 0
-        for item in news_items:
-            try:
-                guid = item.find('guid').text
-                pub_date = item.find('pubDate').text
-                if not is_within_date_range(pub_date, since_date, until_date, past_date):
-                    logging.debug(f"날짜 필터에 의해 건너뛰어진 뉴스: {item.find('title').text}")
-                    continue
+            related_news = candidate.related_news
+            if len(related_news) > 1:
+                related_news = [dict(related, link=get_original_url(related["link"])) for related in related_news]
+            description = format_related_news(related_news)
 
-                title = replace_brackets(item.find('title').text)
-                google_link = item.find('link').text
-                link = get_original_url(google_link, session)
-                description_html = item.find('description').text
+            formatted_date = convert_to_local_time(pub_date, country_code)
 
-                description, related_news = parse_html_description(description_html, session, title, link)
+            discord_message = f"`{google_news} - {keyword} - {country_name} {flag}`\n**{title}**\n{link}"
+            if description:
+                discord_message += f"\n{description}"
+            discord_message += f"\n\n📅 {formatted_date}"
 
-                if not apply_advanced_filter(title, description, ADVANCED_FILTER_KEYWORD):
-                    logging.info(f"고급 검색 필터에 의해 건너뛰어진 뉴스: {title}")
-                    continue
+            send_discord_message(
+                DISCORD_WEBHOOK_KEYWORD,
+                discord_message,
+                avatar_url=DISCORD_AVATAR_KEYWORD,
+                username=DISCORD_USERNAME_KEYWORD
+            )
 
-                formatted_date = convert_to_local_time(pub_date, country_code)
+            save_news_item(pub_date, guid, title, link, related_news)
+            storage.item_done()
+            posted_links.add(link)
 
-                discord_message = f"`{google_news} - {keyword} - {country_name} {flag}`\n**{title}**\n{link}"
-                if description:
-                    discord_message += f"\n{description}"
-                discord_message += f"\n\n📅 {formatted_date}"
+            processed_count += 1
+            logging.info(f"뉴스 항목 처리 완료: {title}")
 
-                send_discord_message(
-                    DISCORD_WEBHOOK_KEYWORD,
-                    discord_message,
-                    avatar_url=DISCORD_AVATAR_KEYWORD,
-                    username=DISCORD_USERNAME_KEYWORD
-                )
+        except Exception as e:
+            logging.error(f"뉴스 항목 '{candidate.title}' 처리 중 오류 발생: {e}", exc_info=True)
+            has_errors = True
+            continue
 
-                save_news_item(pub_date, guid, title, link, json.dumps(related_news, ensure_ascii=False))
+    logging.info(f"총 {processed_count}개의 뉴스 항목이 성공적으로 처리되었습니다.")
 
-                processed_count += 1
-                logging.info(f"뉴스 항목 처리 완료: {title}")
+    # 모든 항목을 문제없이 처리했을 때만 검증값을 저장하여, 실패한 항목은 다음 실행에서 다시 시도합니다.
+    if has_errors:
+        logging.warning("처리 중 오류가 있어 피드 검증값을 저장하지 않습니다.")
+    else:
+        save_feed_validators(storage, SOURCE, rss_url, validators)
 
-            except Exception as e:
-                logging.error(f"뉴스 항목 '{item.find('title').text if item.find('title') is not None else 'Unknown'}' 처리 중 오류 발생: {e}", exc_info=True)
-                continue
+    return news_items
 
-        logging.info(f"총 {processed_count}개의 뉴스 항목이 성공적으로 처리되었습니다.")
+def run_feed():
+    """StorageSession 하나로 피드를 처리합니다. (process_feed 참고)
 
+    게시한 항목의 기록은 실행 도중 오류가 나더라도 연결을 닫기 전에 커밋됩니다.
+    """
+    global storage
+
+    # googlenews-multi가 여러 구독이 함께 쓰는 storage를 넣어 준 경우 그대로 씁니다.
+    if storage is not None:
+        return process_feed()
+
+    storage = StorageSession(DB_PATH)
+    try:
+        migrate_schema(storage, SOURCE)
+        return process_feed()
+    finally:
+        storage.close()
+        storage = None
+
+def main():
+    global link_resolver
+
+    try:
+        run_feed()
     except Exception as e:
         logging.error(f"프로그램 실행 중 오류 발생: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        if link_resolver:
+            link_resolver.close()
+            link_resolver = None
+        # 링크 캐시까지 모든 연결을 닫은 뒤의 DB 파일 체크섬을 다음 실행을 위해 기록합니다.
+        save_db_checksum(DB_PATH)
+        close_session()
 
 if __name__ == "__main__":
     try:
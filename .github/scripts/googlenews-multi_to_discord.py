@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from http_client import get_session, close_session
+from googlenews_resolver import LinkCache, LinkResolver, StrategyStats
+from feed_scheduler import FeedScheduler
+from state_store import StorageSession, migrate_schema, merge_db, maintain_store, save_db_checksum
+
+# 로깅 설정 (여러 구독이 동시에 실행되므로 스레드 이름에 구독 이름을 넣어 구분합니다)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s')
+
+# 환경 변수에서 필요한 정보를 가져옵니다.
+MULTI_CONFIG = os.environ.get('MULTI_CONFIG', 'googlenews_subscriptions.json')
+MULTI_CONFIG_JSON = os.environ.get('MULTI_CONFIG_JSON', '').strip()
+MULTI_MAX_WORKERS = int(os.environ.get('MULTI_MAX_WORKERS') or '4')
+INITIALIZE_MULTI = os.environ.get('INITIALIZE_MODE_MULTI', 'false').lower() == 'true'
+# 일정 모드: 구독마다 관측한 발행 간격으로 정한 다음 폴링 시각이 된 구독만 처리합니다.
+MULTI_RUN_MINUTES = float(os.environ.get('MULTI_RUN_MINUTES') or '0')
+MULTI_SCHEDULE = os.environ.get('MULTI_SCHEDULE', 'false').lower() == 'true' or MULTI_RUN_MINUTES > 0
+# 단일 DB 모드: 모든 구독의 기록을 shared.db 하나에 저장하고 연결 하나를 함께 씁니다.
+MULTI_SINGLE_DB = os.environ.get('MULTI_SINGLE_DB', 'false').lower() == 'true'
+
+# DB 설정: 구독별 DB(게시 기록, 피드 검증값)와 모든 구독이 함께 쓰는 링크 해석 DB
+# (단일 DB 모드에서는 게시 기록과 피드 검증값도 구독 이름을 source로 하여 shared.db에 저장합니다)
+STATE_DIR = 'google_news_multi'
+SHARED_DB_PATH = os.path.join(STATE_DIR, 'shared.db')
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 구독 종류별 스크립트와 환경 변수 접미사
+FEED_SCRIPTS = {
+    'top': ('googlenews-top_to_discord.py', 'TOP'),
+    'topic': ('googlenews-topic_to_discord.py', 'TOPIC'),
+    'keyword': ('googlenews-keyword_to_discord.py', 'KEYWORD'),
+}
+
+# 구독 설정 키 → (스크립트 전역 변수, 기본값). {S}는 종류별 접미사로 바뀝니다.
+COMMON_SETTINGS = {
+    'webhook': ('DISCORD_WEBHOOK_{S}', None),
+    'avatar': ('DISCORD_AVATAR_{S}', ''),
+    'username': ('DISCORD_USERNAME_{S}', ''),
+    'initialize': ('INITIALIZE_{S}', False),
+    'early_stop': ('EARLY_STOP_{S}', False),
+    'dedup_by_link': ('DEDUP_BY_LINK_{S}', False),
+    'advanced_filter': ('ADVANCED_FILTER_{S}', ''),
+    'date_filter': ('DATE_FILTER_{S}', ''),
+    'origin_link': ('ORIGIN_LINK_{S}', True),
+    'rss_url': ('RSS_URL_{S}', ''),
+}
+FEED_SETTINGS = {
+    'top': {
+        'country': ('TOP_COUNTRY', None),
+    },
+    'topic': {
+        'topic': ('TOPIC_KEYWORD', ''),
+        'params': ('TOPIC_PARAMS', '?hl=ko&gl=KR&ceid=KR%3Ako'),
+    },
+    'keyword': {
+        'keyword': ('KEYWORD', ''),
+        'gl': ('GL', 'KR'),
+        'when': ('WHEN', ''),
+        'after_date': ('AFTER_DATE', ''),
+        'before_date': ('BEFORE_DATE', ''),
+    },
+}
+# 이 설정 키가 있으면 RSS_URL 대신 모드(TOP_MODE 등)로 피드 URL을 만듭니다.
+FEED_MODES = {
+    'top': ('TOP_MODE', 'country'),
+    'topic': ('TOPIC_MODE', 'topic'),
+    'keyword': ('KEYWORD_MODE', 'keyword'),
+}
+
+def load_subscriptions():
+    """구독 설정(JSON)을 읽어 defaults를 합친 구독 목록을 반환합니다.
+
+    MULTI_CONFIG_JSON이 있으면 그 내용을, 없으면 MULTI_CONFIG 경로의 파일을 읽습니다.
+    """
+    if MULTI_CONFIG_JSON:
+        config = json.loads(MULTI_CONFIG_JSON)
+    else:
+        with open(MULTI_CONFIG, encoding='utf-8') as f:
+            config = json.load(f)
+
+    defaults = config.get('defaults', {})
+    subscriptions = []
+    names = set()
+    for entry in config.get('subscriptions', []):
+        subscription = dict(defaults, **entry)
+        name = subscription.get('name', '')
+        if not re.fullmatch(r'[\w.-]+', name):
+            raise ValueError(f"구독 이름은 영문, 숫자, '_', '-', '.'만 사용할 수 있습니다: {name!r}")
+        if name in names:
+            raise ValueError(f"구독 이름이 중복되었습니다: {name}")
+        if subscription.get('type') not in FEED_SCRIPTS:
+            raise ValueError(f"구독 '{name}'의 종류가 올바르지 않습니다: {subscription.get('type')!r} (top, topic, keyword 중 하나)")
+        names.add(name)
+        subscriptions.append(subscription)
+
+    if not subscriptions:
+        raise ValueError("구독 설정에 subscriptions 항목이 없습니다.")
+    return subscriptions
+
+def load_feed_module(subscription):
+    """구독 종류의 스크립트를 구독마다 별도 모듈로 불러와 구독 설정을 전역 변수에 적용합니다."""
+    feed_type = subscription['type']
+    script, suffix = FEED_SCRIPTS[feed_type]
+    spec = importlib.util.spec_from_file_location(
+        f"googlenews_{feed_type}_{subscription['name']}", os.path.join(SCRIPTS_DIR, script)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    settings = {key: (var.format(S=suffix), default) for key, (var, default) in COMMON_SETTINGS.items()}
+    settings.update(FEED_SETTINGS[feed_type])
+    for key, (var, default) in settings.items():
+        setattr(module, var, subscription.get(key, default))
+
+    mode_var, mode_key = FEED_MODES[feed_type]
+    setattr(module, mode_var, bool(subscription.get(mode_key)))
+    if INITIALIZE_MULTI:
+        setattr(module, f"INITIALIZE_{suffix}", True)
+    module.DB_PATH = os.path.join(STATE_DIR, f"{subscription['name']}.db")
+    module.SOURCE = subscription['name']
+
+    module.check_env_variables()
+    return module
+
+def open_shared_storage(modules):
+    """단일 DB 모드에서 모든 구독이 함께 쓸 storage를 열어 각 구독 모듈에 넣습니다.
+
+    구독별 DB 파일이 남아 있으면 그 기록을 한 번 shared.db로 옮기며, 무결성 검사와 보존 기간 정리는
+    스레드를 시작하기 전에 한 번만 합니다.
+    """
+    storage = StorageSession(SHARED_DB_PATH)
+    try:
+        for name, module in modules.items():
+            migrate_schema(storage, name)
+            merge_db(storage, module.DB_PATH, name)
+            module.DB_PATH = SHARED_DB_PATH
+            module.storage = storage
+        maintain_store(storage)
+    except Exception:
+        storage.close()
+        raise
+    return storage
+
+def run_subscription(name, module):
+    """구독 하나의 피드를 처리합니다. 새로 읽은 항목 목록을 반환하며, 실패하면 None을 반환합니다."""
+    threading.current_thread().name = name
+    try:
+        return module.run_feed()
+    except Exception as e:
+        logging.error(f"구독 '{name}' 처리 중 오류 발생: {e}", exc_info=True)
+        return None
+
+def run_pass(executor, scheduler, modules, feed_types):
+    """폴링할 구독을 동시에 처리하고 결과를 일정에 기록합니다. {구독 이름: 성공 여부}를 반환합니다."""
+    if MULTI_SCHEDULE:
+        names = scheduler.due_feeds(modules)
+        logging.info(f"폴링할 구독 {len(names)}개 (예정 시각이 되지 않은 구독 {len(modules) - len(names)}개는 건너뜀)")
+    else:
+        names = list(modules)
+
+    results = {}
+    for name, news_items in zip(names, executor.map(run_subscription, names, [modules[name] for name in names])):
+        if news_items is None:
+            scheduler.record_failure(name)
+            results[name] = False
+            continue
+        scheduler.record_poll(name, [item.published.timestamp() for item in news_items if item.published])
+        # 초기화는 첫 폴링에서 한 번만 합니다.
+        setattr(modules[name], f"INITIALIZE_{FEED_SCRIPTS[feed_types[name]][1]}", False)
+        results[name] = True
+    return results
+
+def main():
+    """메인 함수: 설정된 모든 구독을 하나의 연결 풀과 링크 해석 캐시를 공유하며 동시에 처리합니다.
+
+    MULTI_RUN_MINUTES가 주어지면 그 시간 동안 실행을 유지하며, 구독마다 정해진 다음 폴링 시각에 다시 처리합니다.
+    """
+    subscriptions = load_subscriptions()
+    os.makedirs(STATE_DIR, exist_ok=True)
+
+    modules = {}
+    feed_types = {}
+    failed = []
+    for subscription in subscriptions:
+        try:
+            modules[subscription['name']] = load_feed_module(subscription)
+            feed_types[subscription['name']] = subscription['type']
+        except Exception as e:
+            logging.error(f"구독 '{subscription['name']}' 설정 오류: {e}")
+            failed.append(subscription['name'])
+
+    logging.info(f"구독 {len(subscriptions)}개 중 {len(modules)}개를 동시 실행 {MULTI_MAX_WORKERS}개로 처리합니다.")
+
+    deadline = time.time() + MULTI_RUN_MINUTES * 60
+    results = {}
+    storage = open_shared_storage(modules) if MULTI_SINGLE_DB else None
+    scheduler = FeedScheduler(SHARED_DB_PATH)
+    # 같은 기사가 여러 구독에 나와도 한 번만 해석되도록 모든 구독이 하나의 LinkResolver를 씁니다.
+    link_resolver = LinkResolver(get_session(), LinkCache(SHARED_DB_PATH), StrategyStats(SHARED_DB_PATH))
+    try:
+        for module in modules.values():
+            module.link_resolver = link_resolver
+        with ThreadPoolExecutor(max_workers=max(MULTI_MAX_WORKERS, 1)) as executor:
+            while True:
+                results.update(run_pass(executor, scheduler, modules, feed_types))
+                if storage:
+                    storage.commit()
+
+                wait = max(scheduler.next_due(modules) - time.time(), 1)
+                if not MULTI_SCHEDULE or time.time() + wait >= deadline:
+                    break
+                logging.info(f"다음 폴링까지 {wait / 60:.1f}분 대기합니다.")
+                time.sleep(wait)
+    finally:
+        if storage:
+            storage.close()
+        scheduler.close()
+        link_resolver.close()
+        if storage:
+            # 모든 연결을 닫은 뒤의 shared.db 체크섬을 다음 실행을 위해 기록합니다.
+            save_db_checksum(SHARED_DB_PATH)
+        close_session()
+
+    failed.extend(name for name, ok in results.items() if not ok)
+    logging.info(f"총 {len(subscriptions) - len(failed)}개의 구독이 성공적으로 처리되었습니다.")
+    if failed:
+        logging.error(f"처리에 실패한 구독: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logging.error(f"오류 발생: {e}", exc_info=True)
+        sys.exit(1)  # 오류 발생 시 비정상 종료
+    else:
+        logging.info("프로그램 정상 종료")
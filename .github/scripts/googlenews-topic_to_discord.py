@@ -5,17 +5,18 @@ import os
 import time
 import random
 import logging
-import json
-import base64
 import sqlite3
 import sys
 import pytz
-from urllib.parse import urlparse, urlunparse, parse_qs, urlencode, unquote, quote
+from urllib.parse import urlparse
 from email.utils import parsedate_to_datetime
 from datetime import datetime, timedelta
-from dateutil import parser
 from dateutil.tz import gettz
-from bs4 import BeautifulSoup
+from feed_snapshot import record_response
+from http_client import get_session, close_session
+from state_store import StorageSession, STATE_DB_PATH, id_hash, find_seen_hashed, save_dedup_keys, save_related_articles, migrate_schema, init_store, save_db_checksum
+from googlenews_resolver import LinkCache, LinkResolver, StrategyStats, is_resolved_url
+from googlenews_feed import iter_rss_items, sort_by_published, collect_new_items, parse_description_items, description_filter_text, render_description, news_item_links, load_feed_validators, save_feed_validators, is_feed_unchanged, conditional_request_headers, response_validators
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,6 +26,9 @@ DISCORD_WEBHOOK_TOPIC = os.environ.get('DISCORD_WEBHOOK_TOPIC')
 DISCORD_AVATAR_TOPIC = os.environ.get('DISCORD_AVATAR_TOPIC', '').strip()
 DISCORD_USERNAME_TOPIC = os.environ.get('DISCORD_USERNAME_TOPIC', '').strip()
 INITIALIZE_TOPIC = os.environ.get('INITIALIZE_MODE_TOPIC', 'false').lower() == 'true'
+EARLY_STOP_TOPIC = os.environ.get('EARLY_STOP_TOPIC', 'false').lower() == 'true'
+# guid가 달라도 원본 URL이 이미 게시한 기사와 같으면 게시하지 않고 기록만 남길지 여부
+DEDUP_BY_LINK_TOPIC = os.environ.get('DEDUP_BY_LINK_TOPIC', 'false').lower() == 'true'
 ADVANCED_FILTER_TOPIC = os.environ.get('ADVANCED_FILTER_TOPIC', '')
 DATE_FILTER_TOPIC = os.environ.get('DATE_FILTER_TOPIC', '')
 ORIGIN_LINK_TOPIC = os.getenv('ORIGIN_LINK_TOPIC', '').lower()
@@ -34,8 +38,16 @@ TOPIC_KEYWORD = os.environ.get('TOPIC_KEYWORD', '')
 TOPIC_PARAMS = os.environ.get('TOPIC_PARAMS', '?hl=ko&gl=KR&ceid=KR%3Ako')
 RSS_URL_TOPIC = os.environ.get('RSS_URL_TOPIC', '')
 
-# DB 설정
-DB_PATH = 'google_news_topic.db'
+# DB 설정 (STATE_DB_PATH를 지정하면 다른 스크립트와 같은 DB 파일을 씁니다)
+DB_PATH = STATE_DB_PATH or 'google_news_topic.db'
+# DB에서 이 스크립트의 기록을 구분하는 이름 (googlenews-multi에서는 구독 이름)
+SOURCE = 'topic'
+
+# 링크 해석기 (main에서 초기화)
+link_resolver = None
+
+# 실행 동안 쓰는 DB 연결과 쓰기 대기열 (run_feed에서 초기화, googlenews-multi에서는 여러 구독이 함께 씀)
+storage = None
 
 # 토픽 ID 매핑
 # - "headlines": 토픽키워드
@@ -817,274 +829,79 @@ def check_env_variables():
         logging.info(f"일반 모드 활성화, RSS 피드 URL: {RSS_URL_TOPIC}")
 
 def init_db(reset=False):
-    """데이터베이스를 초기화하거나 기존 데이터베이스를 사용합니다."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        try:
-            if reset:
-                c.execute("DROP TABLE IF EXISTS news_items")
-                logging.info("기존 news_items 테이블 삭제됨")
-            
-            c.execute('''CREATE TABLE IF NOT EXISTS news_items
-                         (pub_date TEXT,
-                          guid TEXT PRIMARY KEY,
-                          title TEXT,
-                          link TEXT,
-                          topic TEXT,
-                          related_news TEXT)''')
-            
-            c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_guid ON news_items(guid)")
-            
-            # 데이터베이스 무결성 검사
-            c.execute("PRAGMA integrity_check")
-            integrity_result = c.fetchone()[0]
-            if integrity_result != "ok":
-                logging.error(f"데이터베이스 무결성 검사 실패: {integrity_result}")
-                raise sqlite3.IntegrityError("데이터베이스 무결성 검사 실패")
-            
-            # 테이블이 비어있는지 확인
-            c.execute("SELECT COUNT(*) FROM news_items")
-            count = c.fetchone()[0]
-            
-            if reset or count == 0:
-                logging.info("새로운 데이터베이스가 초기화되었습니다.")
-            else:
-                logging.info(f"기존 데이터베이스를 사용합니다. 현재 {count}개의 항목이 있습니다.")
-            
-        except sqlite3.Error as e:
-            logging.error(f"데이터베이스 초기화 중 오류 발생: {e}")
-            raise
+    """데이터베이스를 초기화하거나 기존 데이터베이스를 사용합니다.
 
-    logging.info("데이터베이스 초기화 완료")
-
-def is_guid_posted(guid):
+    스키마와 관리 작업은 state_store.init_store가 맡으며, 초기화 모드에서는 이 소스(SOURCE)의 기록만 지웁니다.
+    """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            c = conn.cursor()
-            c.execute("SELECT 1 FROM news_items WHERE guid = ?", (guid,))
-            result = c.fetchone() is not None
-            logging.info(f"GUID {guid} 확인 결과: {'이미 게시됨' if result else '새로운 항목'}")
-            return result
-    except sqlite3.Error as e:
-        logging.error(f"데이터베이스 오류 (GUID 확인 중): {e}")
-        return False
-
-def save_news_item(pub_date, guid, title, link, topic, related_news):
-    """뉴스 항목을 데이터베이스에 저장합니다."""
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
+        init_store(storage, SOURCE, reset=reset)
         
-        # 기존 테이블 구조 확인
-        c.execute("PRAGMA table_info(news_items)")
-        columns = [column[1] for column in c.fetchall()]
-        
-        # 관련 뉴스 항목 수 확인
-        related_news_count = len(json.loads(related_news))
-        
-        # 필요한 열 추가
-        for i in range(related_news_count):
-            title_col = f"related_title_{i+1}"
-            press_col = f"related_press_{i+1}"
-            link_col = f"related_link_{i+1}"
-            
-            if title_col not in columns:
-                c.execute(f"ALTER TABLE news_items ADD COLUMN {title_col} TEXT")
-            if press_col not in columns:
-                c.execute(f"ALTER TABLE news_items ADD COLUMN {press_col} TEXT")
-            if link_col not in columns:
-                c.execute(f"ALTER TABLE news_items ADD COLUMN {link_col} TEXT")
+        # 이 소스의 기록이 있는지 확인 (전체 행을 세지 않고 첫 행만 확인)
+        with storage.lock:
+            has_items = storage.conn.execute("SELECT EXISTS (SELECT 1 FROM news_items WHERE source = ?)", (SOURCE,)).fetchone()[0]
         
-        # 데이터 삽입을 위한 SQL 쿼리 준비
-        columns = ["pub_date", "guid", "title", "link", "topic", "related_news"]
-        values = [pub_date, guid, title, link, topic, related_news]
-        
-        related_news_items = json.loads(related_news)
-        for i, item in enumerate(related_news_items):
-            columns.extend([f"related_title_{i+1}", f"related_press_{i+1}", f"related_link_{i+1}"])
-            values.extend([item['title'], item['press'], item['link']])
-        
-        placeholders = ", ".join(["?" for _ in values])
-        columns_str = ", ".join(columns)
-        
-        c.execute(f"INSERT OR REPLACE INTO news_items ({columns_str}) VALUES ({placeholders})", values)
+        if reset or not has_items:
+            logging.info("새로운 데이터베이스가 초기화되었습니다.")
+        else:
+            logging.info("기존 데이터베이스를 사용합니다.")
         
-        logging.info(f"새 뉴스 항목 저장: {guid}")
-
-def fetch_decoded_batch_execute(id):
-    s = (
-        '[[["Fbv4je","[\\"garturlreq\\",[[\\"en-US\\",\\"US\\",[\\"FINANCE_TOP_INDICES\\",\\"WEB_TEST_1_0_0\\"],'
-        'null,null,1,1,\\"US:en\\",null,180,null,null,null,null,null,0,null,null,[1608992183,723341000]],'
-        '\\"en-US\\",\\"US\\",1,[2,3,4,8],1,0,\\"655000234\\",0,0,null,0],\\"' +
-        id +
-        '\\"]",null,"generic"]]]'
-    )
-
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded;charset=utf-8",
-        "Referer": "https://news.google.com/"
-    }
+    except sqlite3.Error as e:
+        logging.error(f"데이터베이스 초기화 중 오류 발생: {e}")
+        raise
 
-    response = requests.post(
-        "https://news.google.com/_/DotsSplashUi/data/batchexecute?rpcids=Fbv4je",
-        headers=headers,
-        data={"f.req": s}
-    )
+    logging.info("데이터베이스 초기화 완료")
 
-    if response.status_code != 200:
-        raise Exception("Failed to fetch data from Google.")
-
-    text = response.text
-    header = '[\\"garturlres\\",\\"'
-    footer = '\\",'
-    if header not in text:
-        raise Exception(f"Header not found in response: {text}")
-    start = text.split(header, 1)[1]
-    if footer not in start:
-        raise Exception("Footer not found in response.")
-    url = start.split(footer, 1)[0]
-    return url
-
-def decode_base64_url_part(encoded_str):
-    base64_str = encoded_str.replace("-", "+").replace("_", "/")
-    base64_str += "=" * ((4 - len(base64_str) % 4) % 4)
+def find_posted_guids(guids):
+    """guid 목록 중 이미 게시한 guid의 집합을 한 번의 조회로 반환합니다. (보존 기간이 지나 해시만 남은 guid 포함)"""
     try:
-        decoded_bytes = base64.urlsafe_b64decode(base64_str)
-        decoded_str = decoded_bytes.decode('latin1')
-        return decoded_str
-    except Exception as e:
-        return f"디코딩 중 오류 발생: {e}"
-
-def extract_youtube_id(decoded_str):
-    pattern = r'\x08 "\x0b([\w-]{11})\x98\x01\x01'
-    match = re.search(pattern, decoded_str)
-    if match:
-        return match.group(1)
-    return None
-
-def extract_regular_url(decoded_str):
-    """디코딩된 문자열에서 일반 URL 추출"""
-    parts = re.split(r'[^\x20-\x7E]+', decoded_str)
-    url_pattern = r'(https?://[^\s]+)'
-    for part in parts:
-        match = re.search(url_pattern, part)
-        if match:
-            return match.group(0)
-    return None
-
-def unescape_unicode(text):
-    """유니코드 이스케이프 시퀀스를 실제 문자로 변환합니다."""
-    return re.sub(
-        r'\\u([0-9a-fA-F]{4})',
-        lambda m: chr(int(m.group(1), 16)),
-        text
-    )
-
-def clean_url(url):
-    """URL을 정리하고 유니코드 문자를 처리하는 함수"""
-    # 유니코드 이스케이프 시퀀스 처리
-    url = unescape_unicode(url)
-    
-    # 백슬래시를 정리
-    url = url.replace('\\', '')
-    
-    # URL 디코딩 (예: %2F -> /, %40 -> @ 등)
-    url = unquote(url)
-
-    parsed_url = urlparse(url)
-    
-    # MSN 링크 특별 처리: HTTPS로 변환 및 불필요한 쿼리 파라미터 제거
-    if parsed_url.netloc.endswith('msn.com'):
-        parsed_url = parsed_url._replace(scheme='https')
-        query_params = parse_qs(parsed_url.query)
-        cleaned_params = {k: v[0] for k, v in query_params.items() if k in ['id', 'article']}
-        cleaned_query = urlencode(cleaned_params)
-        parsed_url = parsed_url._replace(query=cleaned_query)
-    
-    # 공백 등 비정상적인 문자 처리
-    # safe 파라미터에 특수 문자들을 포함하여 인코딩되지 않도록 설정
-    safe_chars = "/:@&=+$,?#"
-    cleaned_path = quote(parsed_url.path, safe=safe_chars)
-    cleaned_query = quote(parsed_url.query, safe=safe_chars)
-    
-    # URL 재구성
-    cleaned_url = urlunparse(parsed_url._replace(path=cleaned_path, query=cleaned_query))
-    
-    return cleaned_url
-
-def decode_google_news_url(source_url):
-    url = urlparse(source_url)
-    path = url.path.split("/")
-    if url.hostname == "news.google.com" and len(path) > 1 and path[-2] == "articles":
-        base64_str = path[-1]
-        
-        # 먼저 새로운 방식 시도
-        try:
-            decoded_bytes = base64.urlsafe_b64decode(base64_str + '==')
-            decoded_str = decoded_bytes.decode('latin1')
-
-            prefix = b'\x08\x13\x22'.decode('latin1')
-            if decoded_str.startswith(prefix):
-                decoded_str = decoded_str[len(prefix):]
-
-            suffix = b'\xd2\x01\x00'.decode('latin1')
-            if decoded_str.endswith(suffix):
-                decoded_str = decoded_str[:-len(suffix)]
-
-            bytes_array = bytearray(decoded_str, 'latin1')
-            length = bytes_array[0]
-            if length >= 0x80:
-                decoded_str = decoded_str[2:length+1]
-            else:
-                decoded_str = decoded_str[1:length+1]
-
-            if decoded_str.startswith("AU_yqL"):
-                return clean_url(fetch_decoded_batch_execute(base64_str))
+        # 단일 DB 모드에서는 다른 구독 스레드가 같은 연결로 커밋할 수 있으므로 lock을 잡고 읽습니다.
+        with storage.lock:
+            return find_seen_hashed(storage.conn, SOURCE, guids)
+    except sqlite3.Error as e:
+        logging.error(f"데이터베이스 오류 (GUID 확인 중): {e}")
+        return set()
 
-            regular_url = extract_regular_url(decoded_str)
-            if regular_url:
-                return clean_url(regular_url)
-        except Exception:
-            pass  # 새로운 방식이 실패하면 기존 방식 시도
+def find_posted_links(links):
+    """원본 URL 목록 중 이미 게시한 URL의 집합을 반환합니다. guid가 달라도 같은 기사를 다시 게시하지 않는 데 씁니다.
 
-		# 기존 방식 시도 (유튜브 링크 포함)
-        decoded_str = decode_base64_url_part(base64_str)
-        youtube_id = extract_youtube_id(decoded_str)
-        if youtube_id:
-            return f"https://www.youtube.com/watch?v={youtube_id}"
+    해석하지 못해 Google News 링크로 남은 URL은 같은 기사인지 알 수 없으므로 비교하지 않습니다.
+    """
+    links = [link for link in links if is_resolved_url(link)]
+    try:
+        with storage.lock:
+            return find_seen_hashed(storage.conn, SOURCE, links)
+    except sqlite3.Error as e:
+        logging.error(f"데이터베이스 오류 (URL 확인 중): {e}")
+        return set()
 
-        regular_url = extract_regular_url(decoded_str)
-        if regular_url:
-            return clean_url(regular_url)
+def save_news_item(pub_date, guid, title, link, topic, related_news):
+    """뉴스 항목과 관련 기사 목록을 저장 대기열에 넣습니다. 기록은 게시를 마친 뒤 storage가 모아서 커밋합니다."""
+    # 중복 검사는 dedup_keys로 하므로, guid 해시가 겹치더라도 먼저 저장한 게시 기록을 덮어쓰지 않습니다.
+    storage.write(
+        "INSERT OR IGNORE INTO news_items (source, guid_hash, pub_date, guid, title, link, topic, posted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (SOURCE, id_hash(guid), pub_date, guid, title, link, topic, time.time())
+    )
+    save_dedup_keys(storage, SOURCE, (guid, link))
+    save_related_articles(storage, SOURCE, guid, related_news)
 
-    return clean_url(source_url)  # 디코딩 실패 시 원본 URL 정리 후 반환
+    logging.info(f"새 뉴스 항목 저장: {guid}")
 
-def get_original_url(google_link, session, max_retries=5):
+def get_original_url(google_link):
     # ORIGIN_LINK_TOPIC 설정과 상관없이 항상 원본 링크를 시도
-    original_url = decode_google_news_url(google_link)
-    if original_url != google_link:
-        return original_url
-
-    # 디코딩 실패 시 requests 방식 시도
-    retries = 0
-    while retries < max_retries:
-        try:
-            response = session.get(google_link, allow_redirects=True)
-            if response.status_code == 200:
-                return clean_url(response.url)
-        except requests.RequestException as e:
-            logging.error(f"Failed to get original URL: {e}")
-        retries += 1
-
-    logging.warning(f"오리지널 링크 추출 실패, 원 링크 사용: {google_link}")
-    return clean_url(google_link)
+    return link_resolver.resolve(google_link)
 
-def fetch_rss_feed(url, max_retries=3, retry_delay=5):
-    """RSS 피드를 가져옵니다."""
+def fetch_rss_feed(url, max_retries=3, retry_delay=5, validators=None):
+    """RSS 피드를 가져옵니다. 반환값은 (피드 내용, 검증값)이며, 피드가 변경되지 않았으면(304) 피드 내용이 None입니다."""
+    headers = conditional_request_headers(validators)
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, timeout=30)
+            start_time = time.perf_counter()
+            response = get_session().get(url, headers=headers)
+            record_response(url, response, time.perf_counter() - start_time, headers)
+            if response.status_code == 304:
+                return None, validators
             response.raise_for_status()  # 4xx, 5xx 상태 코드에 대해 예외를 발생시킵니다.
-            return response.content
+            return response.content, response_validators(response)
         except requests.RequestException as e:
             logging.warning(f"RSS 피드 가져오기 실패 (시도 {attempt + 1}/{max_retries}): {e}")
             if attempt + 1 < max_retries:
@@ -1094,10 +911,9 @@ def fetch_rss_feed(url, max_retries=3, retry_delay=5):
                 raise
 
 def parse_rss_feed(rss_data):
-    """RSS 피드를 파싱합니다."""
+    """RSS 피드를 스트리밍으로 파싱하여 항목 레코드를 하나씩 내보냅니다."""
     try:
-        root = ET.fromstring(rss_data)
-        return root.findall('.//item')
+        yield from iter_rss_items(rss_data)
     except ET.ParseError as e:
         logging.error(f"RSS 데이터 파싱 중 오류 발생: {e}")
         raise
@@ -1117,50 +933,6 @@ def get_rss_url():
     else:
         raise ValueError("TOPIC_MODE가 false일 때 RSS_URL_TOPIC를 지정해야 합니다.")
 
-def replace_brackets(text):
-    """대괄호와 꺾쇠괄호를 유니코드 문자로 대체합니다."""
-    text = text.replace('[', '［').replace(']', '］')
-    text = text.replace('<', '〈').replace('>', '〉')
-    text = re.sub(r'(?<!\s)(?<!^)［', ' ［', text)
-    text = re.sub(r'］(?!\s)', '］ ', text)
-    text = re.sub(r'(?<!\s)(?<!^)〈', ' 〈', text)
-    text = re.sub(r'〉(?!\s)', '〉 ', text)
-    return text
-
-def parse_html_description(html_desc, session):
-    """HTML 설명을 파싱하여 뉴스 항목을 추출합니다."""
-    soup = BeautifulSoup(html_desc, 'html.parser')
-    items = soup.find_all('li')
-
-    news_items = []
-    full_content_link = ""
-    for item in items:
-        if 'Google 뉴스에서 전체 콘텐츠 보기' in item.text or 'View Full Coverage on Google News' in item.text:
-            full_content_link_match = item.find('a')
-            if full_content_link_match:
-                full_content_link = full_content_link_match['href']
-            continue
-
-        title_match = item.find('a')
-        press_match = item.find('font', color="#6f6f6f")
-        if title_match and press_match:
-            google_link = title_match['href']
-            link = get_original_url(google_link, session)
-            title_text = replace_brackets(title_match.text)
-            press_name = press_match.text
-            news_item = f"- [{title_text}](<{link}>) | {press_name}"
-            news_items.append(news_item)
-
-    news_string = '\n'.join(news_items)
-    if full_content_link:
-        news_string += f"\n\n▶️ [Google 뉴스에서 전체 콘텐츠 보기](<{full_content_link}>)"
-
-    return news_string
-
-def parse_pub_date(pub_date_str):
-    """문자열 형태의 발행일을 datetime 객체로 파싱합니다."""
-    return parser.parse(pub_date_str)
-
 def convert_to_local_time(pub_date, country_code):
     try:
         # email.utils.parsedate_to_datetime 함수를 사용하여 날짜 파싱
@@ -1216,7 +988,7 @@ def send_discord_message(webhook_url, message, avatar_url=None, username=None, m
 
     for attempt in range(max_retries):
         try:
-            response = requests.post(webhook_url, json=payload, headers=headers)
+            response = get_session().post(webhook_url, json=payload, headers=headers)
             response.raise_for_status()  # 4xx, 5xx 상태 코드에 대해 예외를 발생시킵니다.
             logging.info("Discord에 메시지 게시 완료")
             return  # 성공적으로 전송되면 함수 종료
@@ -1230,20 +1002,6 @@ def send_discord_message(webhook_url, message, avatar_url=None, username=None, m
 
     time.sleep(3)  # 성공적인 전송 후 3초 대기
 
-def extract_news_items(description, session):
-    """HTML 설명에서 뉴스 항목을 추출합니다."""
-    soup = BeautifulSoup(description, 'html.parser')
-    news_items = []
-    for li in soup.find_all('li'):
-        a_tag = li.find('a')
-        if a_tag:
-            title = replace_brackets(a_tag.text)
-            google_link = a_tag['href']
-            link = get_original_url(google_link, session)
-            press = li.find('font', color="#6f6f6f").text if li.find('font', color="#6f6f6f") else ""
-            news_items.append({"title": title, "link": link, "press": press})
-    return news_items
-
 def apply_advanced_filter(title, description, advanced_filter):
     """고급 검색 필터를 적용하여 게시물을 전송할지 결정합니다."""
     if not advanced_filter:
@@ -1312,8 +1070,9 @@ def parse_date_filter(filter_string):
     logging.info(f"최종 파싱 결과 - since_date: {since_date}, until_date: {until_date}, past_date: {past_date}")
     return since_date, until_date, past_date
 
-def is_within_date_range(pub_date, since_date, until_date, past_date):
-    pub_datetime = parser.parse(pub_date).replace(tzinfo=pytz.UTC)
+def is_within_date_range(pub_datetime, since_date, until_date, past_date):
+    if pub_datetime is None:
+        raise ValueError("발행일을 해석할 수 없습니다.")
     now = datetime.now(pytz.UTC)
     
     logging.info(f"검사 중인 기사 날짜: {pub_datetime}")
@@ -1335,106 +1094,189 @@ def is_within_date_range(pub_date, since_date, until_date, past_date):
     logging.info(f"모든 날짜 필터를 통과함")
     return True
 
-def main():
-    """메인 함수: RSS 피드를 가져와 처리하고 Discord로 전송합니다."""
-    try:
-        rss_url, topic_name, lang = get_rss_url()
-        
-        logging.info(f"RSS 피드 URL: {rss_url}")
-        logging.debug(f"ORIGIN_LINK_TOPIC 값: {ORIGIN_LINK_TOPIC}")
+def process_feed():
+    """RSS 피드 하나를 가져와 새 항목을 Discord로 전송합니다.
 
-        rss_data = fetch_rss_feed(rss_url)
-        news_items = parse_rss_feed(rss_data)
-        
-        total_items = len(news_items)
-        logging.info(f"총 {total_items}개의 뉴스 항목을 가져왔습니다.")
+    링크 해석에는 모듈의 link_resolver를 쓰며, 비어 있으면 이 피드의 DB로 새로 만듭니다.
+    이번에 새로 읽은 항목(FeedItem) 목록을 반환하며, 피드가 바뀌지 않았으면 빈 목록입니다.
+    """
+    global link_resolver
 
-        init_db(reset=INITIALIZE_TOPIC)
+    rss_url, topic_name, lang = get_rss_url()
+    
+    logging.info(f"RSS 피드 URL: {rss_url}")
+    logging.debug(f"ORIGIN_LINK_TOPIC 값: {ORIGIN_LINK_TOPIC}")
+
+    # 초기화 모드에서는 저장된 검증값을 무시하고 피드 전체를 받습니다.
+    previous_validators = {} if INITIALIZE_TOPIC else load_feed_validators(storage, SOURCE, rss_url)
+    rss_data, validators = fetch_rss_feed(rss_url, validators=previous_validators)
+    if rss_data is None:
+        logging.info("RSS 피드가 이전 실행 이후 변경되지 않았습니다 (304). 처리를 건너뜁니다.")
+        return []
+
+    # 조건부 요청을 무시하고 같은 본문을 다시 보내는 경우에도 파싱과 중복 검사를 건너뜁니다.
+    if is_feed_unchanged(rss_data, previous_validators, validators):
+        logging.info("RSS 피드 내용이 이전 실행과 같습니다. 처리를 건너뜁니다.")
+        save_feed_validators(storage, SOURCE, rss_url, validators)
+        return []
+
+    init_db(reset=INITIALIZE_TOPIC)
+
+    session = get_session()
+    if link_resolver is None:
+        link_resolver = LinkResolver(session, LinkCache(DB_PATH), StrategyStats(DB_PATH))
+    
+    news_records = parse_rss_feed(rss_data)
+    if INITIALIZE_TOPIC:
+        news_items = sort_by_published(news_records)
+        logging.info(f"총 {len(news_items)}개의 뉴스 항목을 가져왔습니다.")
+        logging.info("초기 실행: 뉴스 항목을 날짜 순으로 정렬했습니다.")
+    else:
+        news_items, read_count = collect_new_items(news_records, find_posted_guids, early_stop=EARLY_STOP_TOPIC)
+        logging.info(f"총 {read_count}개의 뉴스 항목을 읽었습니다.")
+        logging.info(f"후속 실행: {len(news_items)}개의 새로운 뉴스 항목을 처리합니다.")
+
+    if not news_items:
+        logging.info("처리할 새로운 뉴스 항목이 없습니다.")
+        save_feed_validators(storage, SOURCE, rss_url, validators)
+        return news_items
+
+    since_date, until_date, past_date = parse_date_filter(DATE_FILTER_TOPIC)
+    logging.debug(f"적용된 날짜 필터 - since: {since_date}, until: {until_date}, past: {past_date}")
+
+    gl_param = re.search(r'gl=(\w+)', TOPIC_PARAMS)
+    country_code = gl_param.group(1) if gl_param else 'KR'
+    country_emoji = get_country_emoji(country_code)
+    news_prefix = get_news_prefix(lang)
+    category = get_topic_category(TOPIC_KEYWORD, lang) if TOPIC_MODE else TOPIC_CATEGORY.get(lang, "Topics")
+
+    # 날짜 필터와 고급 검색 필터는 링크 해석 없이 RSS 원본 필드로 먼저 적용
+    candidates = []
+    has_errors = False
+    for news_item in news_items:
+        try:
+            if not is_within_date_range(news_item.published, since_date, until_date, past_date):
+                logging.debug(f"날짜 필터에 의해 건너뛰어진 뉴스: {news_item.raw_title}")
+                continue
 
-        session = requests.Session()
-        
-        if INITIALIZE_TOPIC:
-            news_items = sorted(news_items, key=lambda item: parse_pub_date(item.find('pubDate').text))
-            logging.info("초기 실행: 뉴스 항목을 날짜 순으로 정렬했습니다.")
-        else:
-            new_items = [item for item in reversed(news_items) if not is_guid_posted(item.find('guid').text)]
-            news_items = new_items
-            logging.info(f"후속 실행: {len(news_items)}개의 새로운 뉴스 항목을 처리합니다.")
-
-        if not news_items:
-            logging.info("처리할 새로운 뉴스 항목이 없습니다.")
-            return
-
-        since_date, until_date, past_date = parse_date_filter(DATE_FILTER_TOPIC)
-        logging.debug(f"적용된 날짜 필터 - since: {since_date}, until: {until_date}, past: {past_date}")
-
-        gl_param = re.search(r'gl=(\w+)', TOPIC_PARAMS)
-        country_code = gl_param.group(1) if gl_param else 'KR'
-        country_emoji = get_country_emoji(country_code)
-        news_prefix = get_news_prefix(lang)
-        category = get_topic_category(TOPIC_KEYWORD, lang) if TOPIC_MODE else TOPIC_CATEGORY.get(lang, "Topics")
-
-        processed_count = 0
-        for item in news_items:
-            try:
-                guid = item.find('guid').text
-                pub_date = item.find('pubDate').text
-                if not is_within_date_range(pub_date, since_date, until_date, past_date):
-                    logging.debug(f"날짜 필터에 의해 건너뛰어진 뉴스: {item.find('title').text}")
-                    continue
-
-                title = replace_brackets(item.find('title').text)
-                google_link = item.find('link').text
-                link = get_original_url(google_link, session)
-                description_html = item.find('description').text
-
-                related_news = extract_news_items(description_html, session)
-                related_news_json = json.dumps(related_news, ensure_ascii=False)
-
-                description = parse_html_description(description_html, session)
-
-                if not apply_advanced_filter(title, description, ADVANCED_FILTER_TOPIC):
-                    logging.info(f"고급 검색 필터에 의해 건너뛰어진 뉴스: {title}")
-                    continue
-
-                news_item = {
-                    "guid": guid,
-                    "title": title,
-                    "link": link,
-                    "pub_date": pub_date,
-                    "description": description
-                }
-
-                discord_message = format_discord_message(
-                    news_item,
-                    news_prefix,
-                    category,
-                    topic_name,
-                    country_emoji,
-                    country_code
-                )
-                
-                send_discord_message(
-                    DISCORD_WEBHOOK_TOPIC,
-                    discord_message,
-                    avatar_url=DISCORD_AVATAR_TOPIC,
-                    username=DISCORD_USERNAME_TOPIC
-                )
-
-                save_news_item(pub_date, guid, title, link, TOPIC_KEYWORD if TOPIC_MODE else "general", related_news_json)
-
-                processed_count += 1
-                logging.info(f"뉴스 항목 처리 완료: {title}")
-
-            except Exception as e:
-                logging.error(f"뉴스 항목 '{item.find('title').text if item.find('title') is not None else 'Unknown'}' 처리 중 오류 발생: {e}", exc_info=True)
+            news_item.related_news, news_item.full_content_link = parse_description_items(news_item.description_html)
+
+            if not apply_advanced_filter(news_item.title, description_filter_text(news_item.related_news), ADVANCED_FILTER_TOPIC):
+                logging.info(f"고급 검색 필터에 의해 건너뛰어진 뉴스: {news_item.title}")
                 continue
 
-        logging.info(f"총 {processed_count}개의 뉴스 항목이 성공적으로 처리되었습니다.")
+            candidates.append(news_item)
+        except Exception as e:
+            logging.error(f"뉴스 항목 '{news_item.raw_title}' 처리 중 오류 발생: {e}", exc_info=True)
+            has_errors = True
+            continue
+
+    # 필터를 통과해 실제로 게시할 항목의 링크만 제한된 동시성으로 한 번에 해석
+    link_resolver.resolve_all(news_item_links(candidates))
 
+    # DEDUP_BY_LINK_TOPIC이면 guid가 달라도 원본 URL이 같은 기사는 다시 게시하지 않고 기록만 남깁니다.
+    posted_links = find_posted_links(get_original_url(candidate.google_link) for candidate in candidates) if DEDUP_BY_LINK_TOPIC else set()
+
+    processed_count = 0
+    for candidate in candidates:
+        try:
+            guid = candidate.guid
+            title = candidate.title
+            pub_date = candidate.pub_date
+            link = get_original_url(candidate.google_link)
+
+            if DEDUP_BY_LINK_TOPIC and is_resolved_url(link) and link in posted_links:
+                logging.info(f"같은 원본 URL의 기사를 이미 게시하여 건너뜁니다: {title}")
+                save_news_item(pub_date, guid, title, link, TOPIC_KEYWORD if TOPIC_MODE else "general", [])
+                continue
+
+            description, related_news = render_description(
+                candidate.related_news,
+                candidate.full_content_link,
+                lambda google_link: get_original_url(google_link)
+            )
+
+            news_item = {
+                "guid": guid,
+                "title": title,
+                "link": link,
+                "pub_date": pub_date,
+                "description": description
+            }
+
+            discord_message = format_discord_message(
+                news_item,
+                news_prefix,
+                category,
+                topic_name,
+                country_emoji,
+                country_code
+            )
+            
+            send_discord_message(
+                DISCORD_WEBHOOK_TOPIC,
+                discord_message,
+                avatar_url=DISCORD_AVATAR_TOPIC,
+                username=DISCORD_USERNAME_TOPIC
+            )
+
+            save_news_item(pub_date, guid, title, link, TOPIC_KEYWORD if TOPIC_MODE else "general", related_news)
+            storage.item_done()
+            posted_links.add(link)
+
+            processed_count += 1
+            logging.info(f"뉴스 항목 처리 완료: {title}")
+
+        except Exception as e:
+            logging.error(f"뉴스 항목 '{candidate.title}' 처리 중 오류 발생: {e}", exc_info=True)
+            has_errors = True
+            continue
+
+    logging.info(f"총 {processed_count}개의 뉴스 항목이 성공적으로 처리되었습니다.")
+
+    # 모든 항목을 문제없이 처리했을 때만 검증값을 저장하여, 실패한 항목은 다음 실행에서 다시 시도합니다.
+    if has_errors:
+        logging.warning("처리 중 오류가 있어 피드 검증값을 저장하지 않습니다.")
+    else:
+        save_feed_validators(storage, SOURCE, rss_url, validators)
+
+    return news_items
+
+def run_feed():
+    """StorageSession 하나로 피드를 처리합니다. (process_feed 참고)
+
+    게시한 항목의 기록은 실행 도중 오류가 나더라도 연결을 닫기 전에 커밋됩니다.
+    """
+    global storage
+
+    # googlenews-multi가 여러 구독이 함께 쓰는 storage를 넣어 준 경우 그대로 씁니다.
+    if storage is not None:
+        return process_feed()
+
+    storage = StorageSession(DB_PATH)
+    try:
+        migrate_schema(storage, SOURCE)
+        return process_feed()
+    finally:
+        storage.close()
+        storage = None
+
+def main():
+    """메인 함수: RSS 피드를 가져와 처리하고 Discord로 전송합니다."""
+    global link_resolver
+
+    try:
+        run_feed()
     except Exception as e:
         logging.error(f"프로그램 실행 중 오류 발생: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        if link_resolver:
+            link_resolver.close()
+            link_resolver = None
+        # 링크 캐시까지 모든 연결을 닫은 뒤의 DB 파일 체크섬을 다음 실행을 위해 기록합니다.
+        save_db_checksum(DB_PATH)
+        close_session()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,349 @@
+import io
+import os
+import re
+import html
+import time
+import hashlib
+import logging
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import islice
+from bs4 import BeautifulSoup
+
+# 설명 HTML에서 "전체 콘텐츠 보기" 항목을 나타내는 문구
+FULL_COVERAGE_TEXTS = ('Google 뉴스에서 전체 콘텐츠 보기', 'View Full Coverage on Google News')
+
+# 조기 중단 모드에서 한 번에 읽어 중복 여부를 조회할 항목 수
+EARLY_STOP_BATCH_SIZE = int(os.environ.get('EARLY_STOP_BATCH_SIZE') or '20')
+
+# 설명 HTML 파서 백엔드: fast(전용 추출기), bs4(html.parser), lxml(bs4 + lxml)
+DESCRIPTION_PARSER = os.environ.get('DESCRIPTION_PARSER', 'fast').lower()
+
+# 전용 추출기가 쓰는 Google News 설명 마크업 패턴
+LI_PATTERN = re.compile(r'<li\b[^>]*>(.*?)</li>', re.S | re.I)
+A_PATTERN = re.compile(r'<a\b([^>]*)>(.*?)</a>', re.S | re.I)
+HREF_PATTERN = re.compile(r'\bhref\s*=\s*"([^"]*)"', re.I)
+PRESS_PATTERN = re.compile(r'<font\b[^>]*\bcolor\s*=\s*"#6f6f6f"[^>]*>(.*?)</font>', re.S | re.I)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# 피드 내용 해시에서 제외할, 항목과 상관없이 매번 바뀌는 채널 필드와 태그 사이 공백
+VOLATILE_FEED_PATTERN = re.compile(rb'<lastBuildDate>.*?</lastBuildDate>', re.S)
+INTER_TAG_SPACE_PATTERN = re.compile(rb'>\s+<')
+
+def replace_brackets(text):
+    """대괄호와 꺾쇠괄호를 유니코드 문자로 대체합니다."""
+    text = text.replace('[', '［').replace(']', '］')
+    text = text.replace('<', '〈').replace('>', '〉')
+    text = re.sub(r'(?<!\s)(?<!^)［', ' ［', text)
+    text = re.sub(r'］(?!\s)', '］ ', text)
+    text = re.sub(r'(?<!\s)(?<!^)〈', ' 〈', text)
+    text = re.sub(r'〉(?!\s)', '〉 ', text)
+    return text
+
+def child_text(element, tag):
+    child = element.find(tag)
+    return child.text if child is not None else None
+
+def parse_published(pub_date):
+    """RSS pubDate(RFC 822)를 시간대가 있는 datetime으로 바꿉니다. 해석할 수 없으면 None을 반환합니다."""
+    if not pub_date:
+        return None
+    try:
+        published = parsedate_to_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published
+
+class FeedItem:
+    """RSS <item> 하나에서 필요한 값을 한 번에 꺼내 담는 레코드입니다.
+
+    요소 트리는 참조하지 않으며, related_news와 full_content_link는 설명을 파싱한 뒤 채워집니다.
+    """
+    __slots__ = ('guid', 'raw_title', 'title', 'google_link', 'pub_date', 'published',
+                 'description_html', 'source', 'related_news', 'full_content_link')
+
+    def __init__(self, guid, raw_title, google_link, pub_date, description_html, source):
+        self.guid = guid
+        self.raw_title = raw_title
+        self.title = replace_brackets(raw_title)
+        self.google_link = google_link
+        self.pub_date = pub_date
+        self.published = parse_published(pub_date)
+        self.description_html = description_html
+        self.source = source
+        self.related_news = []
+        self.full_content_link = ""
+
+    def __repr__(self):
+        return f"FeedItem(guid={self.guid!r}, title={self.raw_title!r})"
+
+def iter_rss_items(rss_data):
+    """RSS 피드를 iterparse로 스트리밍 파싱하여 <item>마다 FeedItem을 하나씩 내보냅니다.
+
+    전체 트리를 만들지 않으며, 레코드로 옮긴 <item> 요소는 바로 부모에서 떼어 내 메모리를 해제합니다.
+    """
+    parent = None
+    for event, element in ET.iterparse(io.BytesIO(rss_data), events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'channel':
+                parent = element
+            continue
+        if element.tag != 'item':
+            continue
+
+        record = FeedItem(
+            guid=child_text(element, 'guid'),
+            raw_title=child_text(element, 'title') or '',
+            google_link=child_text(element, 'link'),
+            pub_date=child_text(element, 'pubDate'),
+            description_html=child_text(element, 'description') or '',
+            source=child_text(element, 'source') or '',
+        )
+        element.clear()
+        if parent is not None:
+            parent.remove(element)
+        yield record
+
+def sort_by_published(records):
+    """레코드를 발행 시각 순으로 정렬합니다. 발행일을 해석할 수 없는 항목은 앞에 둡니다."""
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(records, key=lambda record: record.published or oldest)
+
+def collect_new_items(records, find_posted, early_stop=False, batch_size=EARLY_STOP_BATCH_SIZE):
+    """레코드 중 아직 게시하지 않은 항목을 오래된 순서(피드 역순)로 모아 (새 항목 목록, 읽은 항목 수)를 반환합니다.
+
+    find_posted(guids)는 guid 목록 중 이미 게시한 guid의 집합을 한 번의 조회로 돌려주는 함수입니다.
+    early_stop이 꺼져 있으면 피드를 모두 읽고 한 번에 조회하며, 켜져 있으면 피드가 최신순이라고 보고
+    batch_size개씩 읽어 조회하다가 이미 게시한 guid를 만나는 즉시 읽기를 멈춥니다.
+    """
+    records = iter(records)
+    new_items = []
+    read_count = 0
+    posted_count = 0
+    query_count = 0
+    while True:
+        batch = list(islice(records, batch_size)) if early_stop else list(records)
+        if not batch:
+            break
+        read_count += len(batch)
+        posted = find_posted([record.guid for record in batch])
+        query_count += 1
+
+        stopped = False
+        for record in batch:
+            if record.guid in posted:
+                posted_count += 1
+                if early_stop:
+                    logging.info(f"이미 게시한 항목({record.guid})에 도달하여 피드 읽기를 중단합니다. 읽은 항목: {read_count}개")
+                    stopped = True
+                    break
+                continue
+            new_items.append(record)
+        if stopped or not early_stop:
+            break
+
+    logging.info(f"중복 검사 - 읽은 항목 {read_count}개, 이미 게시 {posted_count}개, 새 항목 {len(new_items)}개, 조회 {query_count}회")
+    new_items.reverse()
+    return new_items, read_count
+
+def fragment_text(fragment):
+    """HTML 조각에서 태그를 걷어 내고 엔티티를 풀어 텍스트만 남깁니다."""
+    return html.unescape(TAG_PATTERN.sub('', fragment))
+
+def extract_entries_fast(html_desc):
+    """Google News 설명의 고정된 <li><a>…</a><font color="#6f6f6f">…</font></li> 마크업을 정규식으로 바로 읽습니다."""
+    entries = []
+    for li_match in LI_PATTERN.finditer(html_desc):
+        inner = li_match.group(1)
+        a_match = A_PATTERN.search(inner)
+        press_match = PRESS_PATTERN.search(inner)
+        href_match = HREF_PATTERN.search(a_match.group(1)) if a_match else None
+        entries.append((
+            fragment_text(inner),
+            fragment_text(a_match.group(2)) if a_match else None,
+            html.unescape(href_match.group(1)) if href_match else None,
+            fragment_text(press_match.group(1)) if press_match else None,
+        ))
+    return entries
+
+def extract_entries_bs4(html_desc, features='html.parser'):
+    """BeautifulSoup 트리를 만들어 <li> 항목을 읽습니다."""
+    soup = BeautifulSoup(html_desc, features)
+    entries = []
+    for li in soup.find_all('li'):
+        a_tag = li.find('a')
+        press_tag = li.find('font', color="#6f6f6f")
+        entries.append((
+            li.text,
+            a_tag.text if a_tag else None,
+            a_tag.get('href') if a_tag else None,
+            press_tag.text if press_tag else None,
+        ))
+    return entries
+
+def extract_entries_lxml(html_desc):
+    return extract_entries_bs4(html_desc, 'lxml')
+
+DESCRIPTION_BACKENDS = {
+    'fast': extract_entries_fast,
+    'bs4': extract_entries_bs4,
+    'lxml': extract_entries_lxml,
+}
+
+@lru_cache(maxsize=None)
+def get_description_backend(name=None):
+    """이름에 맞는 설명 파서 백엔드를 반환합니다. 사용할 수 없으면 bs4로 대체합니다."""
+    name = (name or DESCRIPTION_PARSER).lower()
+    if name == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            logging.warning("lxml이 설치되어 있지 않아 bs4(html.parser) 설명 파서를 사용합니다.")
+            return extract_entries_bs4
+    if name not in DESCRIPTION_BACKENDS:
+        logging.warning(f"알 수 없는 설명 파서 '{name}', bs4(html.parser)를 사용합니다.")
+        return extract_entries_bs4
+    return DESCRIPTION_BACKENDS[name]
+
+def extract_description_entries(html_desc, backend=None):
+    """설명 HTML의 <li>마다 (전체 텍스트, 링크 텍스트, href, 언론사) 튜플을 반환합니다. 없는 값은 None입니다.
+
+    backend는 DESCRIPTION_BACKENDS의 이름이며, 생략하면 DESCRIPTION_PARSER 설정을 따릅니다.
+    """
+    return get_description_backend(backend)(html_desc)
+
+def parse_description_items(html_desc, backend=None):
+    """설명 HTML의 <li> 목록을 링크 해석 없이 파싱하여 (관련 뉴스 목록, 전체 콘텐츠 링크)를 반환합니다.
+
+    관련 뉴스의 link는 Google News 링크 그대로이며, 언론사가 없는 항목의 press는 빈 문자열입니다.
+    """
+    related_news = []
+    full_content_link = ""
+    for li_text, title, link, press in extract_description_entries(html_desc, backend):
+        if any(text in li_text for text in FULL_COVERAGE_TEXTS):
+            if title is not None:
+                full_content_link = link or ""
+            continue
+
+        if title is None:
+            continue
+
+        related_news.append({
+            "title": replace_brackets(title),
+            "link": link,
+            "press": press or ""
+        })
+
+    return related_news, full_content_link
+
+def description_filter_text(related_news):
+    """고급 검색 필터 검사에 쓸 관련 뉴스 텍스트(화면에 표시되는 제목과 언론사)를 만듭니다."""
+    return '\n'.join(f"- {news['title']} | {news['press']}" for news in related_news if news['press'])
+
+def render_description(related_news, full_content_link, resolve_link):
+    """관련 뉴스 목록의 링크를 resolve_link로 한 번씩 해석하여 (Markdown 문자열, 해석된 관련 뉴스 목록)을 반환합니다."""
+    lines = []
+    resolved_news = []
+    for news in related_news:
+        link = resolve_link(news['link'])
+        resolved_news.append({"title": news['title'], "link": link, "press": news['press']})
+        if news['press']:
+            lines.append(f"- [{news['title']}](<{link}>) | {news['press']}")
+
+    news_string = '\n'.join(lines)
+    if full_content_link:
+        news_string += f"\n\n▶️ [Google 뉴스에서 전체 콘텐츠 보기](<{full_content_link}>)"
+
+    return news_string, resolved_news
+
+def parse_description(html_desc, resolve_link):
+    """설명 HTML의 <li> 목록을 한 번만 순회하여 Markdown 문자열과 관련 뉴스 목록을 함께 반환합니다.
+
+    각 관련 뉴스 링크는 resolve_link(google_link)로 한 번만 해석되며,
+    같은 해석 결과가 Markdown과 관련 뉴스 목록에 함께 쓰입니다.
+    """
+    related_news, full_content_link = parse_description_items(html_desc)
+    return render_description(related_news, full_content_link, resolve_link)
+
+def news_item_links(news_items):
+    """파싱된 뉴스 항목들의 본문 링크와 관련 뉴스 링크를 모읍니다."""
+    links = []
+    for news_item in news_items:
+        links.append(news_item.google_link)
+        links.extend(news['link'] for news in news_item.related_news)
+    return links
+
+def load_feed_validators(storage, source, feed_url):
+    """source가 이전 실행에서 저장한 피드의 검증값을 {'etag', 'last_modified', 'content_hash', 'unchanged_runs'} 형태로 반환합니다.
+
+    검증값은 state_store의 feed_state 테이블에 (source, feed_url)별로 저장되므로, 같은 피드를 구독하는 소스끼리도 따로 관리됩니다.
+    """
+    with storage.lock:
+        row = storage.conn.execute(
+            "SELECT etag, last_modified, content_hash, unchanged_runs FROM feed_state WHERE source = ? AND feed_url = ?", (source, feed_url)
+        ).fetchone()
+    if row is None:
+        return {}
+    return {"etag": row[0], "last_modified": row[1], "content_hash": row[2], "unchanged_runs": row[3] or 0}
+
+def save_feed_validators(storage, source, feed_url, validators):
+    """피드의 검증값을 저장 대기열에 넣습니다. 저장할 값이 하나도 없으면 기존 값을 지웁니다.
+
+    같은 실행에서 게시한 항목의 기록과 함께 커밋되므로, 기록이 남지 않은 채 검증값만 앞서 저장되지 않습니다.
+    """
+    if validators.get("etag") or validators.get("last_modified") or validators.get("content_hash"):
+        storage.write(
+            "INSERT OR REPLACE INTO feed_state (source, feed_url, etag, last_modified, updated_at, content_hash, unchanged_runs) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, feed_url, validators.get("etag"), validators.get("last_modified"), time.time(),
+             validators.get("content_hash"), validators.get("unchanged_runs") or 0)
+        )
+    else:
+        storage.write("DELETE FROM feed_state WHERE source = ? AND feed_url = ?", (source, feed_url))
+
+def feed_content_hash(rss_data):
+    """매번 바뀌는 필드(lastBuildDate)와 태그 사이 공백을 걷어 낸 피드 본문의 해시를 계산합니다."""
+    normalized = INTER_TAG_SPACE_PATTERN.sub(b'><', VOLATILE_FEED_PATTERN.sub(b'', rss_data))
+    return hashlib.blake2b(normalized, digest_size=16).hexdigest()
+
+def is_feed_unchanged(rss_data, previous_validators, validators):
+    """피드 본문 해시를 이전 실행의 값과 비교하여 내용이 그대로인지 반환합니다.
+
+    조건부 요청을 무시하는 엔드포인트에서도 같은 내용을 다시 처리하지 않도록 쓰며,
+    새 해시와 연속 미변경 횟수는 validators에 기록되어 save_feed_validators()로 저장됩니다.
+    """
+    start_time = time.perf_counter()
+    content_hash = feed_content_hash(rss_data)
+    elapsed = time.perf_counter() - start_time
+
+    unchanged = content_hash == previous_validators.get("content_hash")
+    validators["content_hash"] = content_hash
+    validators["unchanged_runs"] = (previous_validators.get("unchanged_runs") or 0) + 1 if unchanged else 0
+
+    if unchanged:
+        logging.info(
+            f"피드 내용 해시 {content_hash[:12]} ({len(rss_data)}바이트, {elapsed * 1000:.2f}ms): "
+            f"이전 실행과 같음, 연속 {validators['unchanged_runs']}회 변경 없음"
+        )
+    else:
+        logging.info(f"피드 내용 해시 {content_hash[:12]} ({len(rss_data)}바이트, {elapsed * 1000:.2f}ms): 변경됨")
+    return unchanged
+
+def conditional_request_headers(validators):
+    """검증값으로 If-None-Match / If-Modified-Since 헤더를 만듭니다."""
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+def response_validators(response):
+    """응답 헤더에서 다음 조건부 요청에 쓸 검증값을 꺼냅니다."""
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
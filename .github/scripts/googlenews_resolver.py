@@ -0,0 +1,850 @@
+import os
+import time
+import re
+import random
+import json
+import base64
+import sqlite3
+import logging
+import threading
+import requests
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlunparse, urljoin, parse_qs, urlencode, unquote, quote
+from http_client import get_session
+
+# 링크 캐시 설정
+LINK_CACHE_TTL_DAYS = int(os.environ.get('LINK_CACHE_TTL_DAYS') or '30')
+LINK_CACHE_MAX_ENTRIES = int(os.environ.get('LINK_CACHE_MAX_ENTRIES') or '20000')
+
+# batchexecute 설정
+BATCH_EXECUTE_URL = "https://news.google.com/_/DotsSplashUi/data/batchexecute?rpcids=Fbv4je"
+BATCH_EXECUTE_CHUNK_SIZE = int(os.environ.get('BATCH_EXECUTE_CHUNK_SIZE') or '20')
+
+# 동시 해석 설정
+RESOLVE_MAX_WORKERS = int(os.environ.get('RESOLVE_MAX_WORKERS') or '8')
+RESOLVE_PER_HOST_LIMIT = int(os.environ.get('RESOLVE_PER_HOST_LIMIT') or '4')
+
+# 리디렉션 대체 방식 설정
+REDIRECT_CONNECT_TIMEOUT = float(os.environ.get('REDIRECT_CONNECT_TIMEOUT') or '5')
+REDIRECT_READ_TIMEOUT = float(os.environ.get('REDIRECT_READ_TIMEOUT') or '10')
+REDIRECT_MAX_RETRIES = int(os.environ.get('REDIRECT_MAX_RETRIES') or '3')
+REDIRECT_BACKOFF_BASE = float(os.environ.get('REDIRECT_BACKOFF_BASE') or '0.5')
+REDIRECT_MAX_HOPS = 10
+CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_THRESHOLD') or '5')
+
+# 해석 전략 선택 설정
+STRATEGY_OFFLINE = 'offline'
+STRATEGY_BATCH_EXECUTE = 'batchexecute'
+STRATEGY_REDIRECT = 'redirect'
+# 통계가 부족한 전략의 예상 소요 시간(초). 이 값의 순서가 기본 시도 순서가 됩니다.
+STRATEGY_PRIOR_COST = {STRATEGY_OFFLINE: 0.001, STRATEGY_BATCH_EXECUTE: 1.0, STRATEGY_REDIRECT: 3.0}
+STRATEGY_MIN_SAMPLES = int(os.environ.get('STRATEGY_MIN_SAMPLES') or '10')
+STRATEGY_EXPLORE_RATE = float(os.environ.get('STRATEGY_EXPLORE_RATE') or '0.05')
+STRATEGY_MAX_SAMPLES = int(os.environ.get('STRATEGY_MAX_SAMPLES') or '500')
+
+# garturlreq 요청에 함께 보내는 고정 컨텍스트
+GARTURLREQ_CONTEXT = [
+    ["en-US", "US", ["FINANCE_TOP_INDICES", "WEB_TEST_1_0_0"],
+     None, None, 1, 1, "US:en", None, 180, None, None, None, None, None, 0, None, None, [1608992183, 723341000]],
+    "en-US", "US", 1, [2, 3, 4, 8], 1, 0, "655000234", 0, 0, None, 0
+]
+
+def extract_article_id(google_link):
+    """Google News 기사 링크(news.google.com/.../articles/<id>)에서 기사 ID를 추출합니다."""
+    if not google_link:
+        return None
+    url = urlparse(google_link)
+    path = url.path.split("/")
+    if url.hostname == "news.google.com" and len(path) > 1 and path[-2] == "articles":
+        return path[-1] or None
+    return None
+
+def is_resolved_url(url):
+    """URL이 Google News 링크가 아닌 실제 원본 링크인지 확인합니다."""
+    return bool(url) and urlparse(url).hostname != "news.google.com"
+
+def is_google_url(url):
+    """URL이 Google 도메인(news.google.com, consent.google.com 등)인지 확인합니다."""
+    hostname = urlparse(url).hostname or ''
+    return hostname == 'google.com' or hostname.endswith('.google.com')
+
+def unescape_unicode(text):
+    """유니코드 이스케이프 시퀀스를 실제 문자로 변환합니다."""
+    return re.sub(
+        r'\\u([0-9a-fA-F]{4})',
+        lambda m: chr(int(m.group(1), 16)),
+        text
+    )
+
+def clean_url(url):
+    """URL을 정리하고 유니코드 문자를 처리하는 함수"""
+    # 유니코드 이스케이프 시퀀스 처리
+    url = unescape_unicode(url)
+    
+    # 백슬래시를 정리
+    url = url.replace('\\', '')
+    
+    # URL 디코딩 (예: %2F -> /, %40 -> @ 등)
+    url = unquote(url)
+
+    parsed_url = urlparse(url)
+    
+    # MSN 링크 특별 처리: HTTPS로 변환 및 불필요한 쿼리 파라미터 제거
+    if parsed_url.netloc.endswith('msn.com'):
+        parsed_url = parsed_url._replace(scheme='https')
+        query_params = parse_qs(parsed_url.query)
+        cleaned_params = {k: v[0] for k, v in query_params.items() if k in ['id', 'article']}
+        cleaned_query = urlencode(cleaned_params)
+        parsed_url = parsed_url._replace(query=cleaned_query)
+    
+    # 공백 등 비정상적인 문자 처리
+    # safe 파라미터에 특수 문자들을 포함하여 인코딩되지 않도록 설정
+    safe_chars = "/:@&=+$,?#"
+    cleaned_path = quote(parsed_url.path, safe=safe_chars)
+    cleaned_query = quote(parsed_url.query, safe=safe_chars)
+    
+    # URL 재구성
+    cleaned_url = urlunparse(parsed_url._replace(path=cleaned_path, query=cleaned_query))
+    
+    return cleaned_url
+
+# 기사 ID 페이로드 해석 결과 종류
+ARTICLE_URL = 'url'
+ARTICLE_YOUTUBE = 'youtube'
+ARTICLE_BATCH_EXECUTE = 'batchexecute'
+
+# 기사 ID 페이로드에서 원본 링크가 들어 있는 protobuf 필드 번호
+ARTICLE_LINK_FIELD = 4
+# 유튜브 영상 ID에 쓰이는 문자
+YOUTUBE_ID_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+def read_varint(data, pos):
+    """data[pos]부터 protobuf varint를 읽어 (값, 다음 위치)를 반환합니다."""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("varint가 너무 깁니다")
+
+def parse_protobuf_fields(data):
+    """protobuf 메시지를 (필드 번호, 값) 목록으로 파싱합니다. 값은 varint면 int, 그 외에는 bytes입니다."""
+    fields = []
+    pos = 0
+    end = len(data)
+    try:
+        while pos < end:
+            key, pos = read_varint(data, pos)
+            field_number, wire_type = key >> 3, key & 0x07
+            if wire_type == 0:
+                value, pos = read_varint(data, pos)
+            elif wire_type == 2:
+                length, pos = read_varint(data, pos)
+                value = data[pos:pos + length]
+                pos += length
+            elif wire_type == 1:
+                value = data[pos:pos + 8]
+                pos += 8
+            elif wire_type == 5:
+                value = data[pos:pos + 4]
+                pos += 4
+            else:
+                raise ValueError(f"지원하지 않는 wire type: {wire_type}")
+            if pos > end:
+                raise ValueError("메시지가 잘렸습니다")
+            fields.append((field_number, value))
+    except IndexError:
+        raise ValueError("메시지가 잘렸습니다")
+    return fields
+
+def classify_article_value(value):
+    """기사 ID 필드 값이 원본 URL, 유튜브 ID, batchexecute 조회 대상 중 무엇인지 판별합니다."""
+    if value.startswith(b'AU_yqL'):
+        return ARTICLE_BATCH_EXECUTE, None
+    if value.startswith(b'https://') or value.startswith(b'http://'):
+        return ARTICLE_URL, value.decode('utf-8', 'replace')
+    if len(value) == 11 and YOUTUBE_ID_BYTES.issuperset(value):
+        return ARTICLE_YOUTUBE, value.decode('ascii')
+    return None, None
+
+@lru_cache(maxsize=4096)
+def decode_article_id(article_id):
+    """기사 ID의 protobuf 페이로드를 한 번 파싱하여 (종류, 값)을 반환합니다.
+
+    종류는 ARTICLE_URL(원본 URL), ARTICLE_YOUTUBE(유튜브 영상 ID),
+    ARTICLE_BATCH_EXECUTE(온라인 조회 필요, 값은 None) 중 하나이며,
+    해석할 수 없으면 (None, None)을 반환합니다.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+        fields = parse_protobuf_fields(payload)
+    except ValueError:  # binascii.Error 포함
+        return None, None
+
+    # 링크 필드를 먼저 보고, 없으면 다른 문자열 필드(AMP 링크 등)에서 URL을 찾습니다.
+    for field_number, value in fields:
+        if field_number == ARTICLE_LINK_FIELD and isinstance(value, bytes):
+            kind, decoded = classify_article_value(value)
+            if kind:
+                return kind, decoded
+    for field_number, value in fields:
+        if field_number != ARTICLE_LINK_FIELD and isinstance(value, bytes):
+            kind, decoded = classify_article_value(value)
+            if kind == ARTICLE_URL:
+                return kind, decoded
+    return None, None
+
+def needs_batch_execute(article_id):
+    """오프라인 디코딩이 불가능하여 batchexecute 조회가 필요한 기사 ID인지 확인합니다."""
+    return decode_article_id(article_id)[0] == ARTICLE_BATCH_EXECUTE
+
+def article_id_shape(google_link):
+    """해석 전략 통계를 묶는 링크 형태(기사 ID 앞 4글자와 페이로드 종류)를 반환합니다."""
+    article_id = extract_article_id(google_link)
+    if not article_id:
+        return 'non-article'
+    kind = decode_article_id(article_id)[0]
+    return f"{article_id[:4]}:{kind or 'unknown'}"
+
+def build_batch_execute_payload(article_ids):
+    """여러 기사 ID에 대한 garturlreq 호출을 하나의 batchexecute 요청 본문으로 만듭니다."""
+    calls = []
+    for index, article_id in enumerate(article_ids):
+        request = json.dumps(["garturlreq", GARTURLREQ_CONTEXT, article_id], separators=(',', ':'))
+        # 단일 호출은 기존과 같이 "generic", 여러 호출은 순번으로 응답을 구분합니다.
+        identifier = "generic" if len(article_ids) == 1 else str(index + 1)
+        calls.append(["Fbv4je", request, None, identifier])
+    return json.dumps([calls], separators=(',', ':'))
+
+def parse_batch_execute_response(text, article_ids):
+    """batchexecute 응답을 기사 ID별 URL로 분리합니다. 응답이 없는 ID는 결과에서 빠집니다."""
+    results = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line.startswith('['):
+            continue
+        try:
+            entries = json.loads(line)
+        except ValueError:
+            continue
+
+        for entry in entries:
+            if not isinstance(entry, list) or len(entry) < 3 or entry[0] != "wrb.fr" or entry[1] != "Fbv4je":
+                continue
+            if not entry[2]:
+                continue
+            try:
+                payload = json.loads(entry[2])
+            except ValueError:
+                continue
+            if not isinstance(payload, list) or len(payload) < 2 or payload[0] != "garturlres" or not payload[1]:
+                continue
+
+            identifier = entry[6] if len(entry) > 6 else None
+            if identifier == "generic" or (identifier is None and len(article_ids) == 1):
+                index = 0
+            else:
+                try:
+                    index = int(identifier) - 1
+                except (TypeError, ValueError):
+                    continue
+            if 0 <= index < len(article_ids):
+                results[article_ids[index]] = payload[1]
+    return results
+
+def post_batch_execute(article_ids, session=None, timeout=30):
+    """기사 ID 목록을 batchexecute POST 한 번으로 조회합니다."""
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded;charset=utf-8",
+        "Referer": "https://news.google.com/"
+    }
+
+    response = (session or get_session()).post(
+        BATCH_EXECUTE_URL,
+        headers=headers,
+        data={"f.req": build_batch_execute_payload(article_ids)},
+        timeout=timeout
+    )
+
+    if response.status_code != 200:
+        raise Exception("Failed to fetch data from Google.")
+
+    return parse_batch_execute_response(response.text, article_ids)
+
+def fetch_decoded_batch_execute(article_id, session=None):
+    """기사 ID 하나를 batchexecute로 조회하여 원본 URL을 반환합니다."""
+    results = post_batch_execute([article_id], session)
+    if article_id not in results:
+        raise Exception(f"Article id not found in batchexecute response: {article_id}")
+    return results[article_id]
+
+def fetch_decoded_batch_execute_many(article_ids, session=None, chunk_size=BATCH_EXECUTE_CHUNK_SIZE, map_func=map):
+    """여러 기사 ID를 chunk_size개씩 묶어 조회하고, 실패한 ID만 개별 요청으로 다시 시도합니다.
+
+    map_func로 스레드 풀의 map을 넘기면 각 요청을 동시에 보낼 수 있습니다.
+    반환값은 {기사 ID: 원본 URL} 딕셔너리이며, 끝내 조회하지 못한 ID는 포함되지 않습니다.
+    """
+    unique_ids = list(dict.fromkeys(article_ids))
+    chunk_size = max(chunk_size, 1)
+    chunks = [unique_ids[start:start + chunk_size] for start in range(0, len(unique_ids), chunk_size)]
+
+    def fetch_chunk(chunk):
+        try:
+            return post_batch_execute(chunk, session)
+        except Exception as e:
+            logging.warning(f"batchexecute 일괄 조회 실패 ({len(chunk)}개): {e}")
+            return {}
+
+    def fetch_single(article_id):
+        try:
+            return article_id, fetch_decoded_batch_execute(article_id, session)
+        except Exception as e:
+            logging.warning(f"batchexecute 개별 조회 실패: {article_id} ({e})")
+            return article_id, None
+
+    results = {}
+    for chunk_results in map_func(fetch_chunk, chunks):
+        results.update(chunk_results)
+
+    failed_ids = [article_id for article_id in unique_ids if article_id not in results]
+    for article_id, url in map_func(fetch_single, failed_ids):
+        if url:
+            results[article_id] = url
+
+    logging.info(
+        f"batchexecute 조회 완료 - 요청 ID: {len(unique_ids)}, 성공: {len(results)}, "
+        f"개별 재시도: {len(failed_ids)}, POST 요청 수: {len(chunks) + len(failed_ids)}"
+    )
+    return results
+
+def decode_google_news_url_offline(source_url):
+    """네트워크 요청 없이 Google News 링크를 디코딩합니다. 실패하면 None을 반환합니다."""
+    article_id = extract_article_id(source_url)
+    if not article_id:
+        return None
+
+    kind, value = decode_article_id(article_id)
+    if kind == ARTICLE_URL:
+        return clean_url(value)
+    if kind == ARTICLE_YOUTUBE:
+        return f"https://www.youtube.com/watch?v={value}"
+    return None
+
+class CircuitBreaker:
+    """연속 실패가 threshold번 이어지면 열려서 이후 요청을 이번 실행 동안 건너뛰게 합니다."""
+
+    def __init__(self, name, threshold=CIRCUIT_BREAKER_THRESHOLD):
+        self.name = name
+        self.threshold = max(threshold, 1)
+        self.failures = 0
+        self.is_open = False
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            if not self.is_open:
+                self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if not self.is_open and self.failures >= self.threshold:
+                self.is_open = True
+                logging.warning(f"{self.name} 요청이 {self.failures}번 연속 실패하여 이번 실행 동안 더 이상 시도하지 않습니다.")
+
+def follow_redirects(google_link, session, max_retries=REDIRECT_MAX_RETRIES, breaker=None):
+    """리디렉션을 따라가 최종 URL을 얻습니다. 실패하면 None을 반환합니다.
+
+    본문은 내려받지 않고 Location 헤더만 따라가며, Google 도메인을 벗어나는 첫 위치에서 멈춥니다.
+    네트워크 오류와 5xx/429 응답은 지수 백오프로 재시도하고, breaker가 주어지면 결과를 기록합니다.
+    """
+    for attempt in range(max_retries):
+        if breaker and breaker.is_open:
+            return None
+        if attempt:
+            time.sleep(REDIRECT_BACKOFF_BASE * (2 ** (attempt - 1)) * random.uniform(1, 1.5))
+
+        url = google_link
+        try:
+            for _ in range(REDIRECT_MAX_HOPS):
+                response = session.get(
+                    url, allow_redirects=False, stream=True,
+                    timeout=(REDIRECT_CONNECT_TIMEOUT, REDIRECT_READ_TIMEOUT)
+                )
+                response.close()
+                if not response.is_redirect:
+                    break
+                url = urljoin(url, response.headers['Location'])
+                if not is_google_url(url):
+                    break
+        except requests.RequestException as e:
+            logging.error(f"Failed to get original URL: {e}")
+            if breaker:
+                breaker.record_failure()
+            continue
+
+        if response.status_code == 429 or response.status_code >= 500:
+            logging.error(f"Failed to get original URL: HTTP {response.status_code} ({url})")
+            if breaker:
+                breaker.record_failure()
+            continue
+
+        if not is_google_url(url):
+            if breaker:
+                breaker.record_success()
+            return clean_url(url)
+        # Google에 머문 응답은 재시도해도 결과가 같으므로 재시도하지 않습니다. 다만 4xx(차단 등)와
+        # 리디렉션 횟수 초과는 해석 실패로 breaker에 기록합니다. (동의/안내 페이지 같은 200 응답은 기록하지 않음)
+        if response.status_code >= 400 or response.is_redirect:
+            logging.error(f"Failed to get original URL: HTTP {response.status_code} ({url})")
+            if breaker:
+                breaker.record_failure()
+        return None
+    return None
+
+class LinkCache:
+    """기사 ID별로 해석된 원본 URL을 SQLite에 저장하여 실행 간에 재사용합니다.
+
+    항목은 TTL이 지나면 만료되고, 최대 항목 수를 넘으면 가장 오래 사용되지 않은 항목부터 제거됩니다.
+    """
+
+    def __init__(self, db_path, ttl_days=LINK_CACHE_TTL_DAYS, max_entries=LINK_CACHE_MAX_ENTRIES):
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stored = 0
+        self.evicted = 0
+        self._touched = {}
+        self._memo = {}
+        self._lock = threading.RLock()
+
+        # 다른 연결의 쓰기를 막지 않도록 자동 커밋 모드로 연결합니다.
+        # 여러 피드가 한 캐시를 함께 쓸 수 있도록 스레드 간 공유를 허용하고, 접근은 _lock으로 직렬화합니다.
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS resolved_links
+                             (article_id TEXT PRIMARY KEY,
+                              url TEXT NOT NULL,
+                              resolved_at REAL NOT NULL,
+                              last_used REAL NOT NULL)''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_resolved_links_last_used ON resolved_links(last_used)")
+
+    def get(self, article_id):
+        """캐시된 원본 URL을 반환합니다. 없거나 만료된 경우 None을 반환합니다."""
+        with self._lock:
+            return self._get(article_id)
+
+    def _get(self, article_id):
+        # 이번 실행에서 이미 조회한 항목은 통계에 다시 집계하지 않습니다.
+        if article_id in self._memo:
+            return self._memo[article_id]
+
+        row = self.conn.execute(
+            "SELECT url, resolved_at FROM resolved_links WHERE article_id = ?", (article_id,)
+        ).fetchone()
+        now = time.time()
+
+        if row is None:
+            self._memo[article_id] = None
+            self.misses += 1
+            return None
+
+        url, resolved_at = row
+        if self.ttl and now - resolved_at > self.ttl:
+            self.conn.execute("DELETE FROM resolved_links WHERE article_id = ?", (article_id,))
+            self._memo[article_id] = None
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        # LRU 갱신은 모아 두었다가 close()에서 한 번에 기록합니다.
+        self._touched[article_id] = now
+        self._memo[article_id] = url
+        self.hits += 1
+        return url
+
+    def put(self, article_id, url):
+        """해석에 성공한 원본 URL을 저장합니다. Google News 링크 그대로인 경우는 저장하지 않습니다."""
+        if not article_id or not is_resolved_url(url):
+            return
+        with self._lock:
+            self._put(article_id, url)
+
+    def _put(self, article_id, url):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO resolved_links (article_id, url, resolved_at, last_used) VALUES (?, ?, ?, ?)",
+            (article_id, url, now, now)
+        )
+        self._touched.pop(article_id, None)
+        self._memo[article_id] = url
+        self.stored += 1
+
+    def evict(self):
+        """만료된 항목과 최대 항목 수를 넘는 오래된 항목을 제거합니다."""
+        if self.ttl:
+            cursor = self.conn.execute(
+                "DELETE FROM resolved_links WHERE resolved_at < ?", (time.time() - self.ttl,)
+            )
+            self.expired += max(cursor.rowcount, 0)
+
+        count = self.conn.execute("SELECT COUNT(*) FROM resolved_links").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                """DELETE FROM resolved_links WHERE article_id IN
+                   (SELECT article_id FROM resolved_links ORDER BY last_used ASC LIMIT ?)""",
+                (overflow,)
+            )
+            self.evicted += overflow
+
+    def close(self):
+        """사용 기록을 반영하고 캐시를 정리한 뒤 연결을 닫습니다."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        try:
+            if self._touched:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    "UPDATE resolved_links SET last_used = ? WHERE article_id = ?",
+                    [(last_used, article_id) for article_id, last_used in self._touched.items()]
+                )
+                self.conn.execute("COMMIT")
+                self._touched.clear()
+            self.evict()
+            self.log_stats()
+        except sqlite3.Error as e:
+            logging.error(f"링크 캐시 정리 중 오류 발생: {e}")
+        finally:
+            self.conn.close()
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        logging.info(
+            f"링크 캐시 통계 - 적중: {self.hits}, 미스: {self.misses} (적중률 {hit_rate:.1f}%), "
+            f"만료: {self.expired}, 저장: {self.stored}, 제거: {self.evicted}"
+        )
+
+class StrategyStats:
+    """링크 형태별로 각 해석 전략의 시도 수, 성공 수, 소요 시간을 SQLite에 누적하고 시도 순서를 정합니다.
+
+    통계가 충분한 전략은 성공 1건당 예상 소요 시간이 짧은 순으로, 부족한 전략은 STRATEGY_PRIOR_COST 순으로 시도합니다.
+    STRATEGY_MIN_SAMPLES번 이상 시도해 한 번도 성공하지 못한 전략은 건너뛰되,
+    상황이 바뀌었는지 확인할 수 있도록 STRATEGY_EXPLORE_RATE 확률로 다시 시도합니다.
+    """
+
+    def __init__(self, db_path=None):
+        self.totals = {}  # (형태, 전략) -> [시도, 성공, 소요 시간] (이전 실행 누적 + 이번 실행)
+        self.run = {}  # 이번 실행분만
+        self._lock = threading.Lock()
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(db_path, isolation_level=None)
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS resolve_strategy_stats
+                                 (shape TEXT NOT NULL,
+                                  strategy TEXT NOT NULL,
+                                  attempts INTEGER NOT NULL,
+                                  successes INTEGER NOT NULL,
+                                  total_time REAL NOT NULL,
+                                  PRIMARY KEY (shape, strategy))''')
+            for shape, strategy, attempts, successes, total_time in self.conn.execute(
+                "SELECT shape, strategy, attempts, successes, total_time FROM resolve_strategy_stats"
+            ):
+                self.totals[(shape, strategy)] = [attempts, successes, total_time]
+
+    def record(self, shape, strategy, success, elapsed):
+        with self._lock:
+            for stats in (self.totals, self.run):
+                entry = stats.setdefault((shape, strategy), [0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += 1 if success else 0
+                entry[2] += elapsed
+
+    def expected_cost(self, shape, strategy):
+        """성공 1건을 얻는 데 드는 예상 시간(초)을 반환합니다. 한 번도 성공하지 못했으면 None입니다."""
+        attempts, successes, total_time = self.totals.get((shape, strategy), (0, 0, 0.0))
+        if attempts < STRATEGY_MIN_SAMPLES:
+            return STRATEGY_PRIOR_COST[strategy]
+        if not successes:
+            return None
+        return total_time / successes
+
+    def order(self, shape, strategies):
+        """주어진 전략들을 시도할 순서대로 정렬하고, 성공한 적 없는 전략은 뺍니다."""
+        ranked = []
+        skipped = []
+        for strategy in strategies:
+            cost = self.expected_cost(shape, strategy)
+            if cost is None:
+                skipped.append(strategy)
+            else:
+                ranked.append((cost, strategy))
+        ordered = [strategy for _, strategy in sorted(ranked, key=lambda entry: entry[0])]
+
+        # 모든 전략이 실패만 했거나, 가끔은 건너뛰던 전략도 맨 뒤에 붙여 다시 확인합니다.
+        if skipped and (not ordered or random.random() < STRATEGY_EXPLORE_RATE):
+            ordered.extend(skipped)
+        return ordered
+
+    def log_summary(self):
+        """이번 실행의 형태별·전략별 해석 통계를 기록합니다."""
+        time_by_strategy = {}
+        for (shape, strategy), (attempts, successes, total_time) in sorted(self.run.items()):
+            time_by_strategy[strategy] = time_by_strategy.get(strategy, 0.0) + total_time
+            logging.info(
+                f"해석 전략 통계 - {shape} / {strategy}: 시도 {attempts}, 성공률 {successes / attempts * 100:.1f}%, "
+                f"평균 {total_time / attempts * 1000:.1f}ms"
+            )
+        if time_by_strategy:
+            logging.info(
+                "해석 전략별 소요 시간 - " + ", ".join(f"{strategy}: {total:.2f}초" for strategy, total in time_by_strategy.items())
+            )
+
+    def close(self):
+        """이번 실행분을 DB에 누적하고 연결을 닫습니다."""
+        self.log_summary()
+        if not self.conn:
+            return
+        try:
+            rows = []
+            for (shape, strategy), (attempts, successes, total_time) in self.totals.items():
+                if (shape, strategy) not in self.run:
+                    continue
+                # 오래된 기록의 영향이 계속 남지 않도록 표본이 많아지면 절반으로 줄입니다.
+                if attempts > STRATEGY_MAX_SAMPLES:
+                    attempts, successes, total_time = attempts // 2, successes // 2, total_time / 2
+                rows.append((shape, strategy, attempts, successes, total_time))
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO resolve_strategy_stats (shape, strategy, attempts, successes, total_time) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            logging.error(f"해석 전략 통계 저장 중 오류 발생: {e}")
+        finally:
+            self.conn.close()
+
+class LinkResolver:
+    """한 실행에서 해석할 링크를 모아 제한된 스레드 풀에서 한꺼번에 해석하고 결과를 보관합니다.
+
+    링크마다 StrategyStats가 정한 순서로 해석 전략(오프라인 디코딩, batchexecute, 리디렉션)을 시도합니다.
+    모든 요청은 공유 연결 풀(http_client)의 Session을 함께 쓰며, 호스트별 동시 요청 수는 per_host_limit으로 제한됩니다.
+    """
+
+    def __init__(self, session=None, link_cache=None, strategy_stats=None, max_workers=RESOLVE_MAX_WORKERS, per_host_limit=RESOLVE_PER_HOST_LIMIT):
+        self.session = session or get_session()
+        self.link_cache = link_cache
+        self.strategy_stats = strategy_stats or StrategyStats()
+        self.max_workers = max(max_workers, 1)
+        self.per_host_limit = max(per_host_limit, 1)
+        self.resolved = {}
+        self.stats = {"cache": 0, STRATEGY_OFFLINE: 0, STRATEGY_BATCH_EXECUTE: 0, STRATEGY_REDIRECT: 0, "failed": 0}
+        self._host_limits = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker("news.google.com 리디렉션")
+
+        # 호스트당 연결 풀이 동시 요청 수보다 작으면 남는 연결은 재사용되지 못하고 버려집니다.
+        pool_maxsize = getattr(self.session, "pool_maxsize", None)
+        if pool_maxsize and pool_maxsize < min(self.max_workers, self.per_host_limit):
+            logging.warning(f"HTTP 연결 풀 크기({pool_maxsize})가 호스트별 동시 요청 수보다 작습니다. HTTP_POOL_MAXSIZE를 늘리세요.")
+
+    def _host_limit(self, url):
+        host = urlparse(url).hostname or ''
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _limited(self, url, func):
+        """func을 호스트별 동시 요청 제한 안에서 실행하도록 감쌉니다."""
+        def wrapper(*args):
+            with self._host_limit(url):
+                return func(*args)
+        return wrapper
+
+    def _store(self, google_link, url, source):
+        self.resolved[google_link] = url
+        with self._lock:
+            self.stats[source] += 1
+        if self.link_cache:
+            self.link_cache.put(extract_article_id(google_link), url)
+
+    def _fail(self, google_link):
+        logging.warning(f"오리지널 링크 추출 실패, 원 링크 사용: {google_link}")
+        self._store(google_link, clean_url(google_link), "failed")
+
+    def _cached(self, google_link):
+        """이전 실행에서 해석해 둔 링크를 캐시에서 찾습니다."""
+        article_id = extract_article_id(google_link)
+        if self.link_cache and article_id:
+            cached_url = self.link_cache.get(article_id)
+            if cached_url:
+                self.resolved[google_link] = cached_url
+                with self._lock:
+                    self.stats["cache"] += 1
+                return cached_url
+        return None
+
+    def _plan(self, google_link):
+        """링크 형태와 시도할 전략 순서를 반환합니다."""
+        shape = article_id_shape(google_link)
+        if extract_article_id(google_link):
+            strategies = [STRATEGY_OFFLINE, STRATEGY_BATCH_EXECUTE, STRATEGY_REDIRECT]
+        else:
+            strategies = [STRATEGY_REDIRECT]
+        return shape, self.strategy_stats.order(shape, strategies)
+
+    def _try(self, strategy, shape, google_link):
+        """전략 하나로 링크 해석을 시도하고 결과를 통계에 기록합니다. 실패하면 None을 반환합니다."""
+        if strategy == STRATEGY_REDIRECT and self.breaker.is_open:
+            return None  # 차단된 동안의 결과는 전략 통계에 넣지 않습니다.
+
+        start_time = time.perf_counter()
+        url = None
+        if strategy == STRATEGY_OFFLINE:
+            url = decode_google_news_url_offline(google_link)
+        elif strategy == STRATEGY_BATCH_EXECUTE:
+            try:
+                url = clean_url(fetch_decoded_batch_execute(extract_article_id(google_link), self.session))
+            except Exception as e:
+                logging.warning(f"batchexecute 개별 조회 실패: {google_link} ({e})")
+        elif strategy == STRATEGY_REDIRECT:
+            url = follow_redirects(google_link, self.session, breaker=self.breaker)
+
+        if url and not is_resolved_url(url):
+            url = None
+        self.strategy_stats.record(shape, strategy, bool(url), time.perf_counter() - start_time)
+        return url
+
+    def resolve(self, google_link):
+        """링크 하나를 해석합니다. resolve_all()로 미리 해석된 링크는 바로 반환합니다."""
+        if google_link in self.resolved:
+            return self.resolved[google_link]
+
+        url = self._cached(google_link)
+        if url:
+            return url
+
+        shape, strategies = self._plan(google_link)
+        for strategy in strategies:
+            url = self._try(strategy, shape, google_link)
+            if url:
+                self._store(google_link, url, strategy)
+                return url
+
+        self._fail(google_link)
+        return self.resolved[google_link]
+
+    def _batch_execute(self, plans, executor):
+        """batchexecute 차례인 링크들을 일괄 조회하고, 성공한 링크 목록을 반환합니다."""
+        links_by_id = {}
+        for google_link in plans:
+            links_by_id.setdefault(extract_article_id(google_link), []).append(google_link)
+
+        fetch = self._limited(BATCH_EXECUTE_URL, lambda func, *args: func(*args))
+        start_time = time.perf_counter()
+        results = fetch_decoded_batch_execute_many(
+            list(links_by_id), self.session,
+            map_func=lambda func, iterable: executor.map(lambda arg: fetch(func, arg), iterable)
+        )
+        # 일괄 요청의 소요 시간은 ID 수로 나누어 각 링크에 배분합니다.
+        elapsed = (time.perf_counter() - start_time) / len(links_by_id)
+
+        resolved = []
+        for article_id, links in links_by_id.items():
+            url = clean_url(results[article_id]) if article_id in results else None
+            if url and not is_resolved_url(url):
+                url = None
+            for google_link in links:
+                self.strategy_stats.record(plans[google_link], STRATEGY_BATCH_EXECUTE, bool(url), elapsed)
+                if url:
+                    self._store(google_link, url, STRATEGY_BATCH_EXECUTE)
+                    resolved.append(google_link)
+        return resolved
+
+    def resolve_all(self, google_links):
+        """링크 목록을 한 번에 해석합니다. 결과는 resolve()로 꺼내 쓸 수 있습니다.
+
+        링크마다 다음 차례의 전략을 모아 한 단계씩 진행합니다. 오프라인 디코딩은 바로 처리하고,
+        batchexecute는 일괄 요청으로, 리디렉션은 스레드 풀에서 처리하며, 실패한 링크는 다음 단계에서 다음 전략을 시도합니다.
+        여러 스레드가 동시에 호출하면 다른 스레드가 이미 해석 중인 링크는 다시 해석하지 않고 끝나기를 기다립니다.
+        """
+        start_time = time.time()
+        with self._lock:
+            pending = [link for link in dict.fromkeys(google_links) if link and link not in self.resolved]
+            waiting = [self._inflight[link] for link in pending if link in self._inflight]
+            pending = [link for link in pending if link not in self._inflight]
+            for google_link in pending:
+                self._inflight[google_link] = threading.Event()
+
+        try:
+            self._resolve_pending(pending)
+        finally:
+            with self._lock:
+                for google_link in pending:
+                    self._inflight.pop(google_link).set()
+        for event in waiting:
+            event.wait()
+
+        if pending:
+            logging.info(
+                f"링크 해석 단계 완료 - 링크 {len(pending)}개, {time.time() - start_time:.2f}초 소요"
+            )
+
+    def _resolve_pending(self, pending):
+        """resolve_all()이 맡은 링크들을 전략 단계별로 해석합니다."""
+        plans = {}
+        for google_link in pending:
+            if not self._cached(google_link):
+                plans[google_link] = self._plan(google_link)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while plans:
+                steps = {STRATEGY_OFFLINE: {}, STRATEGY_BATCH_EXECUTE: {}, STRATEGY_REDIRECT: {}}
+                for google_link, (shape, strategies) in list(plans.items()):
+                    if not strategies:
+                        del plans[google_link]
+                        self._fail(google_link)
+                        continue
+                    steps[strategies.pop(0)][google_link] = shape
+
+                for google_link, shape in steps[STRATEGY_OFFLINE].items():
+                    url = self._try(STRATEGY_OFFLINE, shape, google_link)
+                    if url:
+                        self._store(google_link, url, STRATEGY_OFFLINE)
+                        del plans[google_link]
+
+                if steps[STRATEGY_BATCH_EXECUTE]:
+                    for google_link in self._batch_execute(steps[STRATEGY_BATCH_EXECUTE], executor):
+                        del plans[google_link]
+
+                futures = {
+                    google_link: executor.submit(self._limited(google_link, self._try), STRATEGY_REDIRECT, shape, google_link)
+                    for google_link, shape in steps[STRATEGY_REDIRECT].items()
+                }
+                for google_link, future in futures.items():
+                    url = future.result()
+                    if url:
+                        self._store(google_link, url, STRATEGY_REDIRECT)
+                        del plans[google_link]
+
+    def close(self):
+        """해석 통계를 기록하고 전략 통계와 링크 캐시를 닫습니다."""
+        logging.info(
+            "링크 해석 통계 - " + ", ".join(f"{source}: {count}" for source, count in self.stats.items())
+        )
+        self.strategy_stats.close()
+        if self.link_cache:
+            self.link_cache.close()
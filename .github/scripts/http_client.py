@@ -0,0 +1,84 @@
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 연결 풀 설정: 풀을 유지할 호스트 수와 호스트당 유지할 연결 수
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS') or '10')
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE') or '10')
+
+# 기본 타임아웃(초): 호출부에서 timeout을 주지 않은 요청에 적용
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT') or '5')
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT') or '30')
+
+# brotli 모듈이 있을 때만 br 압축을 요청합니다. (urllib3가 응답을 풀 수 있어야 하므로)
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+_session = None
+_session_lock = threading.Lock()
+
+class PooledSession(requests.Session):
+    """호스트별 연결 풀과 keep-alive를 쓰고, timeout을 주지 않은 요청에 기본 타임아웃을 적용하는 Session"""
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE):
+        super().__init__()
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.headers["Connection"] = "keep-alive"
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+    def pool_stats(self):
+        """호스트별 (요청 수, 새로 연 연결 수) 통계를 반환합니다. 두 값의 차이가 재사용된 연결 수입니다."""
+        stats = {}
+        for adapter in set(self.adapters.values()):
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools[key]
+                host = f"{pool.scheme}://{pool.host}"
+                requests_count, connections = stats.get(host, (0, 0))
+                stats[host] = (requests_count + pool.num_requests, connections + pool.num_connections)
+        return stats
+
+def get_session():
+    """프로세스 전체에서 공유하는 PooledSession을 반환합니다."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
+
+def log_pool_stats(session=None):
+    """연결 풀 통계(호스트별 요청 수, 새 연결 수, 재사용 수)를 기록합니다."""
+    session = session or _session
+    if session is None:
+        return
+    for host, (requests_count, connections) in sorted(session.pool_stats().items()):
+        logging.info(
+            f"HTTP 연결 풀 통계 - {host}: 요청 {requests_count}회, 새 연결 {connections}개, "
+            f"재사용 {max(requests_count - connections, 0)}회"
+        )
+
+def close_session():
+    """공유 Session의 통계를 기록하고 연결을 모두 닫습니다."""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        log_pool_stats(session)
+        session.close()
@@ -0,0 +1,872 @@
+import os
+import re
+import json
+import hashlib
+import zlib
+import time
+import sqlite3
+import logging
+import threading
+
+# 한 번의 IN (...) 질의에 넣을 최대 값 수 (구버전 SQLite의 바인딩 변수 제한 999보다 작게)
+SQLITE_IN_CHUNK_SIZE = 500
+
+# 저장 세션 설정: 동기화 수준(WAL에서는 NORMAL도 손상 없이 안전)과 한 트랜잭션에 모을 게시 항목 수
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+STATE_COMMIT_BATCH = int(os.environ.get('STATE_COMMIT_BATCH') or '10')
+
+# 전체 무결성 검사(PRAGMA integrity_check) 주기(일). 0이면 전체 검사를 하지 않습니다.
+DB_FULL_CHECK_DAYS = float(os.environ.get('DB_FULL_CHECK_DAYS') or '7')
+
+# 보존 기간(일): 게시한 지 이 기간이 지난 행은 지웁니다. 중복 검사용 해시는 dedup_keys(뉴스)와 seen_ids(영상)에 남습니다.
+# 0이면 정리하지 않습니다.
+HISTORY_RETENTION_DAYS = float(os.environ.get('HISTORY_RETENTION_DAYS') or '30')
+# 중복 검사 키 보존 기간(일): dedup_keys에서 기록한 지 이 기간이 지난 키를 하루에 한 번 지웁니다.
+# 기사가 피드에 다시 나올 수 있는 기간보다 길어야 하며, 0이면 지우지 않습니다(테이블이 계속 커짐).
+DEDUP_RETENTION_DAYS = float(os.environ.get('DEDUP_RETENTION_DAYS') or '365')
+# VACUUM 주기(일). 0이면 VACUUM을 하지 않습니다.
+DB_VACUUM_DAYS = float(os.environ.get('DB_VACUUM_DAYS') or '7')
+
+# 예전 형식에서 관련 기사마다 news_items에 추가하던 열 (related_title_1, related_press_1, related_link_1, ...)
+WIDE_RELATED_COLUMN_PATTERN = re.compile(r'related_(title|press|link)_(\d+)$')
+RELATED_FIELDS = ('title', 'press', 'link')
+
+# 모든 스크립트가 함께 쓸 DB 파일. 지정하면 스크립트별 기본 파일 대신 이 파일 하나에 모든 소스의 기록을 저장합니다.
+STATE_DB_PATH = os.environ.get('STATE_DB_PATH', '').strip()
+
+# 현재 스키마의 테이블 정의. 소스(스크립트나 구독)별 기록은 source 열로 구분하므로 여러 소스가 한 DB 파일을 쓸 수 있습니다.
+TABLES = {
+    'news_items': '''(source TEXT NOT NULL,
+                      guid_hash INTEGER NOT NULL,
+                      pub_date TEXT,
+                      guid TEXT NOT NULL,
+                      title TEXT,
+                      link TEXT,
+                      topic TEXT,
+                      posted_at REAL,
+                      PRIMARY KEY (source, guid_hash)) WITHOUT ROWID''',
+    'related_articles': '''(source TEXT NOT NULL,
+                            guid TEXT NOT NULL,
+                            position INTEGER NOT NULL,
+                            title TEXT,
+                            press TEXT,
+                            link TEXT,
+                            PRIMARY KEY (source, guid, position)) WITHOUT ROWID''',
+    'videos': '''(source TEXT NOT NULL,
+                  published_at TEXT,
+                  channel_title TEXT,
+                  channel_id TEXT,
+                  title TEXT,
+                  video_id TEXT NOT NULL,
+                  video_url TEXT,
+                  description TEXT,
+                  category_id TEXT,
+                  category_name TEXT,
+                  duration TEXT,
+                  thumbnail_url TEXT,
+                  tags TEXT,
+                  live_broadcast_content TEXT,
+                  scheduled_start_time TEXT,
+                  caption TEXT,
+                  mode TEXT,
+                  posted_at REAL,
+                  PRIMARY KEY (source, video_id))''',
+    'seen_ids': '''(source TEXT NOT NULL,
+                    id_hash INTEGER NOT NULL,
+                    archived_at REAL NOT NULL,
+                    PRIMARY KEY (source, id_hash)) WITHOUT ROWID''',
+    'dedup_keys': '''(source TEXT NOT NULL,
+                      key_hash INTEGER NOT NULL,
+                      key_check INTEGER,
+                      seen_at REAL,
+                      PRIMARY KEY (source, key_hash)) WITHOUT ROWID''',
+    'dedup_collisions': '''(source TEXT NOT NULL,
+                            key TEXT NOT NULL,
+                            PRIMARY KEY (source, key)) WITHOUT ROWID''',
+    'feed_state': '''(source TEXT NOT NULL,
+                      feed_url TEXT NOT NULL,
+                      etag TEXT,
+                      last_modified TEXT,
+                      updated_at REAL,
+                      content_hash TEXT,
+                      unchanged_runs INTEGER DEFAULT 0,
+                      PRIMARY KEY (source, feed_url))''',
+    'maintenance': '''(task TEXT PRIMARY KEY,
+                       last_run REAL NOT NULL)''',
+}
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_news_items_posted_at ON news_items(posted_at)",
+    "CREATE INDEX IF NOT EXISTS idx_videos_posted_at ON videos(posted_at)",
+]
+# 소스별 기록을 담는 테이블 (초기화 모드에서는 해당 소스의 행만 지웁니다)
+SOURCE_TABLES = ('news_items', 'related_articles', 'videos', 'seen_ids', 'dedup_keys', 'dedup_collisions')
+
+class StorageSession:
+    """실행 하나 동안 쓰는 SQLite 연결과 쓰기 대기열입니다.
+
+    연결은 WAL 저널 모드와 SQLITE_SYNCHRONOUS 동기화 수준으로 한 번만 엽니다. 같은 연결을 계속 쓰므로
+    sqlite3 모듈의 문장 캐시 덕분에 반복되는 INSERT는 한 번만 준비(prepare)됩니다.
+    write()로 넣은 쓰기는 바로 실행하지 않고 모아 두었다가, 게시를 마친 항목이 batch_size개가 되거나
+    commit()/close()가 호출되면 하나의 짧은 트랜잭션으로 기록합니다. 쓰기 잠금은 커밋하는 동안에만 잡히므로
+    같은 DB를 쓰는 링크 캐시 같은 다른 연결을 네트워크 대기 중에 막지 않습니다.
+    여러 구독이 스레드에서 세션 하나를 함께 쓸 수 있도록 커밋과 스키마 작업은 lock을 잡고 실행하며,
+    conn으로 직접 읽는 쪽도 다른 스레드의 트랜잭션 도중에 끼어들지 않도록 lock을 잡고 읽어야 합니다.
+    """
+
+    def __init__(self, db_path, batch_size=STATE_COMMIT_BATCH, synchronous=SQLITE_SYNCHRONOUS):
+        self.db_path = db_path
+        self.batch_size = max(batch_size, 1)
+        # 연결을 열기 전 DB 파일의 체크섬 (verify_integrity에서 지난 실행이 기록한 값과 비교)
+        self.initial_checksum = None if os.path.exists(db_path + '-wal') else file_checksum(db_path)
+        self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self.journal_mode = self.conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        # 마이그레이션과 보존 기간 정리에서 SQL로 해시 키를 계산할 수 있도록 등록합니다.
+        self.conn.create_function("id_hash", 1, _sql_id_hash)
+        self.lock = threading.RLock()
+        # 무결성 검사와 보존 기간 정리는 세션마다 한 번만 합니다. (init_store 참고)
+        self.maintained = False
+        self._pending = []
+        self._done_items = 0
+        self.writes = 0
+        self.commits = 0
+        self.commit_time = 0.0
+        self.max_commit_time = 0.0
+
+    def write(self, sql, params=()):
+        """쓰기 문장 하나를 다음 커밋까지 모아 둡니다."""
+        with self.lock:
+            self._pending.append((sql, params, False))
+
+    def write_many(self, sql, params_list):
+        """같은 쓰기 문장을 여러 값으로 실행하도록 모아 둡니다. (커밋할 때 executemany로 실행)"""
+        params_list = list(params_list)
+        if params_list:
+            with self.lock:
+                self._pending.append((sql, params_list, True))
+
+    def item_done(self):
+        """항목 하나의 게시를 마쳤음을 알립니다. 게시를 마친 항목이 batch_size개가 되면 커밋합니다."""
+        with self.lock:
+            self._done_items += 1
+            if self._done_items >= self.batch_size:
+                self.commit()
+
+    def commit(self):
+        """모아 둔 쓰기를 하나의 트랜잭션으로 기록합니다."""
+        with self.lock:
+            self._done_items = 0
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            start_time = time.perf_counter()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                writes = 0
+                for sql, params, many in pending:
+                    if many:
+                        self.conn.executemany(sql, params)
+                        writes += len(params)
+                    else:
+                        self.conn.execute(sql, params)
+                        writes += 1
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+            elapsed = time.perf_counter() - start_time
+            self.writes += writes
+            self.commits += 1
+            self.commit_time += elapsed
+            self.max_commit_time = max(self.max_commit_time, elapsed)
+        logging.debug(f"DB 커밋: 쓰기 {writes}건, {elapsed * 1000:.1f}ms")
+
+    def log_stats(self):
+        average = (self.commit_time / self.commits * 1000) if self.commits else 0.0
+        logging.info(
+            f"DB 저장 통계 ({os.path.basename(self.db_path)}, {self.journal_mode}) - 쓰기 {self.writes}건, "
+            f"커밋 {self.commits}회, 커밋 평균 {average:.1f}ms, 최대 {self.max_commit_time * 1000:.1f}ms"
+        )
+
+    def close(self):
+        """남은 쓰기를 커밋하고 WAL 내용을 DB 파일에 반영한 뒤 연결을 닫습니다.
+
+        아티팩트에는 DB 파일만 올라가므로 닫기 전에 WAL을 비워 DB 파일 하나에 모든 기록이 남도록 합니다.
+        """
+        try:
+            self.commit()
+        except sqlite3.Error as e:
+            logging.error(f"DB 커밋 중 오류 발생: {e}")
+        finally:
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logging.warning(f"WAL 체크포인트 중 오류 발생: {e}")
+            self.log_stats()
+            self.conn.close()
+            save_db_checksum(self.db_path)
+
+def checksum_path(db_path):
+    return db_path + '.checksum'
+
+def file_checksum(path):
+    """파일 내용의 blake2b 해시를 반환합니다. 파일이 없으면 None입니다."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def save_db_checksum(db_path):
+    """DB 파일의 체크섬을 옆 파일(.checksum)에 기록합니다.
+
+    아직 열려 있는 연결이 있으면(WAL 파일이 남아 있으면) DB 파일이 더 바뀔 수 있으므로 기록하지 않습니다.
+    """
+    if os.path.exists(db_path + '-wal'):
+        logging.debug(f"{db_path}에 열린 연결이 남아 있어 체크섬을 기록하지 않습니다.")
+        return
+    checksum = file_checksum(db_path)
+    if checksum is None:
+        return
+    with open(checksum_path(db_path), 'w') as f:
+        f.write(checksum + '\n')
+
+def load_db_checksum(db_path):
+    """지난 실행이 기록한 DB 파일의 체크섬을 반환합니다. 기록이 없으면 None입니다."""
+    try:
+        with open(checksum_path(db_path)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def create_tables(conn):
+    """현재 스키마의 테이블과 인덱스를 만듭니다. 이미 있는 테이블은 그대로 둡니다."""
+    for table, definition in TABLES.items():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} {definition}")
+    for sql in INDEXES:
+        conn.execute(sql)
+
+def _table_columns(conn, table, schema="main"):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+def verify_integrity(storage, full_check_days=DB_FULL_CHECK_DAYS):
+    """DB 무결성을 비용이 낮은 단계부터 확인합니다.
+
+    마지막 전체 검사 후 full_check_days일이 지났으면 PRAGMA integrity_check를 실행합니다.
+    그렇지 않으면 지난 실행이 기록한 체크섬과 내려받은 DB 파일의 체크섬을 비교하여,
+    같으면 검사를 건너뛰고 다르거나 기록이 없을 때만 PRAGMA quick_check를 실행합니다.
+    문제가 있으면 sqlite3.IntegrityError를 발생시킵니다.
+    """
+    conn = storage.conn
+    start_time = time.perf_counter()
+    now = time.time()
+
+    row = conn.execute("SELECT last_run FROM maintenance WHERE task = 'integrity_check'").fetchone()
+    if full_check_days > 0 and (row is None or now - row[0] >= full_check_days * 86400):
+        level, pragma = "전체 검사", "integrity_check"
+    elif storage.initial_checksum is None or storage.initial_checksum != load_db_checksum(storage.db_path):
+        level, pragma = "빠른 검사 (체크섬 불일치)", "quick_check"
+    else:
+        level, pragma = "체크섬 일치, 검사 생략", None
+
+    if pragma:
+        result = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        if result != "ok":
+            logging.error(f"데이터베이스 무결성 검사 실패: {result}")
+            raise sqlite3.IntegrityError("데이터베이스 무결성 검사 실패")
+        if pragma == "integrity_check":
+            conn.execute("INSERT OR REPLACE INTO maintenance (task, last_run) VALUES ('integrity_check', ?)", (now,))
+
+    logging.info(f"데이터베이스 무결성 확인 - {level}: {(time.perf_counter() - start_time) * 1000:.1f}ms")
+
+def _select_in(conn, sql, values, params=()):
+    """sql의 {placeholders} 자리에 values를 SQLITE_IN_CHUNK_SIZE개씩 나눠 넣어 실행하고 결과 행을 차례로 돌려줍니다.
+
+    params는 매번 values 앞에 붙는 인자입니다. (예: source = ? 조건의 값)
+    """
+    values = list(values)
+    for start in range(0, len(values), SQLITE_IN_CHUNK_SIZE):
+        chunk = values[start:start + SQLITE_IN_CHUNK_SIZE]
+        yield from conn.execute(sql.format(placeholders=", ".join("?" * len(chunk))), (*params, *chunk))
+
+def find_existing(conn, table, column, keys, source=None):
+    """keys 중 table.column에 이미 저장된 값의 집합을 반환합니다. source를 주면 그 소스의 행만 봅니다.
+
+    이번에 가져온 후보만 IN (...) 질의로 조회하므로 비용은 저장된 기록의 크기가 아니라 후보 수에 비례합니다.
+    """
+    keys = list(dict.fromkeys(key for key in keys if key is not None))
+    where, params = ("source = ? AND ", (source,)) if source is not None else ("", ())
+    existing = {
+        row[0] for row in _select_in(conn, f"SELECT {column} FROM {table} WHERE {where}{column} IN ({{placeholders}})", keys, params)
+    }
+    logging.debug(f"{table}.{column} 일괄 조회: 후보 {len(keys)}개 중 {len(existing)}개 존재")
+    return existing
+
+def id_hash(value):
+    """id 문자열의 64비트 해시를 SQLite INTEGER 범위의 부호 있는 정수로 반환합니다."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+def find_seen(conn, source, table, column, keys):
+    """keys 중 source의 table.column에 있거나 seen_ids에 해시로 남아 있는 값의 집합을 반환합니다.
+
+    해시가 64비트이므로 새 id를 이미 본 것으로 잘못 판단할 확률은 무시할 만큼 작습니다.
+    """
+    seen = find_existing(conn, table, column, keys, source)
+    return seen | _find_archived(conn, source, [key for key in keys if key is not None and key not in seen])
+
+def _find_archived(conn, source, keys):
+    """keys 중 source의 seen_ids에 해시로 남아 있는 값의 집합을 반환합니다."""
+    hashes = {id_hash(key): key for key in keys}
+    return {
+        hashes[row[0]]
+        for row in _select_in(conn, "SELECT id_hash FROM seen_ids WHERE source = ? AND id_hash IN ({placeholders})", hashes, (source,))
+    }
+
+def _sql_id_hash(value):
+    return id_hash(value) if value is not None else None
+
+def id_check(value):
+    """id_hash()가 같은 다른 문자열을 원래 문자열 없이 가려내는 32비트 검사값(CRC-32)을 반환합니다."""
+    return zlib.crc32(value.encode('utf-8'))
+
+def _sql_id_check(value):
+    return id_check(value) if value is not None else None
+
+def find_seen_hashed(conn, source, keys):
+    """keys 중 source가 이미 본 값(게시한 기사의 guid나 원본 URL)의 집합을 dedup_keys에서 조회합니다.
+
+    dedup_keys는 (source, key_hash) 기본 키와 검사값만 담은 좁은 WITHOUT ROWID 테이블이므로
+    한 번의 IN (...) 질의가 작은 B-tree 하나만 읽습니다.
+    해시가 같은데 검사값이 다르면(충돌) dedup_collisions에서 원래 문자열로 다시 확인하며,
+    검사값이 없는 행(예전 seen_ids에서 옮긴 해시)은 해시만으로 판단합니다.
+    """
+    keys = list(dict.fromkeys(key for key in keys if key is not None))
+    hashes = {}
+    for key in keys:
+        hashes.setdefault(id_hash(key), []).append(key)
+
+    seen = set()
+    collided = []
+    # 검사값은 해시가 일치한 후보만 계산합니다.
+    for key_hash, key_check in _select_in(
+        conn, "SELECT key_hash, key_check FROM dedup_keys WHERE source = ? AND key_hash IN ({placeholders})", hashes, (source,)
+    ):
+        for key in hashes[key_hash]:
+            if key_check is None or key_check == id_check(key):
+                seen.add(key)
+            else:
+                collided.append(key)
+    if collided:
+        seen.update(
+            row[0] for row in _select_in(conn, "SELECT key FROM dedup_collisions WHERE source = ? AND key IN ({placeholders})", collided, (source,))
+        )
+    logging.debug(f"dedup_keys 해시 조회: 후보 {len(keys)}개 중 {len(seen)}개 존재, 해시 충돌 {len(collided)}개")
+    return seen
+
+def save_dedup_keys(storage, source, keys):
+    """keys를 source가 본 값으로 dedup_keys에 기록하도록 저장 대기열에 넣습니다.
+
+    해시 키를 다른 값이 이미 쓰고 있으면(충돌) 그 값은 dedup_collisions에 원래 문자열로 남깁니다.
+    충돌 확인은 커밋할 때 대기열 순서대로 실행되므로 같은 배치에서 먼저 넣은 값과의 충돌도 잡아냅니다.
+    """
+    now = time.time()
+    for key in dict.fromkeys(key for key in keys if key is not None):
+        key_hash, key_check = id_hash(key), id_check(key)
+        storage.write(
+            "INSERT OR IGNORE INTO dedup_collisions (source, key) SELECT ?, ? WHERE EXISTS "
+            "(SELECT 1 FROM dedup_keys WHERE source = ? AND key_hash = ? AND key_check != ?)",
+            (source, key, source, key_hash, key_check)
+        )
+        storage.write(
+            "INSERT OR IGNORE INTO dedup_keys (source, key_hash, key_check, seen_at) VALUES (?, ?, ?, ?)",
+            (source, key_hash, key_check, now)
+        )
+
+def find_unseen(conn, source, table, column, keys):
+    """keys 중 source의 table.column과 seen_ids 어디에도 없는 값을 원래 순서대로 반환합니다."""
+    seen = find_seen(conn, source, table, column, keys)
+    return [key for key in keys if key not in seen]
+
+def save_related_articles(storage, source, guid, related_news):
+    """항목의 관련 기사 목록을 저장 대기열에 넣습니다. 같은 guid로 저장된 이전 목록은 바꿉니다.
+
+    관련 기사는 (source, guid, position)을 기본 키로 하는 related_articles에 한 행씩 저장하며,
+    기본 키 인덱스가 (source, guid)로 시작하므로 항목별 조회와 삭제도 이 인덱스를 씁니다.
+    """
+    storage.write("DELETE FROM related_articles WHERE source = ? AND guid = ?", (source, guid))
+    storage.write_many(
+        "INSERT INTO related_articles (source, guid, position, title, press, link) VALUES (?, ?, ?, ?, ?, ?)",
+        [(source, guid, position, news.get('title'), news.get('press'), news.get('link'))
+         for position, news in enumerate(related_news, 1)]
+    )
+
+def load_related_articles(conn, source, guid):
+    """항목의 관련 기사 목록을 저장한 순서대로 반환합니다."""
+    rows = conn.execute(
+        "SELECT title, press, link FROM related_articles WHERE source = ? AND guid = ? ORDER BY position", (source, guid)
+    ).fetchall()
+    return [dict(zip(RELATED_FIELDS, row)) for row in rows]
+
+def _decode_related_json(value):
+    try:
+        related_news = json.loads(value) if value else None
+    except ValueError:
+        return None
+    return related_news if isinstance(related_news, list) else None
+
+def migrate_wide_related_columns(conn, table="news_items"):
+    """예전 형식(related_news JSON 열과 related_*_N 열)의 관련 기사를 related_articles로 옮기고 table에서 그 열을 없앱니다.
+
+    JSON을 읽을 수 없는 행은 related_*_N 열 값을 씁니다. 열 삭제는 SQLite 버전과 상관없이 동작하도록
+    남길 열만으로 테이블을 다시 만들어 처리하며, 전체를 한 트랜잭션으로 실행합니다. 옮긴 관련 기사 수를 반환합니다.
+    (스키마 버전 2의 마이그레이션이므로 source 열이 생기기 전의 related_articles 형식을 씁니다.)
+    """
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    names = [column[1] for column in columns]
+    wide_columns = {}
+    for name in names:
+        match = WIDE_RELATED_COLUMN_PATTERN.match(name)
+        if match:
+            wide_columns.setdefault(int(match.group(2)), {})[match.group(1)] = name
+    if not wide_columns and 'related_news' not in names:
+        return 0
+
+    start_time = time.perf_counter()
+    select_columns = ['guid'] + [name for name in names if name == 'related_news' or WIDE_RELATED_COLUMN_PATTERN.match(name)]
+    rows = []
+    for values in conn.execute(f"SELECT {', '.join(select_columns)} FROM {table}"):
+        values = dict(zip(select_columns, values))
+        related_news = _decode_related_json(values.get('related_news'))
+        if related_news is None:
+            related_news = [
+                {field: values.get(wide_columns[position].get(field)) for field in RELATED_FIELDS}
+                for position in sorted(wide_columns)
+            ]
+            related_news = [news for news in related_news if any(news.values())]
+        rows.extend(
+            (values['guid'], position, news.get('title'), news.get('press'), news.get('link'))
+            for position, news in enumerate(related_news, 1)
+        )
+
+    kept = [column for column in columns if column[1] not in select_columns[1:]]
+    primary_key = [column[1] for column in sorted(kept, key=lambda column: column[5]) if column[5]]
+    definitions = [f"{column[1]} {column[2]}".strip() for column in kept]
+    if primary_key:
+        definitions.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+    kept_names = ', '.join(column[1] for column in kept)
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        conn.execute('''CREATE TABLE IF NOT EXISTS related_articles
+                        (guid TEXT NOT NULL,
+                         position INTEGER NOT NULL,
+                         title TEXT,
+                         press TEXT,
+                         link TEXT,
+                         PRIMARY KEY (guid, position)) WITHOUT ROWID''')
+        conn.executemany(
+            "INSERT OR REPLACE INTO related_articles (guid, position, title, press, link) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.execute(f"CREATE TABLE {table}_migrated ({', '.join(definitions)})")
+        conn.execute(f"INSERT INTO {table}_migrated ({kept_names}) SELECT {kept_names} FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_migrated RENAME TO {table}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    logging.info(
+        f"관련 기사 {len(rows)}개를 related_articles 테이블로 옮기고 {table}의 예전 열 {len(select_columns) - 1}개를 "
+        f"제거했습니다. ({(time.perf_counter() - start_time) * 1000:.0f}ms)"
+    )
+    return len(rows)
+
+def migrate_hashed_keys(conn, table="news_items", key_column="guid", hash_column="guid_hash", link_column="link", link_hash_column="link_hash"):
+    """문자열 기본 키(guid TEXT PRIMARY KEY + idx_guid)로 만든 table을 64비트 해시 기본 키로 다시 만듭니다.
+
+    새 테이블은 hash_column을 기본 키로 하는 WITHOUT ROWID 테이블이며, 인덱스 없는 key_column과 link_column의 해시인
+    link_hash_column을 가집니다.
+    해시가 겹쳐 들어가지 못한 행의 key는 dedup_collisions에 남깁니다.
+    이미 해시 키를 쓰는 테이블이면 아무것도 하지 않습니다. 옮긴 행 수를 반환합니다.
+    (스키마 버전 3의 마이그레이션이므로 source 열이 생기기 전의 형식을 씁니다.)
+    """
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    if not columns or hash_column in {column[1] for column in columns}:
+        return 0
+
+    start_time = time.perf_counter()
+    kept = [column for column in columns if column[1] != link_hash_column]
+    definitions = [f"{hash_column} INTEGER NOT NULL"]
+    definitions += [f"{column[1]} {column[2]}{' NOT NULL' if column[1] == key_column else ''}".strip() for column in kept]
+    definitions.append(f"{link_hash_column} INTEGER")
+    definitions.append(f"PRIMARY KEY ({hash_column})")
+    kept_names = ', '.join(column[1] for column in kept)
+
+    conn.create_function("id_hash", 1, _sql_id_hash)
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        conn.execute('''CREATE TABLE IF NOT EXISTS dedup_collisions
+                        (key TEXT PRIMARY KEY) WITHOUT ROWID''')
+        conn.execute(f"CREATE TABLE {table}_hashed ({', '.join(definitions)}) WITHOUT ROWID")
+        migrated = conn.execute(
+            f"INSERT OR IGNORE INTO {table}_hashed ({hash_column}, {kept_names}, {link_hash_column}) "
+            f"SELECT id_hash({key_column}), {kept_names}, id_hash({link_column}) FROM {table} WHERE {key_column} IS NOT NULL"
+        ).rowcount
+        collisions = conn.execute(
+            f"""INSERT OR IGNORE INTO dedup_collisions (key)
+                SELECT {key_column} FROM {table} AS old WHERE {key_column} IS NOT NULL AND NOT EXISTS
+                (SELECT 1 FROM {table}_hashed AS new WHERE new.{hash_column} = id_hash(old.{key_column}) AND new.{key_column} = old.{key_column})"""
+        ).rowcount
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_hashed RENAME TO {table}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    logging.info(
+        f"{table}의 {key_column} 문자열 키를 64비트 해시 키로 바꿨습니다. 행 {migrated}개, 해시 충돌 {collisions}개 "
+        f"({(time.perf_counter() - start_time) * 1000:.0f}ms)"
+    )
+    return migrated
+
+# 스키마 마이그레이션. 각 함수는 (conn, source)를 받아 테이블 구조를 보고 필요한 경우에만 바꾸므로 여러 번 실행해도 안전합니다.
+# source는 버전 기록이 없는 예전 DB(스크립트 하나가 쓰던 DB)의 행을 어느 소스의 기록으로 옮길지 정합니다.
+
+def _add_feed_state_hash_columns(conn, source):
+    columns = _table_columns(conn, "feed_state")
+    if columns and "content_hash" not in columns:
+        conn.execute("ALTER TABLE feed_state ADD COLUMN content_hash TEXT")
+    if columns and "unchanged_runs" not in columns:
+        conn.execute("ALTER TABLE feed_state ADD COLUMN unchanged_runs INTEGER DEFAULT 0")
+
+def _split_related_articles(conn, source):
+    migrate_wide_related_columns(conn, "news_items")
+
+def _hash_news_keys(conn, source):
+    migrate_hashed_keys(conn, "news_items")
+
+def _add_posted_at(conn, source):
+    """게시 시각 열이 없는 테이블에 열을 추가하고 기존 행은 지금 게시한 것으로 채웁니다. (보존 기간은 이때부터 셉니다)"""
+    for table in ("news_items", "videos"):
+        columns = _table_columns(conn, table)
+        if columns and "posted_at" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN posted_at REAL")
+            conn.execute(f"UPDATE {table} SET posted_at = ? WHERE posted_at IS NULL", (time.time(),))
+
+def _add_source_column(conn, source):
+    """소스별 테이블을 source 열과 (source, 키) 기본 키로 다시 만들고 기존 행을 source의 기록으로 옮깁니다.
+
+    videos의 예전 source 열(YouTube 모드)은 mode 열로 옮깁니다.
+    """
+    renamed = {"videos": {"mode": "source"}}
+    rebuilt = {}
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        for table in SOURCE_TABLES + ("feed_state",):
+            old_columns = _table_columns(conn, table)
+            renames = renamed.get(table, {})
+            if not old_columns or ("source" in old_columns and all(new in old_columns for new in renames)):
+                continue
+            conn.execute(f"CREATE TABLE {table}_rebuilt {TABLES[table]}")
+            targets, expressions = [], []
+            for column in _table_columns(conn, f"{table}_rebuilt"):
+                if column in renames:
+                    expression = renames[column]
+                elif column == "source":
+                    expression = "?"
+                elif column in old_columns:
+                    expression = column
+                else:
+                    continue
+                targets.append(column)
+                expressions.append(expression)
+            rebuilt[table] = conn.execute(
+                f"INSERT OR IGNORE INTO {table}_rebuilt ({', '.join(targets)}) SELECT {', '.join(expressions)} FROM {table}",
+                (source,)
+            ).rowcount
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {table}_rebuilt RENAME TO {table}")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    if rebuilt:
+        summary = ', '.join(f"{table} {rows}행" for table, rows in rebuilt.items())
+        logging.info(f"기존 기록을 소스 '{source}'의 기록으로 옮겼습니다. ({summary})")
+
+def _split_dedup_keys(conn, source):
+    """news_items의 guid와 원본 URL 해시를 좁은 dedup_keys 테이블로 옮기고 news_items에서 link_hash 열과 인덱스를 없앱니다.
+
+    seen_ids에 해시만 남은 id도 검사값 없이 옮기므로, 보존 기간이 지나 지운 기사도 계속 중복으로 판단합니다.
+    기록 시각(seen_at)은 게시 시각(없으면 지금)이나 seen_ids로 옮긴 시각으로 채웁니다.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "dedup_keys" in existing:
+        return
+    conn.create_function("id_hash", 1, _sql_id_hash)
+    conn.create_function("id_check", 1, _sql_id_check)
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"CREATE TABLE dedup_keys {TABLES['dedup_keys']}")
+        if "news_items" in existing:
+            for column in ("guid", "link"):
+                conn.execute(
+                    f"INSERT OR IGNORE INTO dedup_keys (source, key_hash, key_check, seen_at) "
+                    f"SELECT source, id_hash({column}), id_check({column}), COALESCE(posted_at, ?) FROM news_items "
+                    f"WHERE {column} IS NOT NULL",
+                    (time.time(),)
+                )
+            columns = [column for column in _table_columns(conn, "news_items") if column != "link_hash"]
+            conn.execute("DROP INDEX IF EXISTS idx_news_items_link_hash")
+            conn.execute(f"CREATE TABLE news_items_rebuilt {TABLES['news_items']}")
+            conn.execute(f"INSERT INTO news_items_rebuilt ({', '.join(columns)}) SELECT {', '.join(columns)} FROM news_items")
+            conn.execute("DROP TABLE news_items")
+            conn.execute("ALTER TABLE news_items_rebuilt RENAME TO news_items")
+        if "seen_ids" in existing:
+            conn.execute("INSERT OR IGNORE INTO dedup_keys (source, key_hash, seen_at) SELECT source, id_hash, archived_at FROM seen_ids")
+        keys = conn.execute("SELECT COUNT(*) FROM dedup_keys").fetchone()[0]
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    logging.info(f"중복 검사 키 {keys}개를 dedup_keys로 옮겼습니다.")
+
+# (버전, 설명, 함수) 목록. 새 마이그레이션은 항상 끝에 다음 번호로 추가합니다.
+MIGRATIONS = [
+    (1, "feed_state에 내용 해시 열 추가", _add_feed_state_hash_columns),
+    (2, "관련 기사를 related_articles 테이블로 분리", _split_related_articles),
+    (3, "news_items의 guid 키를 64비트 해시로 변경", _hash_news_keys),
+    (4, "게시 시각(posted_at) 열 추가", _add_posted_at),
+    (5, "source 열로 소스별 기록 구분", _add_source_column),
+    (6, "중복 검사 키를 dedup_keys 테이블로 분리", _split_dedup_keys),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate_schema(storage, source):
+    """DB를 현재 스키마로 맞추고 스키마 버전을 반환합니다.
+
+    schema_version 테이블에 적용한 마이그레이션의 버전을 기록하고, 기록된 버전보다 새 마이그레이션만 순서대로 실행합니다.
+    버전 기록이 없는 예전 DB는 버전 0으로 보고 모든 마이그레이션을 실행하며, 그 행은 source의 기록으로 옮깁니다.
+    기록을 담는 테이블이 하나도 없는 새 DB는 마이그레이션 없이 현재 스키마로 바로 만듭니다.
+    이 코드보다 새 버전의 DB이면 sqlite3.DatabaseError를 발생시킵니다.
+    """
+    conn = storage.conn
+    with storage.lock:
+        conn.execute('''CREATE TABLE IF NOT EXISTS schema_version
+                        (version INTEGER PRIMARY KEY,
+                         description TEXT,
+                         applied_at REAL NOT NULL)''')
+        version = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+        if version is None:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if not existing & set(TABLES):
+                create_tables(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (SCHEMA_VERSION, "새 DB", time.time())
+                )
+                logging.info(f"스키마 버전 {SCHEMA_VERSION}의 새 DB를 만들었습니다.")
+                return SCHEMA_VERSION
+            version = 0
+        if version > SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(f"DB 스키마 버전({version})이 이 코드가 아는 버전({SCHEMA_VERSION})보다 높습니다.")
+
+        for number, description, migrate in MIGRATIONS:
+            if number <= version:
+                continue
+            start_time = time.perf_counter()
+            migrate(conn, source)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (number, description, time.time())
+            )
+            logging.info(f"스키마 마이그레이션 {number} 적용 - {description} ({(time.perf_counter() - start_time) * 1000:.0f}ms)")
+        create_tables(conn)
+    return SCHEMA_VERSION
+
+def maintain_store(storage):
+    """세션에서 한 번만 무결성 검사, 보존 기간 정리, VACUUM을 합니다."""
+    with storage.lock:
+        if storage.maintained:
+            return
+        # 데이터베이스 무결성 검사 (체크섬이 같으면 생략, 다르면 빠른 검사, 주기적으로 전체 검사)
+        verify_integrity(storage)
+        # 보존 기간이 지난 기록은 지우고(뉴스의 중복 검사 키는 dedup_keys에 남아 있음), 더 긴 기간이 지난
+        # 중복 검사 키도 지운 뒤 주기적으로 VACUUM합니다.
+        apply_retention(storage, "news_items", "guid", child_tables=("related_articles",), archive_hashes=())
+        apply_retention(storage, "videos", "video_id")
+        prune_dedup_keys(storage)
+        vacuum_if_due(storage)
+        storage.maintained = True
+
+def init_store(storage, source, reset=False):
+    """source가 쓸 DB를 준비합니다.
+
+    스키마를 현재 버전으로 맞추고 세션의 첫 호출에서 관리 작업(maintain_store)을 합니다.
+    reset이면 source의 기록만 지우므로 같은 DB를 쓰는 다른 소스의 기록은 남습니다.
+    """
+    migrate_schema(storage, source)
+    maintain_store(storage)
+    if reset:
+        reset_source(storage, source)
+
+def reset_source(storage, source):
+    """소스별 테이블에서 source의 행을 모두 지우고 지운 행 수를 반환합니다."""
+    conn = storage.conn
+    with storage.lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = sum(conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,)).rowcount for table in SOURCE_TABLES)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    logging.info(f"소스 '{source}'의 기록 {deleted}행을 삭제했습니다. ({', '.join(SOURCE_TABLES)})")
+    return deleted
+
+def merge_db(storage, path, source):
+    """다른 DB 파일(예: 구독별로 따로 쓰던 DB)의 기록을 source의 기록으로 storage의 DB에 옮깁니다.
+
+    path의 DB를 먼저 현재 스키마로 맞춘 뒤 ATTACH하여 소스별 테이블과 feed_state를 복사합니다.
+    옮긴 파일은 maintenance 테이블에 기록하여 다시 옮기지 않으며, 원래 파일은 지우지 않습니다. 옮긴 행 수를 반환합니다.
+    """
+    task = f"merge:{os.path.basename(path)}"
+    conn = storage.conn
+    with storage.lock:
+        if not os.path.exists(path) or conn.execute("SELECT 1 FROM maintenance WHERE task = ?", (task,)).fetchone():
+            return 0
+        other = StorageSession(path)
+        try:
+            migrate_schema(other, source)
+        finally:
+            other.close()
+
+        start_time = time.perf_counter()
+        merged = 0
+        conn.execute("ATTACH DATABASE ? AS merged", (path,))
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for table in SOURCE_TABLES + ("feed_state",):
+                    columns = [column for column in _table_columns(conn, table, "merged") if column != "source"]
+                    names = ', '.join(columns)
+                    merged += conn.execute(
+                        f"INSERT OR IGNORE INTO main.{table} (source, {names}) SELECT ?, {names} FROM merged.{table}", (source,)
+                    ).rowcount
+                conn.execute("INSERT OR REPLACE INTO maintenance (task, last_run) VALUES (?, ?)", (task, time.time()))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute("DETACH DATABASE merged")
+    logging.info(
+        f"{path}의 기록 {merged}행을 소스 '{source}'의 기록으로 {os.path.basename(storage.db_path)}에 옮겼습니다. "
+        f"({(time.perf_counter() - start_time) * 1000:.0f}ms)"
+    )
+    return merged
+
+def _task_due(conn, task, days, now):
+    if days <= 0:
+        return False
+    row = conn.execute("SELECT last_run FROM maintenance WHERE task = ?", (task,)).fetchone()
+    return row is None or now - row[0] >= days * 86400
+
+def _db_size(conn):
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def apply_retention(storage, table, column, child_tables=(), archive_hashes=None, retention_days=HISTORY_RETENTION_DAYS):
+    """보존 기간이 지난 행을 정리하고 정리한 행 수를 반환합니다.
+
+    posted_at이 retention_days보다 오래된 행은 archive_hashes(해시를 구하는 SQL 식 목록, 기본값은 column 값의 해시)를
+    행의 source와 함께 seen_ids에 남기고 table과 child_tables(같은 source와 column으로 연결된 테이블)에서 지웁니다.
+    중복 검사는 find_seen()으로 두 곳을 함께 봅니다. 중복 검사 키를 따로 두는 테이블(news_items와 dedup_keys)은
+    archive_hashes=()로 해시를 남기지 않고 지우기만 합니다.
+    """
+    if retention_days <= 0:
+        return 0
+    conn = storage.conn
+    now = time.time()
+    cutoff = now - retention_days * 86400
+    with storage.lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for expression in archive_hashes if archive_hashes is not None else (f"id_hash({column})",):
+                conn.execute(
+                    f"INSERT OR IGNORE INTO seen_ids (source, id_hash, archived_at) SELECT source, {expression}, ? FROM {table} "
+                    f"WHERE posted_at < ? AND {expression} IS NOT NULL",
+                    (now, cutoff)
+                )
+            for child_table in child_tables:
+                conn.execute(
+                    f"DELETE FROM {child_table} WHERE (source, {column}) IN "
+                    f"(SELECT source, {column} FROM {table} WHERE posted_at < ?)", (cutoff,)
+                )
+            archived = conn.execute(f"DELETE FROM {table} WHERE posted_at < ?", (cutoff,)).rowcount
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    if archived:
+        target = "지웠습니다" if archive_hashes == () else "seen_ids 해시로 옮겼습니다"
+        logging.info(f"보존 기간 정리 - {retention_days:g}일이 지난 {table} 행 {archived}개를 {target}.")
+    return archived
+
+def prune_dedup_keys(storage, retention_days=DEDUP_RETENTION_DAYS):
+    """dedup_keys에서 기록한 지 retention_days일이 지난 중복 검사 키를 지우고 지운 키 수를 반환합니다.
+
+    seen_at에 인덱스를 두지 않고 좁은 테이블을 한 번 훑어 지우므로, 매 실행이 아니라 마지막 정리 후 하루가
+    지났을 때만 실행합니다. 시각은 maintenance 테이블에 기록합니다.
+    """
+    if retention_days <= 0:
+        return 0
+    conn = storage.conn
+    now = time.time()
+    with storage.lock:
+        if not _task_due(conn, "prune_dedup_keys", 1, now):
+            return 0
+        start_time = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            pruned = conn.execute("DELETE FROM dedup_keys WHERE seen_at < ?", (now - retention_days * 86400,)).rowcount
+            remaining = conn.execute("SELECT COUNT(*) FROM dedup_keys").fetchone()[0]
+            conn.execute("INSERT OR REPLACE INTO maintenance (task, last_run) VALUES ('prune_dedup_keys', ?)", (now,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    logging.info(
+        f"중복 검사 키 정리 - {retention_days:g}일이 지난 키 {pruned}개 삭제, 남은 키 {remaining}개 "
+        f"({(time.perf_counter() - start_time) * 1000:.0f}ms)"
+    )
+    return pruned
+
+def vacuum_if_due(storage, vacuum_days=DB_VACUUM_DAYS):
+    """마지막 VACUUM 후 vacuum_days일이 지났으면 VACUUM으로 DB 파일을 줄입니다. 시각은 maintenance 테이블에 기록합니다."""
+    conn = storage.conn
+    now = time.time()
+    with storage.lock:
+        # 빈 페이지가 없으면 VACUUM해도 줄어들 것이 없으므로 다음 실행에서 다시 확인합니다.
+        if not _task_due(conn, "vacuum", vacuum_days, now) or not conn.execute("PRAGMA freelist_count").fetchone()[0]:
+            return
+        start_time = time.perf_counter()
+        size_before = _db_size(conn)
+        conn.execute("VACUUM")
+        size_after = _db_size(conn)
+        conn.execute("INSERT OR REPLACE INTO maintenance (task, last_run) VALUES ('vacuum', ?)", (now,))
+    logging.info(
+        f"VACUUM 완료 - {size_before / 1024:.0f}KB → {size_after / 1024:.0f}KB "
+        f"({(size_before - size_after) / 1024:.0f}KB 절약, {(time.perf_counter() - start_time) * 1000:.0f}ms)"
+    )
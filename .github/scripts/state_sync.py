@@ -0,0 +1,389 @@
+"""상태 DB 증분 동기화: 실행마다 DB 파일 전체 대신 이번 실행의 변경 내역(저널)만 아티팩트로 올립니다.
+
+사용법:
+  python .github/scripts/state_sync.py download 아티팩트_접두사 동기화_디렉터리
+      GitHub Actions 아티팩트에서 최신 기준 스냅샷과 그 이후 저널을 받아 동기화 디렉터리에 풉니다.
+      (GITHUB_TOKEN, GITHUB_REPOSITORY 환경 변수 필요. 받았으면 GITHUB_OUTPUT에 result=true를 씁니다)
+  python .github/scripts/state_sync.py restore 동기화_디렉터리 DB_디렉터리
+      동기화 디렉터리의 DB별 최신 기준 스냅샷을 풀고 그 스냅샷 이후의 저널을 순서대로 적용합니다.
+  python .github/scripts/state_sync.py export 출력_디렉터리 DB_경로...
+      이번 실행의 변경 내역을 저널 파일로 쓰거나, 압축할 때가 되었으면 새 기준 스냅샷을 씁니다.
+  python .github/scripts/state_sync.py uninstall DB_경로...
+      변경 기록 트리거를 지웁니다. 저널 모드를 끄고 DB 파일 전체를 올리는 방식으로 돌아갈 때 한 번 실행합니다.
+
+동기화 파일 (DB 파일 이름이 google_news_top.db인 경우):
+  google_news_top.db.base.<기준 ID>.db.gz                 gzip으로 압축한 SQLite 기준 스냅샷
+  google_news_top.db.journal.<기준 ID>.<시각>.jsonl.gz    기준 스냅샷 이후 실행 하나의 삽입/삭제 기록
+
+변경 내역은 DB에 설치한 트리거가 sync_journal 테이블에 기록하므로, 링크 캐시처럼 다른 연결로 쓴 변경도 남습니다.
+실행 도중 테이블 구조가 바뀌면(마이그레이션, 새 테이블) 저널로 옮길 수 없으므로 그 실행은 새 기준 스냅샷을 씁니다.
+
+복원 비용: 올리는 양은 실행마다 변경분으로 줄지만, 복원은 여전히 기준 스냅샷 전체를 풀고 그 이후 저널을 모두
+적용합니다. 기준 스냅샷은 보존 기간(HISTORY_RETENTION_DAYS) 안의 기록 크기에 비례하고, 적용할 저널 수는
+압축 주기(STATE_SYNC_COMPACT_JOURNALS, STATE_SYNC_COMPACT_DAYS)로 제한됩니다. 두 값을 모두 0으로 하면
+저널이 끝없이 쌓여 복원 시간이 실행 횟수에 비례하므로 적어도 하나는 켜 두어야 합니다.
+"""
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+import zipfile
+import logging
+import requests
+
+from state_store import save_db_checksum
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 저널이 이 개수만큼 쌓이거나 기준 스냅샷이 이 기간(일)보다 오래되면 새 기준 스냅샷을 씁니다.
+# 복원은 기준 스냅샷 하나와 저널 최대 STATE_SYNC_COMPACT_JOURNALS개만 적용하며, 기본값으로는 실행이 잦은 워크플로(30분 주기)도
+# 적용할 저널이 하루치(48개)를 넘지 않습니다. 스냅샷은 아티팩트 보존 기간 안에 다시 써야 합니다.
+STATE_SYNC_COMPACT_JOURNALS = int(os.environ.get('STATE_SYNC_COMPACT_JOURNALS') or '48')
+STATE_SYNC_COMPACT_DAYS = float(os.environ.get('STATE_SYNC_COMPACT_DAYS') or '1')
+
+# 아티팩트를 받을 GitHub API 주소 (GitHub Enterprise에서는 러너가 GITHUB_API_URL을 넣어 줍니다)
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL') or 'https://api.github.com'
+ARTIFACTS_PER_PAGE = 100
+
+BASE_PATTERN = re.compile(r'(?P<db>.+)\.base\.(?P<base>\d+)\.db\.gz$')
+JOURNAL_PATTERN = re.compile(r'(?P<db>.+)\.journal\.(?P<base>\d+)\.(?P<stamp>\d+)\.jsonl\.gz$')
+
+# 동기화에 쓰는 테이블과 트리거의 이름 접두사 (이 테이블들의 변경은 기록하지 않습니다)
+SYNC_PREFIX = 'sync_'
+TRIGGER_PREFIX = 'sync_journal_'
+
+def _stamp():
+    return str(int(time.time() * 1000))
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _tables(conn):
+    """변경을 기록할 테이블 목록을 반환합니다. (SQLite 내부 테이블과 동기화 테이블 제외)"""
+    return [
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        if not row[0].startswith('sqlite_') and not row[0].startswith(SYNC_PREFIX)
+    ]
+
+def _key_columns(conn, table):
+    """행을 가리키는 키 열 목록을 반환합니다. 기본 키가 없는 테이블은 rowid를 씁니다."""
+    columns = conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+    keys = [column[1] for column in sorted(columns, key=lambda column: column[5]) if column[5]]
+    return keys or ['rowid']
+
+def schema_fingerprint(conn):
+    """테이블과 인덱스 정의의 해시를 반환합니다. 저널은 같은 구조의 DB에만 적용할 수 있습니다."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name, sql in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'index') AND sql IS NOT NULL ORDER BY name"
+    ):
+        if not name.startswith(SYNC_PREFIX):
+            digest.update(f"{name}\0{sql}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+def _read_meta(conn):
+    try:
+        return dict(conn.execute("SELECT key, value FROM sync_meta").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+
+def _write_meta(conn, **values):
+    conn.execute("CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT OR REPLACE INTO sync_meta (key, value) VALUES (?, ?)", [(key, str(value)) for key, value in values.items()])
+
+def install_journal(conn):
+    """모든 테이블에 변경 기록 트리거를 (다시) 설치합니다.
+
+    삽입은 행 전체, 삭제는 키 열만 JSON으로 sync_journal에 남기며, 수정은 이전 키의 삭제와 새 행의 삽입으로 기록합니다.
+    INSERT OR REPLACE로 바뀐 행도 삽입으로 기록되고, 복원할 때도 INSERT OR REPLACE로 적용하므로 결과가 같습니다.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS sync_journal
+                    (seq INTEGER PRIMARY KEY,
+                     tbl TEXT NOT NULL,
+                     op TEXT NOT NULL,
+                     data TEXT NOT NULL)''')
+    uninstall_journal(conn)
+    for table in _tables(conn):
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+        keys = _key_columns(conn, table)
+        if 'rowid' in keys:
+            columns = ['rowid'] + columns
+        new_row = ', '.join(f"'{column}', NEW.{_quote(column)}" for column in columns)
+        old_key = ', '.join(f"'{column}', OLD.{_quote(column)}" for column in keys)
+        name = table.replace('"', '')
+        conn.execute(
+            f"CREATE TRIGGER {_quote(TRIGGER_PREFIX + name + '_insert')} AFTER INSERT ON {_quote(table)} BEGIN "
+            f"INSERT INTO sync_journal (tbl, op, data) VALUES ('{name}', 'I', json_object({new_row})); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {_quote(TRIGGER_PREFIX + name + '_update')} AFTER UPDATE ON {_quote(table)} BEGIN "
+            f"INSERT INTO sync_journal (tbl, op, data) VALUES ('{name}', 'D', json_object({old_key})); "
+            f"INSERT INTO sync_journal (tbl, op, data) VALUES ('{name}', 'I', json_object({new_row})); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {_quote(TRIGGER_PREFIX + name + '_delete')} AFTER DELETE ON {_quote(table)} BEGIN "
+            f"INSERT INTO sync_journal (tbl, op, data) VALUES ('{name}', 'D', json_object({old_key})); END"
+        )
+
+def uninstall_journal(conn):
+    """변경 기록 트리거를 모두 지웁니다."""
+    triggers = [
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        if row[0].startswith(TRIGGER_PREFIX)
+    ]
+    for trigger in triggers:
+        conn.execute(f"DROP TRIGGER IF EXISTS {_quote(trigger)}")
+    return len(triggers)
+
+def apply_journal(conn, path):
+    """저널 파일 하나를 한 트랜잭션으로 적용하고 적용한 변경 수를 반환합니다."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('schema') != schema_fingerprint(conn):
+            raise ValueError(f"저널의 테이블 구조가 기준 스냅샷과 다릅니다: {os.path.basename(path)}")
+        changes = 0
+        conn.execute("BEGIN")
+        try:
+            for line in f:
+                table, op, data = json.loads(line)
+                columns = list(data)
+                if op == 'I':
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {_quote(table)} ({', '.join(map(_quote, columns))}) "
+                        f"VALUES ({', '.join('?' * len(columns))})",
+                        [data[column] for column in columns]
+                    )
+                else:
+                    conn.execute(
+                        f"DELETE FROM {_quote(table)} WHERE {' AND '.join(f'{_quote(column)} IS ?' for column in columns)}",
+                        [data[column] for column in columns]
+                    )
+                changes += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return changes
+
+def restore(sync_dir, db_dir):
+    """sync_dir의 DB별 최신 기준 스냅샷과 그 이후 저널로 db_dir에 DB를 복원합니다. 복원한 DB 경로 목록을 반환합니다.
+
+    복원한 DB에는 변경 기록 트리거를 설치하고, 다음 무결성 검사가 체크섬 비교로 끝나도록 체크섬을 기록합니다.
+    """
+    bases = {}
+    journals = {}
+    for name in os.listdir(sync_dir) if os.path.isdir(sync_dir) else []:
+        match = BASE_PATTERN.match(name)
+        if match:
+            if match.group('base') > bases.get(match.group('db'), ('',))[0]:
+                bases[match.group('db')] = (match.group('base'), name)
+            continue
+        match = JOURNAL_PATTERN.match(name)
+        if match:
+            journals.setdefault((match.group('db'), match.group('base')), []).append((match.group('stamp'), name))
+
+    restored = []
+    for db_name, (base_id, base_name) in sorted(bases.items()):
+        start_time = time.perf_counter()
+        db_path = os.path.join(db_dir, db_name)
+        os.makedirs(db_dir or '.', exist_ok=True)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        with gzip.open(os.path.join(sync_dir, base_name), 'rb') as source, open(db_path, 'wb') as target:
+            shutil.copyfileobj(source, target, 1 << 20)
+
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            changes = 0
+            applied = sorted(journals.get((db_name, base_id), []))
+            for _, journal_name in applied:
+                changes += apply_journal(conn, os.path.join(sync_dir, journal_name))
+            install_journal(conn)
+            conn.execute("DELETE FROM sync_journal")
+            _write_meta(conn, base=base_id, journals=len(applied), schema=schema_fingerprint(conn))
+        finally:
+            conn.close()
+        save_db_checksum(db_path)
+        restored.append(db_path)
+        logging.info(
+            f"{db_name} 복원 완료 - 기준 스냅샷 {base_id}, 저널 {len(applied)}개(변경 {changes}건), "
+            f"{os.path.getsize(db_path) / 1024:.0f}KB, {(time.perf_counter() - start_time) * 1000:.0f}ms"
+        )
+    return restored
+
+def _list_artifacts(session, name, since=''):
+    """이름이 name인 만료되지 않은 아티팩트를 최신순으로 반환합니다.
+
+    since(ISO 8601 시각)를 주면 그보다 오래된 아티팩트가 나올 때까지 다음 페이지도 읽습니다.
+    """
+    url = f"{GITHUB_API_URL}/repos/{os.environ['GITHUB_REPOSITORY']}/actions/artifacts"
+    artifacts = []
+    page = 1
+    while True:
+        response = session.get(url, params={'name': name, 'per_page': ARTIFACTS_PER_PAGE, 'page': page}, timeout=30)
+        response.raise_for_status()
+        batch = response.json()['artifacts']
+        artifacts.extend(artifact for artifact in batch if not artifact['expired'])
+        if len(batch) < ARTIFACTS_PER_PAGE or not since or min(artifact['created_at'] for artifact in batch) < since:
+            break
+        page += 1
+    return sorted(artifacts, key=lambda artifact: artifact['created_at'], reverse=True)
+
+def download(prefix, sync_dir):
+    """prefix의 최신 기준 스냅샷(<prefix>_state_base)과 그 이후 저널(<prefix>_state_journal) 아티팩트를 받아 sync_dir에 풉니다.
+
+    기준 스냅샷이 없거나 가장 최근 상태가 DB 파일 전체 아티팩트(<prefix>_database)이면 아무것도 받지 않고
+    False를 반환합니다. 그때는 워크플로의 기존 단계가 DB 파일 전체를 받습니다.
+    """
+    start_time = time.perf_counter()
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f"Bearer {os.environ['GITHUB_TOKEN']}",
+        'Accept': 'application/vnd.github+json',
+    })
+    try:
+        bases = _list_artifacts(session, f"{prefix}_state_base")
+        if not bases:
+            logging.info(f"{prefix}: 기준 스냅샷 아티팩트가 없습니다.")
+            return False
+        base = bases[0]
+        journals = [
+            artifact for artifact in _list_artifacts(session, f"{prefix}_state_journal", base['created_at'])
+            if artifact['created_at'] >= base['created_at']
+        ]
+        latest = max(artifact['created_at'] for artifact in [base] + journals)
+        full = _list_artifacts(session, f"{prefix}_database")
+        if full and full[0]['created_at'] > latest:
+            logging.info(f"{prefix}: 가장 최근 상태가 DB 파일 전체 아티팩트입니다. ({full[0]['created_at']})")
+            return False
+
+        os.makedirs(sync_dir, exist_ok=True)
+        size = 0
+        for artifact in [base] + journals:
+            response = session.get(artifact['archive_download_url'], timeout=120)
+            response.raise_for_status()
+            size += len(response.content)
+            with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+                archive.extractall(sync_dir)
+    finally:
+        session.close()
+    logging.info(
+        f"{prefix}: 기준 스냅샷 {base['created_at']}와 저널 {len(journals)}개를 받았습니다. "
+        f"({size / 1024:.0f}KB, {(time.perf_counter() - start_time) * 1000:.0f}ms)"
+    )
+    return True
+
+def _set_output(name, value):
+    """GitHub Actions 단계 출력을 씁니다. (GITHUB_OUTPUT이 없으면 표준 출력에 씁니다)"""
+    output = os.environ.get('GITHUB_OUTPUT')
+    if output:
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(f"{name}={value}\n")
+    else:
+        print(f"{name}={value}")
+
+def _write_base(conn, db_path, out_dir, base_id):
+    db_name = os.path.basename(db_path)
+    snapshot = os.path.join(out_dir, f"{db_name}.snapshot")
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    conn.execute("VACUUM INTO ?", (snapshot,))
+    target = os.path.join(out_dir, f"{db_name}.base.{base_id}.db.gz")
+    with open(snapshot, 'rb') as source, gzip.open(target, 'wb') as compressed:
+        shutil.copyfileobj(source, compressed, 1 << 20)
+    os.remove(snapshot)
+    return target
+
+def export(db_path, out_dir, compact_journals=STATE_SYNC_COMPACT_JOURNALS, compact_days=STATE_SYNC_COMPACT_DAYS):
+    """이번 실행에서 db_path에 생긴 변경을 out_dir에 저널 파일로 쓰고 그 경로를 반환합니다.
+
+    기준 스냅샷이 없거나(첫 실행, 초기화 모드), 실행 중 테이블 구조가 바뀌었거나, 저널이 compact_journals개
+    쌓였거나, 기준 스냅샷이 compact_days일보다 오래되었으면 저널 대신 새 기준 스냅샷을 씁니다.
+    바뀐 것이 없으면 아무것도 쓰지 않고 None을 반환합니다.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    db_name = os.path.basename(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        meta = _read_meta(conn)
+        schema = schema_fingerprint(conn)
+        journal_count = int(meta.get('journals', 0))
+        reason = None
+        if 'base' not in meta:
+            reason = "기준 스냅샷 없음"
+        elif meta.get('schema') != schema:
+            reason = "테이블 구조 변경"
+        elif compact_journals > 0 and journal_count >= compact_journals:
+            reason = f"저널 {journal_count}개"
+        elif compact_days > 0 and time.time() - int(meta['base']) / 1000 >= compact_days * 86400:
+            reason = f"기준 스냅샷이 {compact_days:g}일 경과"
+
+        start_time = time.perf_counter()
+        if reason:
+            base_id = _stamp()
+            install_journal(conn)
+            conn.execute("DELETE FROM sync_journal")
+            _write_meta(conn, base=base_id, journals=0, schema=schema)
+            path = _write_base(conn, db_path, out_dir, base_id)
+            logging.info(
+                f"{db_name} 기준 스냅샷 작성 ({reason}) - {os.path.getsize(db_path) / 1024:.0f}KB → "
+                f"{os.path.getsize(path) / 1024:.0f}KB, {(time.perf_counter() - start_time) * 1000:.0f}ms"
+            )
+            return path
+
+        rows = conn.execute("SELECT tbl, op, data FROM sync_journal ORDER BY seq").fetchall()
+        if not rows:
+            logging.info(f"{db_name} 변경 없음 - 저널을 쓰지 않습니다.")
+            return None
+        path = os.path.join(out_dir, f"{db_name}.journal.{meta['base']}.{_stamp()}.jsonl.gz")
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'base': meta['base'], 'schema': schema, 'created_at': time.time()}) + '\n')
+            for table, op, data in rows:
+                f.write(json.dumps([table, op, json.loads(data)], ensure_ascii=False) + '\n')
+        conn.execute("DELETE FROM sync_journal")
+        _write_meta(conn, journals=journal_count + 1)
+        logging.info(
+            f"{db_name} 저널 작성 - 변경 {len(rows)}건, {os.path.getsize(path) / 1024:.1f}KB "
+            f"(DB {os.path.getsize(db_path) / 1024:.0f}KB), {(time.perf_counter() - start_time) * 1000:.0f}ms"
+        )
+        return path
+    finally:
+        conn.close()
+
+def main(argv):
+    if len(argv) >= 3 and argv[0] == 'download':
+        _set_output('result', 'true' if download(argv[1], argv[2]) else 'false')
+    elif len(argv) >= 3 and argv[0] == 'restore':
+        restore(argv[1], argv[2])
+    elif len(argv) >= 3 and argv[0] == 'export':
+        for db_path in argv[2:]:
+            if os.path.exists(db_path):
+                export(db_path, argv[1])
+    elif len(argv) >= 2 and argv[0] == 'uninstall':
+        for db_path in argv[1:]:
+            conn = sqlite3.connect(db_path, isolation_level=None)
+            try:
+                logging.info(f"{db_path}: 변경 기록 트리거 {uninstall_journal(conn)}개 삭제")
+                conn.execute("DROP TABLE IF EXISTS sync_journal")
+                conn.execute("DROP TABLE IF EXISTS sync_meta")
+            finally:
+                conn.close()
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except Exception as e:
+        logging.error(f"오류 발생: {e}", exc_info=True)
+        sys.exit(1)  # 오류 발생 시 비정상 종료
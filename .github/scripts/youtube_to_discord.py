@@ -1,5 +1,4 @@
 import os
-import requests
 import html
 import time
 import sqlite3
@@ -9,6 +8,9 @@ from datetime import datetime, timezone, timedelta
 import logging
 import re
 import json
+from feed_snapshot import execute_request
+from http_client import get_session, close_session
+from state_store import StorageSession, STATE_DB_PATH, find_seen, migrate_schema, init_store
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -33,8 +35,13 @@ DISCORD_USERNAME_YOUTUBE = os.getenv('DISCORD_USERNAME_YOUTUBE', '').strip()
 LANGUAGE_YOUTUBE = os.getenv('LANGUAGE_YOUTUBE', 'English')
 YOUTUBE_DETAILVIEW = os.getenv('YOUTUBE_DETAILVIEW', 'false').lower() == 'true'
 
-# DB 설정
-DB_PATH = 'youtube_videos.db'
+# DB 설정 (STATE_DB_PATH를 지정하면 다른 스크립트와 같은 DB 파일을 씁니다)
+DB_PATH = STATE_DB_PATH or 'youtube_videos.db'
+# DB에서 이 스크립트의 기록을 구분하는 이름
+SOURCE = 'youtube'
+
+# 실행 동안 쓰는 DB 연결과 쓰기 대기열 (__main__에서 초기화)
+storage = None
 
 def check_env_variables():
     required_vars = ['YOUTUBE_API_KEY', 'YOUTUBE_MODE', 'DISCORD_WEBHOOK_YOUTUBE']
@@ -56,78 +63,42 @@ def check_env_variables():
             raise ValueError("YOUTUBE_MODE가 'search'일 때 YOUTUBE_SEARCH_KEYWORD는 필수입니다.")
 
 def init_db(reset=False):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    if reset:
-        c.execute("DROP TABLE IF EXISTS videos")
-        logging.info("기존 videos 테이블 삭제됨")
-    c.execute('''CREATE TABLE IF NOT EXISTS videos
-                 (published_at TEXT,
-                  channel_title TEXT,
-                  channel_id TEXT,
-                  title TEXT,
-                  video_id TEXT PRIMARY KEY,
-                  video_url TEXT,
-                  description TEXT,
-                  category_id TEXT,
-                  category_name TEXT,
-                  duration TEXT,
-                  thumbnail_url TEXT,
-                  tags TEXT,
-                  live_broadcast_content TEXT,
-                  scheduled_start_time TEXT,
-                  caption TEXT,
-                  source TEXT)''')
-    conn.commit()
-    conn.close()
+    """스키마와 관리 작업은 state_store.init_store가 맡으며, 초기화 모드에서는 이 소스(SOURCE)의 기록만 지웁니다."""
+    init_store(storage, SOURCE, reset=reset)
     logging.info("데이터베이스 초기화 완료")
 
 def save_video(video_data):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''INSERT OR REPLACE INTO videos 
-                 (published_at, channel_title, channel_id, title, video_id, video_url, description, 
-                 category_id, category_name, duration, thumbnail_url, tags, live_broadcast_content, 
-                 scheduled_start_time, caption, source) 
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
-              (video_data['published_at'], video_data['channel_title'], video_data['channel_id'], 
-               video_data['title'], video_data['video_id'], video_data['video_url'], 
-               video_data['description'], video_data['category_id'], video_data['category_name'], 
-               video_data['duration'], video_data['thumbnail_url'], video_data['tags'], 
-               video_data['live_broadcast_content'], video_data['scheduled_start_time'], 
-               video_data['caption'], video_data['source']))
-    conn.commit()
-    conn.close()
+    """비디오 기록을 저장 대기열에 넣습니다. 기록은 게시를 마친 뒤 storage가 모아서 커밋합니다."""
+    storage.write('''INSERT OR REPLACE INTO videos 
+                     (source, published_at, channel_title, channel_id, title, video_id, video_url, description, 
+                     category_id, category_name, duration, thumbnail_url, tags, live_broadcast_content, 
+                     scheduled_start_time, caption, mode, posted_at) 
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
+                  (SOURCE, video_data['published_at'], video_data['channel_title'], video_data['channel_id'], 
+                   video_data['title'], video_data['video_id'], video_data['video_url'], 
+                   video_data['description'], video_data['category_id'], video_data['category_name'], 
+                   video_data['duration'], video_data['thumbnail_url'], video_data['tags'], 
+                   video_data['live_broadcast_content'], video_data['scheduled_start_time'], 
+                   video_data['caption'], video_data['mode'], time.time()))
     logging.info(f"새 비디오 저장됨: {video_data['video_id']}")
 
 def load_videos():
-    if not os.path.exists(DB_PATH):
-        logging.info("데이터베이스 파일이 존재하지 않습니다. 새로 생성합니다.")
-        init_db()
-        return []
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
     try:
-        c.execute("SELECT * FROM videos ORDER BY published_at DESC")
-        rows = c.fetchall()
+        rows = storage.conn.execute("SELECT * FROM videos WHERE source = ? ORDER BY published_at DESC", (SOURCE,)).fetchall()
     except sqlite3.OperationalError:
         logging.info("테이블이 존재하지 않습니다. 새로 생성합니다.")
-        conn.close()
         init_db()
         return []
-    finally:
-        conn.close()
     
     logging.info(f"저장된 비디오 수: {len(rows)}")
     return rows
 
 def get_channel_thumbnail(youtube, channel_id):
     try:
-        response = youtube.channels().list(
+        response = execute_request(youtube.channels().list(
             part="snippet",
             id=channel_id
-        ).execute()
+        ))
         return response['items'][0]['snippet']['thumbnails']['default']['url']
     except Exception as e:
         logging.error(f"채널 썸네일을 가져오는 데 실패했습니다: {e}")
@@ -209,7 +180,7 @@ def post_to_discord(message, is_embed=False, is_detail=False):
     
     webhook_url = DISCORD_WEBHOOK_YOUTUBE_DETAILVIEW if is_detail and DISCORD_WEBHOOK_YOUTUBE_DETAILVIEW else DISCORD_WEBHOOK_YOUTUBE
     
-    response = requests.post(webhook_url, json=payload, headers=headers)
+    response = get_session().post(webhook_url, json=payload, headers=headers)
     if response.status_code != 204:
         logging.error(f"Discord에 메시지를 게시하는 데 실패했습니다. 상태 코드: {response.status_code}")
         logging.error(response.text)
@@ -320,7 +291,7 @@ def get_category_name(youtube, category_id):
     if category_id in category_cache:
         return category_cache[category_id]
     
-    categories = youtube.videoCategories().list(part="snippet", regionCode="US").execute()
+    categories = execute_request(youtube.videoCategories().list(part="snippet", regionCode="US"))
     for category in categories['items']:
         category_cache[category['id']] = category['snippet']['title']
         if category['id'] == category_id:
@@ -328,10 +299,10 @@ def get_category_name(youtube, category_id):
     return "Unknown"
 
 def fetch_playlist_info(youtube, playlist_id):
-    playlist_response = youtube.playlists().list(
+    playlist_response = execute_request(youtube.playlists().list(
         part="snippet",
         id=playlist_id
-    ).execute()
+    ))
     
     if 'items' in playlist_response and playlist_response['items']:
         playlist_info = playlist_response['items'][0]['snippet']
@@ -343,13 +314,13 @@ def fetch_playlist_info(youtube, playlist_id):
 
 def fetch_videos(youtube, mode, channel_id, playlist_id, search_keyword):
     if mode == 'channels':
-        response = youtube.search().list(
+        response = execute_request(youtube.search().list(
             channelId=channel_id,
             order='date',
             type='video',
             part='snippet,id',
             maxResults=INIT_MAX_RESULTS if IS_FIRST_RUN or INITIALIZE_MODE_YOUTUBE else MAX_RESULTS
-        ).execute()
+        ))
         return [(item['id']['videoId'], item['snippet']) for item in response.get('items', [])]
     elif mode == 'playlists':
         playlist_items = []
@@ -362,7 +333,7 @@ def fetch_videos(youtube, mode, channel_id, playlist_id, search_keyword):
                 maxResults=50,
                 pageToken=next_page_token
             )
-            playlist_response = playlist_request.execute()
+            playlist_response = execute_request(playlist_request)
             
             playlist_items.extend(playlist_response['items'])
             
@@ -387,13 +358,13 @@ def fetch_videos(youtube, mode, channel_id, playlist_id, search_keyword):
         
         return [(item['snippet']['resourceId']['videoId'], item['snippet']) for item in playlist_items]
     elif mode == 'search':
-        response = youtube.search().list(
+        response = execute_request(youtube.search().list(
             q=search_keyword,
             order='date',
             type='video',
             part='snippet,id',
             maxResults=INIT_MAX_RESULTS if IS_FIRST_RUN or INITIALIZE_MODE_YOUTUBE else MAX_RESULTS
-        ).execute()
+        ))
         return [(item['id']['videoId'], item['snippet']) for item in response.get('items', [])]
     else:
         raise ValueError("잘못된 모드입니다.")
@@ -404,10 +375,10 @@ def fetch_video_details(youtube, video_ids):
     for i in range(0, len(video_ids), chunk_size):
         chunk = video_ids[i:i+chunk_size]
         try:
-            video_details_response = youtube.videos().list(
+            video_details_response = execute_request(youtube.videos().list(
                 part="snippet,contentDetails,liveStreamingDetails",
                 id=','.join(chunk)
-            ).execute()
+            ))
             video_details.extend(video_details_response.get('items', []))
         except Exception as e:
             logging.error(f"비디오 세부 정보를 가져오는 중 오류 발생: {e}")
@@ -418,21 +389,19 @@ def fetch_and_post_videos(youtube):
     logging.info(f"YOUTUBE_DETAILVIEW 설정: {YOUTUBE_DETAILVIEW}")
     logging.info(f"YOUTUBE_PLAYLIST_SORT 설정: {YOUTUBE_PLAYLIST_SORT}")
 
-    if not os.path.exists(DB_PATH):
-        init_db()
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT video_id FROM videos")
-    existing_video_ids = set(row[0] for row in c.fetchall())
-    conn.close()
+    init_db()
 
     since_date, until_date, past_date = parse_date_filter(DATE_FILTER_YOUTUBE)
 
     videos = fetch_videos(youtube, YOUTUBE_MODE, YOUTUBE_CHANNEL_ID, YOUTUBE_PLAYLIST_ID, YOUTUBE_SEARCH_KEYWORD)
     video_ids = [video[0] for video in videos]
 
-    video_details = fetch_video_details(youtube, video_ids)
+    # 이번에 가져온 비디오 ID만 한 번에 조회합니다. (전체 기록을 메모리에 올리지 않음)
+    existing_video_ids = find_seen(storage.conn, SOURCE, "videos", "video_id", video_ids)
+    logging.info(f"가져온 비디오 {len(video_ids)}개 중 이미 존재하는 비디오 {len(existing_video_ids)}개")
+
+    # 세부 정보는 새 비디오만 요청합니다.
+    video_details = fetch_video_details(youtube, [video_id for video_id in video_ids if video_id not in existing_video_ids])
 
     # 비디오 세부 정보를 딕셔너리로 변환
     video_details_dict = {video['id']: video for video in video_details}
@@ -445,6 +414,10 @@ def fetch_and_post_videos(youtube):
 
     # videos 리스트의 순서를 유지하면서 처리
     for video_id, snippet in videos:
+        if video_id in existing_video_ids:
+            logging.debug(f"이미 존재하는 비디오 건너뛰기: {video_id}")
+            continue
+
         if video_id not in video_details_dict:
             logging.warning(f"비디오 세부 정보를 찾을 수 없음: {video_id}")
             continue
@@ -455,10 +428,6 @@ def fetch_and_post_videos(youtube):
         live_streaming_details = video_detail.get('liveStreamingDetails', {})
 
         published_at = snippet['publishedAt']
-        
-        if video_id in existing_video_ids:
-            logging.info(f"이미 존재하는 비디오 건너뛰기: {video_id}")
-            continue
 
         if not is_within_date_range(published_at, since_date, until_date, past_date):
             logging.info(f"날짜 필터에 의해 건너뛰어진 비디오: {snippet['title']}")
@@ -497,7 +466,7 @@ def fetch_and_post_videos(youtube):
             'live_broadcast_content': live_broadcast_content,
             'scheduled_start_time': scheduled_start_time,
             'caption': caption,
-            'source': YOUTUBE_MODE
+            'mode': YOUTUBE_MODE
         }
         
         new_videos.append(video_data)
@@ -575,6 +544,7 @@ def fetch_and_post_videos(youtube):
             logging.info("YOUTUBE_DETAILVIEW가 False이므로 임베드 메시지를 전송하지 않습니다.")
         
         save_video(video)
+        storage.item_done()
         logging.info(f"비디오 정보 저장 완료: {video['title']}")
 
     logging.info("fetch_and_post_videos 함수 종료")
@@ -582,6 +552,8 @@ def fetch_and_post_videos(youtube):
 if __name__ == "__main__":
     try:
         check_env_variables()
+        storage = StorageSession(DB_PATH)
+        migrate_schema(storage, SOURCE)
         if INITIALIZE_MODE_YOUTUBE:
             init_db(reset=True)
             logging.info("초기화 모드로 실행 중: 데이터베이스를 재설정하고 모든 비디오를 다시 가져옵니다.")
@@ -596,14 +568,13 @@ if __name__ == "__main__":
         logging.info(f"YOUTUBE_DETAILVIEW: {YOUTUBE_DETAILVIEW}")
         logging.info(f"데이터베이스 파일 크기: {os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else '파일 없음'}")
         
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM videos")
-        count = c.fetchone()[0]
+        count = storage.conn.execute("SELECT COUNT(*) FROM videos WHERE source = ?", (SOURCE,)).fetchone()[0]
         logging.info(f"데이터베이스의 비디오 수: {count}")
-        conn.close()
         
     except Exception as e:
         logging.error(f"오류 발생: {e}", exc_info=True)
     finally:
+        if storage:
+            storage.close()
+        close_session()
         logging.info("스크립트 실행 완료")
\ No newline at end of file